@@ -0,0 +1,311 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Process-wide VAD and smart-turn model sessions.
+
+`bot()` used to build a `SileroVADAnalyzer` and a `LocalSmartTurnAnalyzerV3`
+for every call, and each loaded its ONNX model into a new inference session
+(plus a Whisper feature extractor for smart-turn), so every call paid the
+load time and carried its own copy of both models. `ModelRegistry` loads each
+model once per process. The analyzers it hands out keep only their per-call
+state (Silero's recurrent state, smart-turn's audio buffer) and share the
+sessions, which ONNX Runtime allows to be run from several threads at once.
+
+Smart-turn inference also moves off the event loop: pipecat runs it inline,
+blocking every call in the process for each prediction. Predictions from all
+calls now go through one `SmartTurnBatcher`, which runs them on a small
+thread pool, optionally several to an ONNX call, and ends the turn on silence
+instead of queueing without bound when the pool falls behind. Each session
+uses `ONNX_INTRA_OP_THREADS` threads per inference, so calls do not
+oversubscribe the cores.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import resources
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import onnxruntime as ort
+from loguru import logger
+from pipecat.audio.turn.smart_turn.base_smart_turn import BaseSmartTurn, SmartTurnTimeoutException
+from pipecat.audio.turn.smart_turn.local_smart_turn_v3 import LocalSmartTurnAnalyzerV3
+from pipecat.audio.vad.silero import SileroOnnxModel, SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer
+from transformers import WhisperFeatureExtractor
+
+import metrics
+
+SMART_TURN_SECONDS = 8
+SMART_TURN_SAMPLE_RATE = 16000
+
+
+def _model_path(package: str, name: str) -> str:
+    return str(resources.files(package).joinpath(name))
+
+
+class _SileroState(SileroOnnxModel):
+    """Silero's per-call recurrent state over a shared session."""
+
+    def __init__(self, session: ort.InferenceSession):
+        self.session = session
+        self.reset_states()
+        self.sample_rates = [8000, 16000]
+
+
+class SharedSileroVADAnalyzer(SileroVADAnalyzer):
+    """`SileroVADAnalyzer` over the registry's shared session."""
+
+    def __init__(self, registry: "ModelRegistry", **kwargs):
+        # Skip SileroVADAnalyzer.__init__, which loads its own model
+        VADAnalyzer.__init__(self, **kwargs)
+        self._model = _SileroState(registry.vad_session())
+        self._last_reset_time = 0
+
+
+class SharedSmartTurnAnalyzer(LocalSmartTurnAnalyzerV3):
+    """`LocalSmartTurnAnalyzerV3` over the registry's shared session, run off the event loop."""
+
+    def __init__(self, registry: "ModelRegistry", **kwargs):
+        # Skip LocalSmartTurnAnalyzerV3.__init__, which loads its own model
+        BaseSmartTurn.__init__(self, **kwargs)
+        self._registry = registry
+
+    async def _predict_endpoint(self, audio_array: np.ndarray) -> Dict[str, Any]:
+        return await self._registry.predict_end_of_turn(audio_array)
+
+
+class SmartTurnBatcher:
+    """Runs end-of-turn predictions from all calls, several to an inference.
+
+    A batch starts with the oldest waiting prediction and takes whatever else
+    arrives within `max_wait` seconds, up to `max_batch`. At most `workers`
+    batches run at once; predictions arriving meanwhile wait in the queue, so
+    batches grow by themselves under load. A prediction that finds
+    `max_queue` others waiting is not run: the turn ends on silence
+    (smart-turn's `stop_secs`) instead of waiting behind the backlog.
+
+    Args:
+        predict_batch: Blocking function from audio arrays to probabilities.
+        executor: Thread pool `predict_batch` runs on.
+        workers: Batches that may run at once (the pool's size).
+        max_batch: Most predictions per inference (1 disables batching).
+        max_wait: Seconds a batch waits to fill up.
+        max_queue: Most predictions waiting to run.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[np.ndarray]], List[float]],
+        executor: ThreadPoolExecutor,
+        *,
+        workers: int = 2,
+        max_batch: int = 1,
+        max_wait: float = 0.005,
+        max_queue: int = 32,
+    ):
+        self._predict_batch = predict_batch
+        self._executor = executor
+        self._workers = workers
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = set()
+
+    async def predict(self, audio: np.ndarray) -> float:
+        """Probability that the turn in `audio` is complete.
+
+        Raises:
+            SmartTurnTimeoutException: If the queue is full.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self._max_queue)
+            self._task = asyncio.create_task(self._run())
+        future = loop.create_future()
+        try:
+            self._queue.put_nowait((time.perf_counter(), audio, future))
+        except asyncio.QueueFull:
+            metrics.SMART_TURN_REJECTED_TOTAL.inc()
+            raise SmartTurnTimeoutException("Smart-turn queue is full")
+        return await future
+
+    async def _run(self):
+        slots = asyncio.Semaphore(self._workers)
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            await slots.acquire()
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+            task = asyncio.create_task(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _run_batch(self, batch: List[Tuple[float, np.ndarray, asyncio.Future]]):
+        # Callers that went away (e.g. the call ended) need no result
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        metrics.SMART_TURN_BATCH_SIZE.observe(len(batch))
+        loop = asyncio.get_running_loop()
+        try:
+            probabilities = await loop.run_in_executor(
+                self._executor, self._predict_batch, [audio for _, audio, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        now = time.perf_counter()
+        for (requested, _, future), probability in zip(batch, probabilities):
+            metrics.SMART_TURN_SECONDS.observe(now - requested)
+            if not future.done():
+                future.set_result(probability)
+
+
+class ModelRegistry:
+    """Loads the VAD and smart-turn models once and shares them between calls.
+
+    Args:
+        intra_op_threads: Threads each inference may use.
+        inference_threads: Smart-turn inferences that can run at once.
+        max_batch: Most end-of-turn predictions per smart-turn inference.
+        max_wait: Seconds a smart-turn batch waits to fill up.
+        max_queue: Most end-of-turn predictions waiting to run.
+    """
+
+    def __init__(
+        self,
+        *,
+        intra_op_threads: int = 1,
+        inference_threads: int = 2,
+        max_batch: int = 1,
+        max_wait: float = 0.005,
+        max_queue: int = 32,
+    ):
+        self._intra_op_threads = intra_op_threads
+        self._lock = threading.Lock()
+        self._vad_session: Optional[ort.InferenceSession] = None
+        self._smart_turn_session: Optional[ort.InferenceSession] = None
+        self._feature_extractor: Optional[WhisperFeatureExtractor] = None
+        self._batcher = SmartTurnBatcher(
+            self._predict_batch,
+            ThreadPoolExecutor(max_workers=inference_threads, thread_name_prefix="smart-turn"),
+            workers=inference_threads,
+            max_batch=max_batch,
+            max_wait=max_wait,
+            max_queue=max_queue,
+        )
+
+    def _session(self, path: str) -> ort.InferenceSession:
+        options = ort.SessionOptions()
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = self._intra_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    def vad_session(self) -> ort.InferenceSession:
+        if self._vad_session is None:
+            with self._lock:
+                if self._vad_session is None:
+                    started = time.perf_counter()
+                    self._vad_session = self._session(_model_path("pipecat.audio.vad.data", "silero_vad.onnx"))
+                    logger.debug(f"Loaded Silero VAD in {time.perf_counter() - started:.2f}s")
+        return self._vad_session
+
+    def smart_turn_session(self) -> ort.InferenceSession:
+        if self._smart_turn_session is None:
+            with self._lock:
+                if self._smart_turn_session is None:
+                    started = time.perf_counter()
+                    self._feature_extractor = WhisperFeatureExtractor(chunk_length=SMART_TURN_SECONDS)
+                    self._smart_turn_session = self._session(
+                        _model_path("pipecat.audio.turn.smart_turn.data", "smart-turn-v3.0.onnx")
+                    )
+                    logger.debug(f"Loaded smart-turn v3 in {time.perf_counter() - started:.2f}s")
+        return self._smart_turn_session
+
+    def load(self):
+        """Load both models now (slow: call from a worker thread when on the event loop)."""
+        self.vad_session()
+        self.smart_turn_session()
+
+    def vad_analyzer(self, **kwargs) -> SharedSileroVADAnalyzer:
+        """A VAD analyzer for one call. Takes `SileroVADAnalyzer`'s arguments."""
+        return SharedSileroVADAnalyzer(self, **kwargs)
+
+    def turn_analyzer(self, **kwargs) -> SharedSmartTurnAnalyzer:
+        """A smart-turn analyzer for one call. Takes `BaseSmartTurn`'s arguments."""
+        return SharedSmartTurnAnalyzer(self, **kwargs)
+
+    def features(self, audios: List[np.ndarray]) -> np.ndarray:
+        """Whisper features of the last 8 seconds of each 16 kHz audio, as (batch, mels, frames)."""
+        max_samples = SMART_TURN_SECONDS * SMART_TURN_SAMPLE_RATE
+        # Keep the end; shorter audio is padded with silence at the start
+        audios = [audio[-max_samples:] for audio in audios]
+        audios = [np.pad(audio, (max_samples - len(audio), 0)) for audio in audios]
+        inputs = self._feature_extractor(
+            audios,
+            sampling_rate=SMART_TURN_SAMPLE_RATE,
+            return_tensors="np",
+            padding="max_length",
+            max_length=max_samples,
+            truncation=True,
+            do_normalize=True,
+        )
+        return inputs.input_features.astype(np.float32)
+
+    def _predict_batch(self, audios: List[np.ndarray]) -> List[float]:
+        session = self.smart_turn_session()
+        logits = session.run(None, {"input_features": self.features(audios)})[0]
+        return [row[0].item() for row in logits]
+
+    async def predict_end_of_turn(self, audio: np.ndarray) -> Dict[str, Any]:
+        """Whether the caller has finished their turn, as `_predict_endpoint` returns it.
+
+        Raises:
+            SmartTurnTimeoutException: If too many predictions are waiting.
+        """
+        probability = await self._batcher.predict(audio)
+        return {"prediction": 1 if probability > 0.5 else 0, "probability": probability}
+
+
+_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide registry, so all calls share one copy of each model."""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(
+            intra_op_threads=int(os.getenv("ONNX_INTRA_OP_THREADS", "1")),
+            inference_threads=int(os.getenv("SMART_TURN_THREADS", "2")),
+            max_batch=int(os.getenv("SMART_TURN_MAX_BATCH", "1")),
+            max_wait=float(os.getenv("SMART_TURN_MAX_WAIT_MS", "5")) / 1000,
+            max_queue=int(os.getenv("SMART_TURN_MAX_QUEUE", "32")),
+        )
+    return _registry
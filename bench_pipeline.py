@@ -0,0 +1,485 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Replay scripted calls through the bot's pipeline with local stand-in services.
+
+`run_bot` builds the pipeline exactly as it does for a real call (greeting,
+RAG processor, context aggregators, context budget, filler, tool executor),
+but with stand-ins for everything on the network:
+
+- a fake transport, which plays the caller's side: speech start, VAD stop and
+  end of turn, then waits for the bot to finish answering
+- a scripted transcript source in place of Deepgram (interim and final
+  transcripts for each caller turn)
+- a canned streaming LLM in place of Cerebras, including tool calls, which go
+  through the real tool handlers
+- a synthetic PCM TTS in place of Cartesia, and a canned RAG lookup
+
+The stand-ins answer instantly, so the time from the end of the caller's turn
+to the bot's first audio is the overhead of our processors, pipecat and the
+pipeline wiring. A second pass with tracemalloc reports the memory allocated
+per turn. No network access is needed, so --max-overhead-ms can fail CI on a
+regression.
+
+Recorded conversations can be replayed with --script: a JSON list of turns
+like the built-in SCRIPT, e.g.
+
+    [{"user": "What time do you open?", "reply": "We open at 8am.", "rag": "- Opening hours, 8am"}]
+
+with an optional "tool" ({"name": ..., "arguments": {...}}) and "after_tool"
+reply for turns where the LLM calls a tool first.
+
+Usage:
+    uv run bench_pipeline.py
+    uv run bench_pipeline.py --runs 5 --json pipeline.json --max-overhead-ms 50
+    uv run bench_pipeline.py --script call.json --no-alloc
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import AsyncGenerator, List, Optional
+
+from loguru import logger
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import (
+    Choice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    EndTaskFrame,
+    Frame,
+    InputAudioRawFrame,
+    InterimTranscriptionFrame,
+    StartFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+    VADUserStartedSpeakingFrame,
+    VADUserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.services.openai.llm import OpenAILLMService
+from pipecat.services.tts_service import TTSService
+from pipecat.transports.base_transport import BaseTransport
+
+# The TTS cache is shared with real calls, so keep the replay's in its own directory
+os.environ["TTS_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-tts-cache-")
+
+from bot import CARTESIA_VOICE_ID, run_bot  # noqa: E402
+from filler import FILLER_TEXT  # noqa: E402
+from greeting import GREETING_TEXT  # noqa: E402
+from tts_cache import cache_key, get_tts_cache  # noqa: E402
+
+SAMPLE_RATE = 24000
+
+SCRIPT = [
+    {
+        "user": "Hi, I was wondering how much laser hair removal costs",
+        "reply": "It depends on the area. Which area were you thinking of?",
+        "rag": "- Laser hair removal pricing, quote per area and offer a free consultation",
+    },
+    {
+        "user": "Just the lower legs",
+        "reply": "Lower legs are 99 euro per session. Would you like to book a consultation?",
+        "rag": "- Lower legs laser, 99 euro per session",
+    },
+    {
+        "user": "Yes please, is next Saturday morning free?",
+        "reply": "Give me one second to search this up.",
+        "tool": {"name": "check_availability", "arguments": {"appointment_type": "consultation", "date": "Saturday"}},
+        "after_tool": "Saturday morning is available. Could I get your name and email to book that in?",
+        "rag": "- Availability, always use the check_availability tool",
+    },
+    {
+        "user": "It's Sarah Murphy, sarah at example dot com",
+        "reply": "Thanks Sarah, I'll set that up now.",
+        "tool": {
+            "name": "create_patient",
+            "arguments": {"phone_number": "+353870000000", "name": "Sarah Murphy", "email": "sarah@example.com"},
+        },
+        "after_tool": "You're all set. Is there anything else I can help you with?",
+        "rag": "- New patients, collect name, phone number and email before booking",
+    },
+    {
+        "user": "What's the cancellation policy?",
+        "reply": "We just need 24 hours notice to cancel or move your appointment.",
+        "rag": "- Cancellation policy, 24 hours notice required",
+    },
+    {
+        "user": "Great, thanks",
+        "reply": "You're welcome, have a great day!",
+        "rag": "",
+    },
+]
+
+
+def _pcm(seconds: float) -> bytes:
+    return bytes(int(SAMPLE_RATE * seconds) * 2)
+
+
+class CannedLLM(OpenAILLMService):
+    """Streams the scripted reply for the latest user turn, token by token.
+
+    Chunks go through the OpenAI service's own streaming path, so function
+    calls, response frames and metrics behave as with the real provider.
+    """
+
+    def __init__(self, script: List[dict], **kwargs):
+        super().__init__(model="canned", api_key="bench", **kwargs)
+        self._script = script
+
+    async def get_chat_completions(self, params_from_context) -> AsyncGenerator[ChatCompletionChunk, None]:
+        messages = params_from_context["messages"]
+        users = [i for i, m in enumerate(messages) if m.get("role") == "user"]
+        turn = self._script[(len(users) - 1) % len(self._script)]
+        # Called again with the tool result
+        after_tool = any(m.get("role") == "tool" for m in messages[users[-1] + 1 :]) if users else False
+        if after_tool:
+            return self._stream(turn.get("after_tool", ""), None)
+        return self._stream(turn["reply"], turn.get("tool"))
+
+    async def run_inference(self, context) -> str:
+        # Context compaction's summary
+        return "The caller asked about laser hair removal and booked a consultation."
+
+    @staticmethod
+    def _chunk(delta: ChoiceDelta) -> ChatCompletionChunk:
+        return ChatCompletionChunk(
+            id="canned",
+            choices=[Choice(index=0, delta=delta, finish_reason=None)],
+            created=0,
+            model="canned",
+            object="chat.completion.chunk",
+        )
+
+    async def _stream(self, text: str, tool: Optional[dict]) -> AsyncGenerator[ChatCompletionChunk, None]:
+        for i, word in enumerate(text.split()):
+            yield self._chunk(ChoiceDelta(content=word if i == 0 else f" {word}"))
+        if tool:
+            function = ChoiceDeltaToolCallFunction(name=tool["name"], arguments=json.dumps(tool.get("arguments", {})))
+            call = ChoiceDeltaToolCall(index=0, id=f"call_{uuid.uuid4().hex[:8]}", function=function, type="function")
+            yield self._chunk(ChoiceDelta(tool_calls=[call]))
+
+
+class SyntheticTTS(TTSService):
+    """Returns silent PCM, about as long as the sentence would take to say."""
+
+    def __init__(self, seconds_per_word: float = 0.3, chunk_seconds: float = 0.04, **kwargs):
+        super().__init__(sample_rate=SAMPLE_RATE, **kwargs)
+        self._seconds_per_word = seconds_per_word
+        self._chunk_seconds = chunk_seconds
+
+    def can_generate_metrics(self) -> bool:
+        return True
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        yield TTSStartedFrame()
+        chunk = _pcm(self._chunk_seconds)
+        for _ in range(max(1, round(len(text.split()) * self._seconds_per_word / self._chunk_seconds))):
+            yield TTSAudioRawFrame(audio=chunk, sample_rate=SAMPLE_RATE, num_channels=1)
+        yield TTSStoppedFrame()
+
+
+class ScriptedSTT(FrameProcessor):
+    """Transcribes each caller turn as the next scripted utterance.
+
+    Interim transcripts follow the start of speech and the final transcript
+    comes with the VAD stop, as they do from Deepgram.
+    """
+
+    def __init__(self, script: List[dict], **kwargs):
+        super().__init__(**kwargs)
+        self._script = script
+        self._turn = 0
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        await self.push_frame(frame, direction)
+
+        if direction != FrameDirection.DOWNSTREAM:
+            return
+        if isinstance(frame, UserStartedSpeakingFrame):
+            words = self._script[self._turn % len(self._script)]["user"].split()
+            for n in range(2, len(words), 3):
+                await self.push_frame(InterimTranscriptionFrame(" ".join(words[:n]), "caller", _timestamp()))
+        elif isinstance(frame, VADUserStoppedSpeakingFrame):
+            text = self._script[self._turn % len(self._script)]["user"]
+            self._turn += 1
+            await self.push_frame(TranscriptionFrame(text, "caller", _timestamp()))
+
+
+def _timestamp() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class ReplayTransport(BaseTransport):
+    """Plays the caller's side of the script and collects the bot's audio.
+
+    Args:
+        turns: Caller turns to replay.
+        turn_delay: Seconds between VAD stop and end of turn, as smart-turn
+            takes to decide; the final transcript arrives meanwhile.
+        settle: Seconds the bot must stay quiet before its answer counts as
+            finished (a tool call can follow the first sentence).
+        turn_timeout: Seconds to wait for an answer before moving on.
+    """
+
+    EVENTS = (
+        "on_client_connected",
+        "on_client_disconnected",
+        "on_dialin_ready",
+        "on_dialin_connected",
+        "on_dialin_stopped",
+        "on_dialin_error",
+        "on_dialin_warning",
+        "on_recording_started",
+        "on_recording_stopped",
+        "on_recording_error",
+    )
+
+    def __init__(self, turns: int, *, turn_delay: float = 0.05, settle: float = 0.2, turn_timeout: float = 10.0):
+        super().__init__()
+        for event in self.EVENTS:
+            self._register_event_handler(event)
+        self.turns = turns
+        self.turn_delay = turn_delay
+        self.settle = settle
+        self.turn_timeout = turn_timeout
+        # One dict per replayed turn: times and memory, filled in by input and output
+        self.results: List[dict] = []
+        self.bot_speaking = False
+        self.last_audio_at = 0.0
+        self._input = _ReplayInput(self)
+        self._output = _ReplayOutput(self)
+
+    def input(self) -> FrameProcessor:
+        return self._input
+
+    def output(self) -> FrameProcessor:
+        return self._output
+
+    async def bot_finished(self):
+        """Wait until the bot has answered and stayed quiet for `settle` seconds."""
+        deadline = time.perf_counter() + self.turn_timeout
+        while time.perf_counter() < deadline:
+            if not self.bot_speaking and self.last_audio_at and time.perf_counter() - self.last_audio_at >= self.settle:
+                return
+            await asyncio.sleep(0.01)
+        logger.warning("Bot did not finish answering in time")
+
+
+class _ReplayInput(FrameProcessor):
+    def __init__(self, transport: ReplayTransport, **kwargs):
+        super().__init__(**kwargs)
+        self._transport = transport
+        self._task = None
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        await self.push_frame(frame, direction)
+
+        if isinstance(frame, StartFrame):
+            await self._transport._call_event_handler("on_client_connected", None)
+            self._task = self.create_task(self._replay())
+
+    async def _speech(self, seconds: float):
+        for _ in range(int(seconds / 0.02)):
+            await self.push_frame(InputAudioRawFrame(audio=_pcm(0.02), sample_rate=16000, num_channels=1))
+
+    async def _replay(self):
+        transport = self._transport
+        # First caller audio triggers the greeting
+        await self._speech(0.02)
+        await transport.bot_finished()
+
+        for _ in range(transport.turns):
+            result = {}
+            transport.results.append(result)
+            await self.push_frame(VADUserStartedSpeakingFrame())
+            await self.push_frame(UserStartedSpeakingFrame())
+            await self.push_interruption_task_frame_and_wait()
+            await self._speech(0.2)
+            await self.push_frame(VADUserStoppedSpeakingFrame())
+            await asyncio.sleep(transport.turn_delay)
+
+            transport.last_audio_at = 0.0
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+                result["memory_start"] = tracemalloc.get_traced_memory()[0]
+            result["turn_end"] = time.perf_counter()
+            await self.push_frame(UserStoppedSpeakingFrame())
+            await transport.bot_finished()
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                result["peak_kib"] = (peak - result["memory_start"]) / 1024
+                result["retained_kib"] = (current - result["memory_start"]) / 1024
+
+        await self.push_frame(EndTaskFrame(), FrameDirection.UPSTREAM)
+
+
+class _ReplayOutput(FrameProcessor):
+    def __init__(self, transport: ReplayTransport, **kwargs):
+        super().__init__(**kwargs)
+        self._transport = transport
+
+    async def _set_speaking(self, speaking: bool):
+        self._transport.bot_speaking = speaking
+        frame_type = BotStartedSpeakingFrame if speaking else BotStoppedSpeakingFrame
+        await self.push_frame(frame_type())
+        await self.push_frame(frame_type(), FrameDirection.UPSTREAM)
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        transport = self._transport
+        if isinstance(frame, TTSAudioRawFrame):
+            now = time.perf_counter()
+            transport.last_audio_at = now
+            if transport.results:
+                result = transport.results[-1]
+                result.setdefault("first_audio", now)
+                result["last_audio"] = now
+            if not transport.bot_speaking:
+                await self._set_speaking(True)
+            # Audio is "played" here, not passed on
+            return
+        if isinstance(frame, TTSStoppedFrame) and transport.bot_speaking:
+            await self._set_speaking(False)
+
+        await self.push_frame(frame, direction)
+
+
+async def replay(script: List[dict], turns: int, turn_delay: float, settle: float) -> List[dict]:
+    """Replay one call and return the per-turn results."""
+    # Pre-rendered greeting and filler, as bot workers preload them
+    cache = get_tts_cache()
+    for text in (GREETING_TEXT, FILLER_TEXT):
+        await cache.put(cache_key(text, CARTESIA_VOICE_ID, SAMPLE_RATE, "sonic-2"), _pcm(len(text.split()) * 0.3))
+
+    async def rag_lookup(user_text: str, assistant_text: str) -> str:
+        for turn in script:
+            if turn["user"] == user_text:
+                return turn.get("rag", "")
+        return ""
+
+    transport = ReplayTransport(turns, turn_delay=turn_delay, settle=settle)
+    await run_bot(
+        transport,
+        f"bench-{uuid.uuid4().hex[:8]}",
+        "sip:bench@localhost",
+        False,
+        stt=ScriptedSTT(script),
+        llm=CannedLLM(script),
+        tts=SyntheticTTS(),
+        rag_lookup=rag_lookup,
+    )
+    return transport.results
+
+
+def _summarize(values: List[float]) -> dict:
+    if not values:
+        return {}
+    return {
+        "median": statistics.median(values),
+        "p90": statistics.quantiles(values, n=10, method="inclusive")[-1] if len(values) > 1 else values[0],
+        "max": max(values),
+    }
+
+
+async def run(args, script: List[dict]) -> dict:
+    overhead, response, answered = [], [], 0
+    for _ in range(args.runs):
+        for result in await replay(script, args.turns, args.turn_delay, args.settle):
+            if "first_audio" in result:
+                answered += 1
+                overhead.append((result["first_audio"] - result["turn_end"]) * 1000)
+                response.append((result["last_audio"] - result["turn_end"]) * 1000)
+
+    allocations = []
+    if not args.no_alloc:
+        tracemalloc.start()
+        try:
+            allocations = [r for r in await replay(script, args.turns, args.turn_delay, args.settle) if "peak_kib" in r]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "turns": args.runs * args.turns,
+        "answered": answered,
+        "overhead_ms": _summarize(overhead),
+        "response_ms": _summarize(response),
+        "peak_kib": _summarize([r["peak_kib"] for r in allocations]),
+        "retained_kib": _summarize([r["retained_kib"] for r in allocations]),
+        "per_turn_overhead_ms": overhead,
+    }
+
+
+def print_report(results: dict):
+    print(f"turns answered: {results['answered']}/{results['turns']}")
+    rows = [
+        ("end of turn -> first audio (ms)", results["overhead_ms"]),
+        ("end of turn -> last audio (ms)", results["response_ms"]),
+        ("allocated at peak per turn (KiB)", results["peak_kib"]),
+        ("retained per turn (KiB)", results["retained_kib"]),
+    ]
+    for label, stats in rows:
+        if stats:
+            print(f"  {label:34} median {stats['median']:8.1f}  p90 {stats['p90']:8.1f}  max {stats['max']:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay scripted calls through the bot pipeline offline")
+    parser.add_argument("--script", help="JSON file of turns to replay (default: built-in call)")
+    parser.add_argument("--turns", type=int, help="Caller turns per call (default: length of the script)")
+    parser.add_argument("--runs", type=int, default=3, help="Calls to replay for timing")
+    parser.add_argument(
+        "--turn-delay", type=float, default=0.05, help="Seconds from VAD stop to end of turn (smart-turn decision)"
+    )
+    parser.add_argument("--settle", type=float, default=0.2, help="Seconds of bot silence that end an answer")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--max-overhead-ms", type=float, help="Fail if the median overhead is above this")
+    parser.add_argument("--verbose", action="store_true", help="Keep the bot's debug logs")
+    args = parser.parse_args()
+
+    script = SCRIPT
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    args.turns = args.turns or len(script)
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    results = asyncio.run(run(args, script))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if results["answered"] < results["turns"]:
+        sys.exit("Some turns were not answered")
+    if args.max_overhead_ms is not None and results["overhead_ms"]["median"] > args.max_overhead_ms:
+        sys.exit(f"Median overhead {results['overhead_ms']['median']:.1f}ms is above {args.max_overhead_ms}ms")
+
+
+if __name__ == "__main__":
+    main()
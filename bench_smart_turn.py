@@ -0,0 +1,105 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Benchmark batched smart-turn inference across concurrent calls.
+
+Whether batching end-of-turn predictions pays off depends on the CPU: on
+some machines one ONNX call over a batch costs less per prediction than
+separate calls, on others (small caches, one core) it costs more. This runs
+`--calls` simulated calls in one process, each asking for end-of-turn
+predictions at its own pace, through `ModelRegistry` with every
+`--max-batch` value, and reports predictions per second and prediction
+latency, so SMART_TURN_MAX_BATCH can be picked for the host.
+
+Usage:
+    uv run bench_smart_turn.py
+    uv run bench_smart_turn.py --calls 32 --max-batch 1 2 4 8 --wait-ms 5 --json smart_turn.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import numpy as np
+from loguru import logger
+
+from audio_models import ModelRegistry
+
+
+async def simulate(registry: ModelRegistry, calls: int, seconds: float, gap: float) -> dict:
+    """Run `calls` callers for `seconds`; each waits about `gap` seconds between predictions."""
+    rng = np.random.default_rng(0)
+    # 1 to 6 seconds of speech, as smart-turn sees at the end of a turn
+    audios = [(rng.standard_normal(int(16000 * rng.uniform(1, 6))) * 0.1).astype(np.float32) for _ in range(8)]
+    latencies = []
+    rejected = 0
+    stop_at = time.perf_counter() + seconds
+
+    async def caller():
+        nonlocal rejected
+        await asyncio.sleep(random.uniform(0, gap))
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                await registry.predict_end_of_turn(random.choice(audios))
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                rejected += 1
+            await asyncio.sleep(random.uniform(0.5, 1.5) * gap)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    return {
+        "predictions_per_second": len(latencies) / elapsed,
+        "latency_ms_median": statistics.median(latencies) * 1000 if latencies else None,
+        "latency_ms_p90": statistics.quantiles(latencies, n=10, method="inclusive")[-1] * 1000 if len(latencies) > 1 else None,
+        "rejected": rejected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched smart-turn inference")
+    parser.add_argument("--calls", type=int, default=16, help="Concurrent simulated calls")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each configuration")
+    parser.add_argument("--gap", type=float, default=0.5, help="Average seconds between a call's predictions")
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--wait-ms", type=float, default=5.0, help="Batch wait window")
+    parser.add_argument("--threads", type=int, default=2, help="Inferences that can run at once")
+    parser.add_argument("--intra-op-threads", type=int, default=1)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+    logger.remove()
+
+    results = {}
+    for max_batch in args.max_batch:
+        registry = ModelRegistry(
+            intra_op_threads=args.intra_op_threads,
+            inference_threads=args.threads,
+            max_batch=max_batch,
+            max_wait=args.wait_ms / 1000,
+            max_queue=args.max_queue,
+        )
+        registry.load()
+        result = asyncio.run(simulate(registry, args.calls, args.seconds, args.gap))
+        results[max_batch] = result
+        print(
+            f"max batch {max_batch:2}: {result['predictions_per_second']:6.1f} predictions/s, "
+            f"latency median {result['latency_ms_median'] or 0:6.1f}ms p90 {result['latency_ms_p90'] or 0:6.1f}ms, "
+            f"rejected {result['rejected']}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
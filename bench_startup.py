@@ -0,0 +1,190 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Benchmark server import and startup time.
+
+With `min_machines_running = 0` on Fly, a cold start directly delays the first
+caller, so we track:
+- import: time to `import server` in a fresh interpreter
+- health: time from launching uvicorn until /health answers (liveness)
+- ready: time from launching uvicorn until /ready reports warm-up finished
+- health_stall: slowest /health response while warm-up runs
+
+Each measurement uses a new process. Results are printed, and can be written
+as JSON to compare runs; --max-health makes the script fail (for CI) if the
+server takes too long to start answering.
+
+Usage:
+    uv run bench_startup.py
+    uv run bench_startup.py --runs 10 --json startup.json --max-health 1.0
+    uv run bench_startup.py --importtime   # slowest imports of `import server`
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Keep the benchmark offline and independent of bot workers. The SIP room
+# pool stays on, as in production, so its first refill is part of startup;
+# room creation fails fast against a closed local port.
+BENCH_ENV = {
+    "BOT_WORKERS": "0",
+    "SIP_ROOM_POOL_SIZE": "2",
+    "DAILY_API_KEY": "bench",
+    "DAILY_API_URL": "http://127.0.0.1:9",
+    "QDRANT_URL": "",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import() -> float:
+    """Seconds to import server.py in a fresh interpreter."""
+    code = "import time; t = time.perf_counter(); import server; print(time.perf_counter() - t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=HERE,
+        env={**os.environ, **BENCH_ENV},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _status(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as r:
+            return r.status, json.loads(r.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return None, None
+
+
+def measure_startup(timeout: float) -> dict:
+    """Seconds from launching uvicorn until /health and /ready answer.
+
+    Also records the slowest /health response between the two (health_stall):
+    work on the event loop during warm-up shows up there.
+    """
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=HERE,
+        env={**os.environ, **BENCH_ENV},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    result = {"health": None, "ready": None, "health_stall": None}
+    try:
+        while time.perf_counter() - started < timeout:
+            if result["health"] is None:
+                status, _ = _status(f"{base}/health")
+                if status == 200:
+                    result["health"] = time.perf_counter() - started
+                    result["health_stall"] = 0.0
+            else:
+                # Warm-up must not hold up the event loop: time /health while it runs
+                requested = time.perf_counter()
+                _status(f"{base}/health")
+                result["health_stall"] = max(result["health_stall"], time.perf_counter() - requested)
+                status, body = _status(f"{base}/ready")
+                components = (body or {}).get("components", {})
+                if status is not None and "loading" not in components.values():
+                    result["ready"] = time.perf_counter() - started
+                    break
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return result
+
+
+def print_importtime(limit: int = 20):
+    """Print the slowest imports (cumulative) of `import server`."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=HERE,
+        env={**os.environ, **BENCH_ENV},
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:limit]:
+        print(f"{cumulative_us / 1000:8.1f}ms cumulative {self_us / 1000:8.1f}ms self  {name}")
+
+
+def _summary(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark server import and startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-run startup timeout (s)")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--max-health", type=float, help="Fail if median time to /health exceeds this (s)")
+    parser.add_argument("--importtime", action="store_true", help="Show the slowest imports and exit")
+    args = parser.parse_args()
+
+    if args.importtime:
+        print_importtime()
+        return
+
+    imports = [measure_import() for _ in range(args.runs)]
+    startups = [measure_startup(args.timeout) for _ in range(args.runs)]
+    results = {
+        "import": _summary(imports),
+        "health": _summary([s["health"] for s in startups]),
+        "ready": _summary([s["ready"] for s in startups]),
+        "health_stall": _summary([s["health_stall"] for s in startups]),
+    }
+
+    for name, summary in results.items():
+        if summary is None:
+            print(f"{name:>12}: did not complete")
+        else:
+            print(
+                f"{name:>12}: median {summary['median'] * 1000:.0f}ms "
+                f"(min {summary['min'] * 1000:.0f}ms, max {summary['max'] * 1000:.0f}ms)"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_health is not None:
+        health = results["health"]
+        if health is None or health["median"] > args.max_health:
+            sys.exit(f"Server took too long to answer /health (limit {args.max_health}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Benchmark time-to-first-token for the two RAG context layouts.
+
+- system: retrieved context is rewritten into the end of the system prompt
+  every turn (the previous layout)
+- trailing: the system prompt and history are left untouched and retrieved
+  context goes in a trailing message (`rag_processor.place_rag_context`)
+
+A scripted call is replayed turn by turn with the same messages, tools and
+retrieved context for both layouts, and each turn's request is sent as a
+streaming chat completion to the bot's LLM. For every request we record TTFT
+and how much of the request is identical to the previous request of the same
+layout, which is the most a provider-side prefix cache can reuse. The prefix
+numbers need no API access (--offline).
+
+Each layout starts from a unique call reference, so layouts (and earlier runs)
+do not warm each other's cache.
+
+Usage:
+    uv run bench_ttft.py --offline
+    uv run bench_ttft.py --turns 12 --runs 3 --json ttft.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from model_config import system_prompt, tools
+from rag_processor import RAG_CONTEXT_MARKER, place_rag_context
+
+load_dotenv()
+
+# (user, assistant reply, retrieved context) per turn
+SCRIPT = [
+    (
+        "Hi, I was wondering how much laser hair removal costs",
+        "It depends on the area, which area were you thinking of?",
+        "- Laser hair removal pricing, quote per area and offer a free consultation\n"
+        "- Course of treatments, most clients need 6 to 8 sessions",
+    ),
+    (
+        "Just the lower legs",
+        "Lower legs are 99 euro per session, would you like to book a consultation?",
+        "- Lower legs laser, 99 euro per session\n- Consultation, free and includes a patch test",
+    ),
+    (
+        "What are your opening hours on Saturday?",
+        "We're open from 9am to 5pm on Saturdays.",
+        "- Opening hours, weekdays 8am to 8pm and Saturdays 9am to 5pm\n"
+        "- Sundays, closed except for selected clinics",
+    ),
+    (
+        "Do I need to shave before the patch test?",
+        "Yes, please shave the area the day before your patch test.",
+        "- Patch test preparation, shave 24 hours before and avoid tanning\n"
+        "- Laser aftercare, avoid heat and sun for 48 hours",
+    ),
+    (
+        "Ok can I come in next Saturday morning?",
+        "Let me check availability for next Saturday morning.",
+        "- Booking, confirm the date and time back to the patient\n"
+        "- Availability, always use the check_availability tool",
+    ),
+    (
+        "10am would be great",
+        "Great, could I get your full name and email to book that in?",
+        "- New patients, collect name, phone number and email before booking",
+    ),
+    (
+        "It's Sarah Murphy, sarah at example dot com",
+        "Thanks Sarah, you're booked in for 10am next Saturday.",
+        "- Confirmation, a text and email are sent after booking\n"
+        "- Cancellation policy, 24 hours notice required",
+    ),
+    (
+        "What's the cancellation policy again?",
+        "We just need 24 hours notice to cancel or move your appointment.",
+        "- Cancellation policy, 24 hours notice required, late cancellations may be charged",
+    ),
+]
+
+
+def _base_system_prompt(reference: str) -> str:
+    prompt = system_prompt.format(
+        current_date_and_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        instructions_prompt="1. Find out what the patient needs help with.",
+        patient_context="No patient record found. Collect phone number, name, and email before proceeding.",
+    )
+    return f"Call reference: {reference}\n{prompt}"
+
+
+def rewrite_system_prompt(messages: list, bullets: str) -> list:
+    """The previous layout: context appended to the system prompt."""
+    base_content = messages[0]["content"]
+    if RAG_CONTEXT_MARKER in base_content:
+        base_content = base_content.split(RAG_CONTEXT_MARKER)[0].rstrip()
+    messages[0]["content"] = f"{base_content}\n\n{RAG_CONTEXT_MARKER}\n{bullets}"
+    return messages
+
+
+LAYOUTS = {"system": rewrite_system_prompt, "trailing": place_rag_context}
+
+
+def build_requests(layout: str, turns: int) -> list:
+    """The messages sent for each turn of the scripted call in `layout`."""
+    place = LAYOUTS[layout]
+    messages = [{"role": "system", "content": _base_system_prompt(uuid.uuid4().hex)}]
+    requests = []
+    for turn in range(turns):
+        user, assistant, bullets = SCRIPT[turn % len(SCRIPT)]
+        messages.append({"role": "user", "content": user})
+        place(messages, bullets)
+        requests.append(json.loads(json.dumps(messages)))
+        messages.append({"role": "assistant", "content": assistant})
+    return requests
+
+
+def _serialize(messages: list) -> str:
+    # Roughly how providers lay out the prompt: tools first, then messages
+    return json.dumps({"tools": tools, "messages": messages}, ensure_ascii=False)
+
+
+def shared_prefixes(requests: list) -> list:
+    """Fraction of each request identical to the start of the previous one."""
+    fractions = []
+    previous = ""
+    for messages in requests:
+        current = _serialize(messages)
+        fractions.append(len(os.path.commonprefix([previous, current])) / len(current))
+        previous = current
+    return fractions
+
+
+async def measure_ttft(client, model: str, messages: list) -> float:
+    """Seconds until the first streamed token (text or tool call)."""
+    started = time.perf_counter()
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        tools=tools,
+        stream=True,
+        max_tokens=32,
+    )
+    ttft = None
+    async for chunk in stream:
+        if ttft is None and chunk.choices:
+            delta = chunk.choices[0].delta
+            if delta.content or delta.tool_calls:
+                ttft = time.perf_counter() - started
+    return ttft if ttft is not None else time.perf_counter() - started
+
+
+async def run(args) -> dict:
+    results = {layout: {"prefix": [], "ttft": []} for layout in LAYOUTS}
+    client = None
+    if not args.offline:
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(base_url=args.base_url, api_key=os.environ[args.api_key_env])
+
+    for _ in range(args.runs):
+        requests = {layout: build_requests(layout, args.turns) for layout in LAYOUTS}
+        for layout, layout_requests in requests.items():
+            results[layout]["prefix"].append(shared_prefixes(layout_requests))
+        if client is None:
+            continue
+        ttfts = {layout: [] for layout in LAYOUTS}
+        for turn in range(args.turns):
+            # Alternate which layout goes first to spread out any drift
+            order = list(LAYOUTS) if turn % 2 == 0 else list(reversed(LAYOUTS))
+            for layout in order:
+                ttfts[layout].append(await measure_ttft(client, args.model, requests[layout][turn]))
+        for layout in LAYOUTS:
+            results[layout]["ttft"].append(ttfts[layout])
+    return results
+
+
+def _by_turn(runs: list) -> list:
+    return [statistics.median(values) for values in zip(*runs)] if runs else []
+
+
+def print_report(results: dict):
+    for layout, data in results.items():
+        prefix = _by_turn(data["prefix"])
+        ttft = _by_turn(data["ttft"])
+        print(f"{layout}:")
+        print("  reusable prefix per turn: " + " ".join(f"{p:.0%}" for p in prefix))
+        if ttft:
+            print("  ttft per turn (ms):       " + " ".join(f"{t * 1000:.0f}" for t in ttft))
+            # The first turn is a cold cache for both layouts
+            later = [t for run in data["ttft"] for t in run[1:]] or [t for run in data["ttft"] for t in run]
+            print(f"  ttft after turn 1: median {statistics.median(later) * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TTFT for the RAG context layouts")
+    parser.add_argument("--turns", type=int, default=len(SCRIPT), help="Turns per scripted call")
+    parser.add_argument("--runs", type=int, default=1, help="Scripted calls per layout")
+    parser.add_argument("--model", default="qwen-3-235b-a22b-instruct-2507")
+    parser.add_argument("--base-url", default="https://api.cerebras.ai/v1")
+    parser.add_argument("--api-key-env", default="CEREBRAS_API_KEY", help="Env var holding the API key")
+    parser.add_argument("--offline", action="store_true", help="Only compare reusable prefixes")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,54 +6,58 @@
 
 """Twilio + Daily voice bot implementation."""
 
+import asyncio
+import json
 import os
 import sys
-import json
+import time
 from datetime import datetime
-import asyncio
+
 from dotenv import load_dotenv
 from loguru import logger
-from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.frames.frames import TTSSpeakFrame
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
-from pipecat.services.llm_service import FunctionCallParams
 from pipecat.runner.types import RunnerArguments
-from pipecat.services.cartesia.tts import CartesiaTTSService
-from pipecat.frames.frames import TTSSpeakFrame, UserStoppedSpeakingFrame
 from pipecat.services.deepgram.stt import DeepgramSTTService
+from pipecat.services.llm_service import FunctionCallParams
 from pipecat.services.openai.llm import OpenAILLMService
 from pipecat.transports.base_transport import BaseTransport
 from pipecat.transports.daily.transport import DailyParams, DailyTransport
-from pipecat.audio.turn.smart_turn.local_smart_turn_v3 import LocalSmartTurnAnalyzerV3
-from pipecat.processors.frame_processor import FrameProcessor, FrameDirection
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
-
-from ragprocessing import rag_lookup, init_rag_system
-
-from model_config import (
-    system_prompt as base_system_prompt,
-    tools as function_tools,
-    check_availability as mc_check_availability,
-    lookup_appointments_for_patient as mc_lookup_appointments_for_patient,
-    lookup_patient as mc_lookup_patient,
-    create_patient as mc_create_patient,
-    book_appointment as mc_book_appointment,
-    cancel_appointment as mc_cancel_appointment,
-    reschedule_appointment as mc_reschedule_appointment,
-    take_message as mc_take_message,
-    escalate_to_human as mc_escalate_to_human,
-)
+
+import metrics
+from audio_models import get_model_registry
+from call_forwarding import ForwardError, get_call_forwarder
+from context_budget import ContextBudget
+from conversation_state import ConversationState
+from filler import FILLER_TEXT, FillerAudio
+from greeting import GREETING_TEXT, Greeter, presynthesize
+from model_config import book_appointment as mc_book_appointment
+from model_config import cancel_appointment as mc_cancel_appointment
+from model_config import check_availability as mc_check_availability
+from model_config import create_patient as mc_create_patient
+from model_config import lookup_appointments_for_patient as mc_lookup_appointments_for_patient
+from model_config import lookup_patient as mc_lookup_patient
+from model_config import reschedule_appointment as mc_reschedule_appointment
+from model_config import system_prompt as base_system_prompt
+from model_config import take_message as mc_take_message
+from model_config import tools as function_tools
+from model_config import transfer_to_human as mc_escalate_to_human
+from rag_processor import RagProcessor
+from ragprocessing import acquire_rag, release_rag
+from ragprocessing import rag_lookup as qdrant_lookup
+from tool_executor import get_tool_executor, prefetch_tool_results
+from tts_cache import CachedCartesiaTTSService, cache_key, get_tts_cache
+from turn_latency import TurnLatencyObserver
 
 # Setup logging
 load_dotenv()
 logger.remove(0)
 logger.add(sys.stderr, level="DEBUG")
 
-# Initialize Twilio client
-twilio_client = Client(os.getenv("TWILIO_ACCOUNT_SID"), os.getenv("TWILIO_AUTH_TOKEN"))
+CARTESIA_VOICE_ID = "8d8ce8c9-44a4-46c4-b10f-9a927b99a853"
 
 
 async def run_bot(
@@ -63,6 +67,12 @@ async def run_bot(
     handle_sigint: bool,
     caller_phone=None,
     patient=None,
+    call_received_at=None,
+    *,
+    stt=None,
+    llm=None,
+    tts=None,
+    rag_lookup=None,
 ) -> None:
     """Run the voice bot with the given parameters.
 
@@ -70,25 +80,32 @@ async def run_bot(
         transport: The Daily transport instance
         call_id: The Twilio call ID
         sip_uri: The Daily SIP URI for forwarding the call
+        call_received_at: Unix time the /call webhook was received, for ring-to-greeting
+        stt, llm, tts, rag_lookup: Stand-ins for Deepgram, Cerebras, Cartesia and the
+            Qdrant lookup (see bench_pipeline.py); the real services are used by default
     """
     call_already_forwarded = False
     recording_active = False
 
-    # Attempt to initialize RAG; disable gracefully if not configured
+    # Use the process-wide RAG client (initialized on first use); disable gracefully if not configured
     rag_enabled = True
-    try:
-        await init_rag_system("therapie_clinic_rag")
-        logger.info("RAG system initialised")
-    except Exception as e:
-        rag_enabled = False
-        logger.warning(f"RAG disabled (init failed): {e}")
+    rag_acquired = False
+    if rag_lookup is None:
+        rag_lookup = qdrant_lookup
+        try:
+            await acquire_rag(os.getenv("RAG_COLLECTION_NAME", "therapie_clinic_rag"))
+            rag_acquired = True
+        except Exception as e:
+            rag_enabled = False
+            logger.warning(f"RAG disabled (init failed): {e}")
 
 
-    stt = DeepgramSTTService(api_key=os.getenv("DEEPGRAM_API_KEY"))
-    llm = OpenAILLMService(model="qwen-3-235b-a22b-instruct-2507", base_url="https://api.cerebras.ai/v1", api_key=os.getenv("CEREBRAS_API_KEY"))
-    tts = CartesiaTTSService(
+    stt = stt or DeepgramSTTService(api_key=os.getenv("DEEPGRAM_API_KEY"))
+    llm = llm or OpenAILLMService(model="qwen-3-235b-a22b-instruct-2507", base_url="https://api.cerebras.ai/v1", api_key=os.getenv("CEREBRAS_API_KEY"))
+    # Fixed and frequent phrases are played from the TTS cache (see tts_cache.py)
+    tts = tts or CachedCartesiaTTSService(
         api_key=os.getenv("CARTESIA_API_KEY"),
-        voice_id="8d8ce8c9-44a4-46c4-b10f-9a927b99a853",
+        voice_id=CARTESIA_VOICE_ID,
     )
 
     current_date_and_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -111,11 +128,13 @@ async def run_bot(
     ]
 
     # Register function-call handlers
+    tool_executor = get_tool_executor()
+
     async def handle_check_availability(params: FunctionCallParams):
         try:
             appointment_type = params.arguments.get("appointment_type")
             date = params.arguments.get("date")
-            availability = mc_check_availability(appointment_type, date)
+            availability = await tool_executor.run(mc_check_availability, appointment_type, date)
             await params.result_callback({
                 "appointment_type": appointment_type,
                 "date": date,
@@ -127,7 +146,7 @@ async def run_bot(
     async def handle_lookup_appointments_for_patient(params: FunctionCallParams):
         try:
             patient_id = params.arguments.get("patient_id")
-            raw = mc_lookup_appointments_for_patient(patient_id)
+            raw = await tool_executor.run(mc_lookup_appointments_for_patient, patient_id)
             try:
                 data = json.loads(raw) if isinstance(raw, str) else raw
             except Exception:
@@ -142,7 +161,7 @@ async def run_bot(
     async def handle_lookup_patient(params: FunctionCallParams):
         try:
             phone_number = params.arguments.get("phone_number")
-            patient = mc_lookup_patient(phone_number)
+            patient = await tool_executor.run(mc_lookup_patient, phone_number)
             await params.result_callback({
                 "phone_number": phone_number,
                 "patient": patient,
@@ -155,7 +174,7 @@ async def run_bot(
             phone_number = params.arguments.get("phone_number")
             name = params.arguments.get("name")
             email = params.arguments.get("email")
-            result = mc_create_patient(phone_number, name, email)
+            result = await tool_executor.run(mc_create_patient, phone_number, name, email)
             await params.result_callback({
                 "message": result,
                 "phone_number": phone_number,
@@ -170,7 +189,7 @@ async def run_bot(
             patient_id = params.arguments.get("patient_id")
             appointment_type = params.arguments.get("appointment_type")
             date = params.arguments.get("date")
-            result = mc_book_appointment(patient_id, appointment_type, date)
+            result = await tool_executor.run(mc_book_appointment, patient_id, appointment_type, date)
             await params.result_callback({
                 "message": result,
                 "patient_id": patient_id,
@@ -183,7 +202,7 @@ async def run_bot(
     async def handle_cancel_appointment(params: FunctionCallParams):
         try:
             appointment_id = params.arguments.get("appointment_id")
-            result = mc_cancel_appointment(appointment_id)
+            result = await tool_executor.run(mc_cancel_appointment, appointment_id)
             await params.result_callback({
                 "message": result,
                 "appointment_id": appointment_id,
@@ -195,7 +214,7 @@ async def run_bot(
         try:
             appointment_id = params.arguments.get("appointment_id")
             new_date = params.arguments.get("new_date")
-            result = mc_reschedule_appointment(appointment_id, new_date)
+            result = await tool_executor.run(mc_reschedule_appointment, appointment_id, new_date)
             await params.result_callback({
                 "message": result,
                 "appointment_id": appointment_id,
@@ -207,7 +226,7 @@ async def run_bot(
     async def handle_take_message(params: FunctionCallParams):
         try:
             message = params.arguments.get("message")
-            result = mc_take_message(message)
+            result = await tool_executor.run(mc_take_message, message)
             await params.result_callback({
                 "message": result,
                 "user_message": message,
@@ -218,7 +237,7 @@ async def run_bot(
     async def handle_escalate_to_human(params: FunctionCallParams):
         try:
             message = params.arguments.get("message")
-            result = mc_escalate_to_human(message)
+            result = await tool_executor.run(mc_escalate_to_human, message)
             await params.result_callback({
                 "message": result,
                 "summary": message,
@@ -226,16 +245,22 @@ async def run_bot(
         except Exception as e:
             await params.result_callback({"error": f"escalate_to_human failed: {str(e)}"})
 
-    # Register the handlers with the LLM
-    llm.register_function("check_availability", handle_check_availability)
-    llm.register_function("lookup_appointments_for_patient", handle_lookup_appointments_for_patient)
-    llm.register_function("lookup_patient", handle_lookup_patient)
-    llm.register_function("create_patient", handle_create_patient, cancel_on_interruption=False)
-    llm.register_function("book_appointment", handle_book_appointment, cancel_on_interruption=False)
-    llm.register_function("cancel_appointment", handle_cancel_appointment, cancel_on_interruption=False)
-    llm.register_function("reschedule_appointment", handle_reschedule_appointment, cancel_on_interruption=False)
-    llm.register_function("take_message", handle_take_message)
-    llm.register_function("escalate_to_human", handle_escalate_to_human)
+    # Register the handlers with the LLM. Backends run on a shared thread pool with a
+    # per-tool timeout; on timeout the LLM gets a fallback result instead.
+    # Writes may still complete after a timeout, so their fallbacks say so.
+    write_fallback = {
+        "error": "The clinic system is slow to respond and this may or may not have gone "
+        "through. Do not retry; tell the patient the clinic will confirm by text."
+    }
+    tool_executor.register(llm, "check_availability", handle_check_availability)
+    tool_executor.register(llm, "lookup_appointments_for_patient", handle_lookup_appointments_for_patient)
+    tool_executor.register(llm, "lookup_patient", handle_lookup_patient, timeout=3.0)
+    tool_executor.register(llm, "create_patient", handle_create_patient, timeout=10.0, fallback=write_fallback, cancel_on_interruption=False)
+    tool_executor.register(llm, "book_appointment", handle_book_appointment, timeout=10.0, fallback=write_fallback, cancel_on_interruption=False)
+    tool_executor.register(llm, "cancel_appointment", handle_cancel_appointment, timeout=10.0, fallback=write_fallback, cancel_on_interruption=False)
+    tool_executor.register(llm, "reschedule_appointment", handle_reschedule_appointment, timeout=10.0, fallback=write_fallback, cancel_on_interruption=False)
+    tool_executor.register(llm, "take_message", handle_take_message)
+    tool_executor.register(llm, "escalate_to_human", handle_escalate_to_human)
 
 
     # Setup the conversational context
@@ -244,82 +269,127 @@ async def run_bot(
     user_ctx = context_aggregator.user()
     assistant_ctx = context_aggregator.assistant()
 
-    # Helper to extract plain text from message content
-    def _extract_text_from_message(message):
-        content = message.get("content")
-        if isinstance(content, str):
-            return content
-        if isinstance(content, list):
-            parts = []
-            for part in content:
-                if isinstance(part, dict):
-                    text = part.get("text")
-                    if isinstance(text, str):
-                        parts.append(text)
-            return " ".join(parts).strip()
-        return ""
-
-    # RagProcessor: on user stop, perform RAG and update system prompt before LLM
-    class RagProcessor(FrameProcessor):
-        def __init__(self):
-            super().__init__()
-
-        async def process_frame(self, frame, direction: FrameDirection):
-            await super().process_frame(frame, direction)
-
-            if isinstance(frame, UserStoppedSpeakingFrame):
-                if rag_enabled:
-                    try:
-                        # Build a query from the latest assistant and user messages
-                        um = [m for m in user_ctx.context.get_messages() if m.get("role") == "user"]
-                        am = [m for m in assistant_ctx.context.get_messages() if m.get("role") == "assistant"]
-                        last_user = ""
-                        for m in reversed(um):
-                            last_user = _extract_text_from_message(m)
-                            if last_user:
-                                break
-                        last_assistant = ""
-                        for m in reversed(am):
-                            last_assistant = _extract_text_from_message(m)
-                            if last_assistant:
-                                break
-                        query = f"Assistant: {last_assistant} User: {last_user}"
-                        bullets = await rag_lookup(query)
-                        if bullets:
-                            messages_current = user_ctx.context.get_messages()
-                            sys_index = next((i for i, m in enumerate(messages_current) if m.get("role") == "system"), None)
-                            if sys_index is not None:
-                                base_content = messages_current[sys_index].get("content", "")
-                                marker = "Relevant Context (only use if relevant to the conversation):"
-                                if marker in base_content:
-                                    base_content = base_content.split(marker)[0].rstrip()
-                                new_system_content = f"{base_content}\n\n{marker}\n{bullets}"
-                                messages_current[sys_index]["content"] = new_system_content
-                                user_ctx.set_messages(messages_current)
-                                logger.debug("RAG context updated in system prompt on user stop")
-                    except Exception as e:
-                        logger.warning(f"RAG update on user stop failed: {e}")
-
-                await self.push_frame(frame, direction)
+    # Last utterances and turn counts, kept up to date from frames
+    conversation = ConversationState()
+
+    # For a recognised caller, fetch what the first turn will most likely need while
+    # the call connects, and add it to the context as already-answered tool calls
+    prefetch_task = None
+    if patient and patient.get("patient_id"):
+        prefetch_calls = [
+            (
+                "lookup_appointments_for_patient",
+                handle_lookup_appointments_for_patient,
+                {"patient_id": patient.get("patient_id")},
+            ),
+        ]
+        prefetch_task = asyncio.create_task(
+            prefetch_tool_results(prefetch_calls, llm, context, timeout=float(os.getenv("TOOL_PREFETCH_TIMEOUT", "3")))
+        )
+
+        def add_prefetched_results(task):
+            if task.cancelled() or not task.result():
                 return
+            prefetched = task.result()
+            names = [call["function"]["name"] for call in prefetched[0]["tool_calls"]]
+            # Once the first turn is on its way to the LLM, inserting history would
+            # change the prompt under it; the LLM can still call the tools itself
+            if conversation.user_turns > 0:
+                for name in names:
+                    metrics.TOOL_PREFETCH_TOTAL.inc(tool=name, result="late")
+                logger.info(f"Prefetched {', '.join(names)} arrived after the first turn, dropping")
+                return
+            # Right after the system prompt, so later turns keep a stable prefix
+            context_messages = context.get_messages()
+            context_messages[1:1] = prefetched
+            context.set_messages(context_messages)
+            for name in names:
+                metrics.TOOL_PREFETCH_TOTAL.inc(tool=name, result="ok")
+            logger.info(f"Prefetched {', '.join(names)} for patient {patient.get('patient_id')}")
+
+        prefetch_task.add_done_callback(add_prefetched_results)
+
+    # RAG starts speculatively from transcripts (see rag_processor.py)
+    rag = RagProcessor(context, conversation, rag_lookup, enabled=rag_enabled)
+
+    # Keep long calls within a token budget; older turns are summarized off the critical path
+    async def summarize_context(prompt):
+        return await llm.run_inference(OpenAILLMContext(messages=[{"role": "user", "content": prompt}]))
+
+    context_budget = ContextBudget(
+        context,
+        summarize_context,
+        max_tokens=int(os.getenv("LLM_CONTEXT_MAX_TOKENS", "6000")),
+        target_tokens=int(os.getenv("LLM_CONTEXT_TARGET_TOKENS", "3000")),
+        key_tools=(
+            "lookup_patient",
+            "create_patient",
+            "lookup_appointments_for_patient",
+            "book_appointment",
+            "cancel_appointment",
+            "reschedule_appointment",
+        ),
+    )
 
-            # Default: pass through
-            await self.push_frame(frame, direction)
+    # Greet as soon as the call is ready, with audio synthesized once per process
+    async def speak_greeting():
+        # Spoken outside an LLM response, so the assistant aggregator won't record it
+        context.add_message({"role": "assistant", "content": GREETING_TEXT})
+        conversation.add_assistant_text(GREETING_TEXT)
+        await task.queue_frames([TTSSpeakFrame(text=GREETING_TEXT)])
+
+    def on_greeted(trigger):
+        if call_received_at:
+            metrics.RING_TO_GREETING_SECONDS.observe(time.time() - call_received_at)
+
+    greeter = Greeter(
+        presynthesize(GREETING_TEXT, CARTESIA_VOICE_ID),
+        speak_greeting,
+        safety_delay=float(os.getenv("GREETING_SAFETY_DELAY", "0.2")),
+        timeout=float(os.getenv("GREETING_TIMEOUT", "3")),
+        on_greeted=on_greeted,
+    )
+
+    # Mask slow tool calls and retrieval with a short filler phrase or thinking tone
+    async def filler_phrase():
+        return await get_tts_cache().get(cache_key(FILLER_TEXT, CARTESIA_VOICE_ID, 24000, "sonic-2"))
+
+    # Well below the RAG processor's 1s timeout, so retrieval filler can play before
+    # the turn is released without context
+    filler = FillerAudio(filler_phrase, delay=float(os.getenv("FILLER_DELAY", "0.4")))
 
     # Build the pipeline
     pipeline = Pipeline(
         [
             transport.input(),
+            greeter.input_observer,  # first inbound audio triggers the greeting
             stt,
+            conversation.user_observer,  # transcripts (also starts speculative RAG)
             user_ctx,
-            RagProcessor(),   # perform RAG on user stop before LLM
+            conversation.turn_observer,
+            filler.retrieval_started,
+            rag,  # add the RAG result to the context before the LLM
+            filler.retrieval_finished,
+            context_budget,  # prompt-size telemetry and background compaction
             llm,
             tts,
+            filler.output,  # filler audio while tools or retrieval are slow
             transport.output(),
+            conversation.assistant_observer,
             assistant_ctx,
         ]
     )
 
+    # Where each turn's voice-to-voice latency goes, stage by stage
+    turn_latency = TurnLatencyObserver(
+        input=transport.input(),
+        stt=stt,
+        rag=rag,
+        llm=llm,
+        tts=tts,
+        output=transport.output(),
+    )
+
     # Create the pipeline task
     task = PipelineTask(
         pipeline,
@@ -327,12 +397,11 @@ async def run_bot(
             enable_metrics=True,
             enable_usage_metrics=True,
         ),
+        observers=[turn_latency],
     )
 
     turn_observer = task.turn_tracking_observer
 
-    # No thinking tone hooks
-
     @turn_observer.event_handler("on_turn_ended")
     async def on_turn_ended(_, turn_number, duration, was_interrupted):
         if was_interrupted:
@@ -342,8 +411,7 @@ async def run_bot(
     @transport.event_handler("on_client_connected")
     async def on_client_connected(transport, client):
         logger.info(f"Client connected")
-        await asyncio.sleep(1.8)
-        await task.queue_frames([TTSSpeakFrame(text="Thank you for calling Thérapie Clinic, how can I help you today?")])
+        greeter.start()
 
     # Handle participant leaving
     @transport.event_handler("on_client_disconnected")
@@ -371,41 +439,23 @@ async def run_bot(
 
         logger.info(f"Forwarding call {call_id} to {sip_uri}")
 
-        # Retry until Twilio call is in-progress to avoid 21220 redirect error
-        max_attempts = 10
-        delay_seconds = 0.5
-        last_error = None
-        for attempt in range(1, max_attempts + 1):
-            try:
-                twilio_client.calls(call_id).update(
-                    twiml=f"<Response><Dial><Sip>{sip_uri}</Sip></Dial></Response>"
-                )
-                logger.info("Call forwarded successfully")
-                call_already_forwarded = True
-                break
-            except TwilioRestException as e:
-                last_error = e
-                if getattr(e, "code", None) == 21220:
-                    logger.warning(
-                        f"Call not in-progress yet (attempt {attempt}/{max_attempts}). Retrying in {delay_seconds}s..."
-                    )
-                    await asyncio.sleep(delay_seconds)
-                    continue
-                else:
-                    logger.error(f"Failed to forward call: {str(e)}")
-                    raise
-            except Exception as e:
-                logger.error(f"Failed to forward call: {str(e)}")
-                raise
-        else:
-            logger.error(
-                f"Failed to forward call after {max_attempts} attempts. Last error: {str(last_error)}"
+        # Set before awaiting so a second endpoint's event does not forward concurrently
+        call_already_forwarded = True
+        try:
+            result = await get_call_forwarder().forward(
+                call_id, f"<Response><Dial><Sip>{sip_uri}</Sip></Dial></Response>"
             )
-            raise last_error if last_error else Exception("Twilio call not in-progress; cannot redirect")
+        except ForwardError as e:
+            call_already_forwarded = False
+            logger.error(f"Failed to forward call after {e.attempts} attempts: {e}")
+            metrics.CALL_ERRORS_TOTAL.inc(stage="forward")
+            raise
+        logger.info(f"Call forwarded successfully after {result.attempts} attempts in {result.seconds:.2f}s")
 
     @transport.event_handler("on_dialin_connected")
     async def on_dialin_connected(transport, data):
         logger.debug(f"Dial-in connected: {data}")
+        greeter.ready("dialin")
         nonlocal recording_active
         if not recording_active:
             try:
@@ -413,6 +463,7 @@ async def run_bot(
                 recording_active = True
             except Exception as e:
                 logger.error(f"Failed to start recording: {e}")
+                metrics.CALL_ERRORS_TOTAL.inc(stage="recording")
 
     @transport.event_handler("on_dialin_stopped")
     async def on_dialin_stopped(transport, data):
@@ -428,6 +479,7 @@ async def run_bot(
     @transport.event_handler("on_dialin_error")
     async def on_dialin_error(transport, data):
         logger.error(f"Dial-in error: {data}")
+        metrics.CALL_ERRORS_TOTAL.inc(stage="dialin")
         # If there is an error, the bot should leave the call
         # This may be also handled in on_participant_left with
         # await task.cancel()
@@ -462,7 +514,23 @@ async def run_bot(
 
     # Run the pipeline
     runner = PipelineRunner(handle_sigint=handle_sigint)
-    await runner.run(task)
+    metrics.BOT_CALLS_ACTIVE.inc()
+    try:
+        await runner.run(task)
+    finally:
+        metrics.BOT_CALLS_ACTIVE.dec()
+        greeter.cancel()
+        filler.cancel()
+        if prefetch_task and not prefetch_task.done():
+            prefetch_task.cancel()
+        metrics.CALL_USER_TURNS.observe(conversation.user_turns)
+        logger.info(
+            f"Call {call_id} ended after {conversation.user_turns} user turns "
+            f"and {conversation.tool_calls} tool calls"
+        )
+        logger.info(f"Call {call_id} turn latency over {turn_latency.turns} turns: {turn_latency.summary()}")
+        if rag_acquired:
+            await release_rag()
 
 
 async def bot(runner_args: RunnerArguments):
@@ -476,6 +544,7 @@ async def bot(runner_args: RunnerArguments):
     sip_uri = body.get("sip_uri")
     caller_phone = body.get("caller_phone")
     patient = body.get("patient")
+    call_received_at = body.get("call_received_at")
     handle_sigint = body.get("handle_sigint", False)
 
     if not call_id or not sip_uri:
@@ -486,6 +555,10 @@ async def bot(runner_args: RunnerArguments):
         logger.error(f"Missing room connection details: room_url={room_url}, token={token}")
         raise ValueError("room_url and token are required")
 
+    # VAD and smart-turn models are loaded once per process and shared by all calls
+    models = get_model_registry()
+    await asyncio.to_thread(models.load)
+
     transport = DailyTransport(
         room_url,
         token,
@@ -493,8 +566,8 @@ async def bot(runner_args: RunnerArguments):
         params=DailyParams(
             audio_in_enabled=True,
             audio_out_enabled=True,
-            vad_analyzer=SileroVADAnalyzer(),
-            turn_analyzer=LocalSmartTurnAnalyzerV3(),
+            vad_analyzer=models.vad_analyzer(),
+            turn_analyzer=models.turn_analyzer(),
         ),
     )
 
@@ -505,4 +578,5 @@ async def bot(runner_args: RunnerArguments):
         handle_sigint,
         caller_phone=caller_phone,
         patient=patient,
+        call_received_at=call_received_at,
     )
\ No newline at end of file
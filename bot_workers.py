@@ -0,0 +1,317 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Multi-process bot workers for local/self-hosted mode.
+
+Running every call's pipeline (VAD, smart-turn inference, audio handling) on
+the webhook server's event loop means calls compete with each other and with
+the webhooks for a single core. The supervisor here owns a pool of worker
+processes, each with its own event loop, and places every new call on the
+least-loaded worker. If a worker crashes, only the calls on that worker are
+lost; the supervisor starts a replacement process, backing off exponentially
+while replacements keep crashing and giving up on the slot after a few tries
+(e.g. when the bot fails at import).
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Set
+
+from loguru import logger
+
+import metrics
+
+# Worker -> supervisor event kinds
+_READY = "ready"
+_ENDED = "ended"
+_METRIC = "metric"
+
+
+def _worker_main(worker_id: int, commands, events):
+    """Entry point of a worker process."""
+    asyncio.run(_worker_loop(worker_id, commands, events))
+
+
+async def _worker_loop(worker_id: int, commands, events):
+    # Report bot metrics into the server's registry
+    metrics.set_forwarder(lambda record: events.put((_METRIC, worker_id, record, None)))
+
+    # Import the bot (and its models) once per worker, before taking calls
+    from pipecat.runner.types import DailyRunnerArguments
+
+    from audio_models import get_model_registry
+    from bot import CARTESIA_VOICE_ID
+    from bot import bot as bot_function
+    from filler import FILLER_TEXT
+    from greeting import GREETING_TEXT
+    from ragprocessing import init_rag_system
+    from tts_cache import FIXED_PHRASES, cache_key, get_tts_cache
+
+    # Load the VAD and smart-turn models that all of this worker's calls share
+    await asyncio.to_thread(get_model_registry().load)
+
+    # Connect RAG once for all of this worker's calls; calls retry if it fails
+    try:
+        await init_rag_system(os.getenv("RAG_COLLECTION_NAME", "therapie_clinic_rag"))
+    except Exception as e:
+        logger.warning(f"Worker {worker_id}: RAG init failed: {e}")
+
+    # Load the greeting and fixed phrases into the TTS cache (synthesized only if not on disk)
+    await get_tts_cache().preload(
+        cache_key(text, CARTESIA_VOICE_ID, 24000, "sonic-2")
+        for text in (GREETING_TEXT, FILLER_TEXT, *FIXED_PHRASES)
+    )
+
+    calls: Dict[str, asyncio.Task] = {}
+
+    async def run_call(call_id: str, body: dict):
+        error = None
+        try:
+            runner_args = DailyRunnerArguments(room_url=None, token=None, body=body)
+            runner_args.handle_sigint = False
+            await bot_function(runner_args)
+        except asyncio.CancelledError:
+            error = "cancelled"
+        except Exception as e:
+            error = str(e)
+            logger.exception(f"Worker {worker_id}: call {call_id} failed: {e}")
+        finally:
+            calls.pop(call_id, None)
+            events.put((_ENDED, worker_id, call_id, error))
+
+    events.put((_READY, worker_id, os.getpid(), None))
+
+    while True:
+        command = await asyncio.to_thread(commands.get)
+        if command is None:
+            break
+        call_id, body = command
+        calls[call_id] = asyncio.create_task(run_call(call_id, body))
+
+    for task in list(calls.values()):
+        task.cancel()
+    await asyncio.gather(*calls.values(), return_exceptions=True)
+
+    from call_forwarding import close_call_forwarder
+
+    await close_call_forwarder()
+
+
+class _Worker:
+    def __init__(self, worker_id: int, process, commands, restarts: int = 0):
+        self.worker_id = worker_id
+        self.process = process
+        self.commands = commands
+        self.ready = False
+        self.calls: Set[str] = set()
+        self.started_at = time.time()
+        # Replacements started since the slot last had a worker that stayed up
+        self.restarts = restarts
+        # Monotonic time the dead worker is due to be replaced
+        self.restart_at: Optional[float] = None
+        # Set when the slot has crashed too often and is no longer restarted
+        self.failed = False
+
+
+class BotWorkerSupervisor:
+    """Owns a pool of bot worker processes and places calls on them.
+
+    Args:
+        num_workers: Number of worker processes. Defaults to the number of cores.
+        monitor_interval: Seconds between worker liveness checks.
+        on_call_ended: Called with the call ID when a call ends, including calls
+            lost to a worker crash.
+        restart_backoff: Seconds before replacing a crashed worker, doubled for
+            each further crash of the slot's replacements.
+        max_restart_backoff: Longest wait before replacing a crashed worker.
+        max_restarts: Replacements tried before the slot is marked failed.
+        stable_after: Seconds a worker must stay up for its slot's crash count
+            to start over.
+    """
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        *,
+        monitor_interval: float = 1.0,
+        on_call_ended: Optional[Callable[[str], None]] = None,
+        restart_backoff: float = 1.0,
+        max_restart_backoff: float = 60.0,
+        max_restarts: int = 5,
+        stable_after: float = 300.0,
+    ):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self._monitor_interval = monitor_interval
+        self._on_call_ended = on_call_ended
+        self._restart_backoff = restart_backoff
+        self._max_restart_backoff = max_restart_backoff
+        self._max_restarts = max_restarts
+        self._stable_after = stable_after
+        # Spawn rather than fork: the parent runs an event loop and threads
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._workers: Dict[int, _Worker] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader: Optional[threading.Thread] = None
+        self._monitor: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the worker processes and the supervision tasks."""
+        self._loop = asyncio.get_running_loop()
+        for worker_id in range(self.num_workers):
+            self._spawn(worker_id)
+        self._reader = threading.Thread(target=self._read_events, daemon=True)
+        self._reader.start()
+        self._monitor = asyncio.create_task(self._monitor_workers())
+        logger.info(f"Started {self.num_workers} bot worker process(es)")
+
+    async def stop(self, timeout: float = 5.0):
+        """Stop all workers, cancelling any calls still running on them."""
+        if self._monitor:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+        for worker in self._workers.values():
+            worker.commands.put(None)
+        for worker in self._workers.values():
+            await asyncio.to_thread(worker.process.join, timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._events.put(None)
+        self._workers.clear()
+
+    async def start_call(self, call_id: str, body: dict) -> int:
+        """Start a call on the least-loaded worker.
+
+        Args:
+            call_id: Twilio call ID, used to track the call.
+            body: Bot body data (room_url, token, call_id, sip_uri, ...).
+
+        Returns:
+            int: ID of the worker the call was placed on.
+
+        Raises:
+            RuntimeError: If no worker is ready to take calls.
+        """
+        candidates = [
+            w for w in self._workers.values() if w.ready and w.process.is_alive()
+        ]
+        if not candidates:
+            raise RuntimeError("No bot worker is ready to take calls")
+        worker = min(candidates, key=lambda w: len(w.calls))
+        worker.calls.add(call_id)
+        worker.commands.put((call_id, body))
+        logger.debug(
+            f"Placed call {call_id} on worker {worker.worker_id} ({len(worker.calls)} active)"
+        )
+        return worker.worker_id
+
+    @property
+    def active_calls(self) -> int:
+        """Number of calls running across all workers."""
+        return sum(len(w.calls) for w in self._workers.values())
+
+    def snapshot(self) -> list:
+        """Per-worker status for status endpoints."""
+        return [
+            {
+                "worker_id": w.worker_id,
+                "pid": w.process.pid,
+                "alive": w.process.is_alive(),
+                "ready": w.ready,
+                "failed": w.failed,
+                "restarts": w.restarts,
+                "active_calls": len(w.calls),
+            }
+            for w in self._workers.values()
+        ]
+
+    def _spawn(self, worker_id: int, restarts: int = 0):
+        # A fresh command queue per process: a crashed worker may have left
+        # the old queue's internal lock held
+        commands = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, commands, self._events),
+            name=f"bot-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[worker_id] = _Worker(worker_id, process, commands, restarts)
+
+    def _read_events(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            self._loop.call_soon_threadsafe(self._handle_event, event)
+
+    def _handle_event(self, event):
+        kind, worker_id, payload, error = event
+        worker = self._workers.get(worker_id)
+        if worker is None:
+            return
+        if kind == _METRIC:
+            metrics.apply_forwarded(payload)
+        elif kind == _READY:
+            if payload != worker.process.pid:
+                # Stale event from a worker that has since been replaced
+                return
+            worker.ready = True
+            logger.info(f"Bot worker {worker_id} ready (pid {payload})")
+        elif kind == _ENDED:
+            worker.calls.discard(payload)
+            if self._on_call_ended:
+                self._on_call_ended(payload)
+            if error:
+                logger.warning(f"Call {payload} on worker {worker_id} ended with error: {error}")
+            else:
+                logger.debug(f"Call {payload} on worker {worker_id} ended")
+
+    async def _monitor_workers(self):
+        while True:
+            await asyncio.sleep(self._monitor_interval)
+            for worker_id, worker in list(self._workers.items()):
+                if worker.failed or worker.process.is_alive():
+                    continue
+                if worker.restart_at is None:
+                    self._worker_exited(worker)
+                elif time.monotonic() >= worker.restart_at:
+                    self._spawn(worker_id, worker.restarts)
+
+    def _worker_exited(self, worker: _Worker):
+        logger.error(
+            f"Bot worker {worker.worker_id} (pid {worker.process.pid}) exited with code "
+            f"{worker.process.exitcode}; lost {len(worker.calls)} call(s): "
+            f"{sorted(worker.calls)}"
+        )
+        # The dead worker can no longer report these calls ending
+        metrics.BOT_CALLS_ACTIVE.dec(len(worker.calls))
+        metrics.CALL_ERRORS_TOTAL.inc(stage="worker_crash")
+        if self._on_call_ended:
+            for call_id in worker.calls:
+                self._on_call_ended(call_id)
+        worker.calls.clear()
+
+        # A worker that stayed up for a while was not part of a crash loop
+        if time.time() - worker.started_at >= self._stable_after:
+            worker.restarts = 0
+        if worker.restarts >= self._max_restarts:
+            worker.failed = True
+            logger.error(
+                f"Bot worker {worker.worker_id} crashed {worker.restarts + 1} times in a row; "
+                f"not restarting it"
+            )
+            return
+        delay = min(self._restart_backoff * 2**worker.restarts, self._max_restart_backoff)
+        worker.restarts += 1
+        worker.restart_at = time.monotonic() + delay
+        logger.info(f"Restarting bot worker {worker.worker_id} in {delay:.1f}s")
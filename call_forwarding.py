@@ -0,0 +1,191 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Non-blocking forwarding of the Twilio call to the Daily SIP endpoint.
+
+Once Daily is ready for the SIP leg, the bot redirects the Twilio call with
+new TwiML. The Twilio SDK's `calls(sid).update()` is synchronous, so calling
+it from an event handler blocks every call in the process for each HTTPS
+round trip, and the redirect often has to be retried because the call is not
+in progress yet (Twilio error 21220).
+
+`TwilioCallForwarder` talks to the Twilio REST API over a shared aiohttp
+session instead, and retries with jittered exponential backoff until a
+deadline. The API base URL is configurable (`TWILIO_API_URL`), so it can be
+pointed at a local stub.
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+
+import aiohttp
+from loguru import logger
+
+import metrics
+
+# Twilio: "Call is not in-progress. Cannot redirect."
+CALL_NOT_IN_PROGRESS = 21220
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class ForwardError(Exception):
+    """The call could not be forwarded.
+
+    Attributes:
+        attempts: Update requests sent.
+        code: Twilio error code of the last response, if any.
+    """
+
+    def __init__(self, message: str, attempts: int, code: Optional[int] = None):
+        super().__init__(message)
+        self.attempts = attempts
+        self.code = code
+
+
+class ForwardResult:
+    """Outcome of a successful forward.
+
+    Attributes:
+        attempts: Update requests sent, including the successful one.
+        seconds: Time from the first request to success.
+    """
+
+    def __init__(self, attempts: int, seconds: float):
+        self.attempts = attempts
+        self.seconds = seconds
+
+
+class TwilioCallForwarder:
+    """Redirects Twilio calls without blocking the event loop.
+
+    Args:
+        account_sid: Twilio account SID.
+        auth_token: Twilio auth token.
+        api_url: Twilio REST API base URL.
+        deadline: Seconds after which retrying stops.
+        backoff_base: Backoff before the first retry (seconds, before jitter).
+        backoff_cap: Maximum backoff (seconds, before jitter).
+        timeout: Per-request timeout.
+    """
+
+    def __init__(
+        self,
+        account_sid: str,
+        auth_token: str,
+        *,
+        api_url: str = "https://api.twilio.com",
+        deadline: float = 10.0,
+        backoff_base: float = 0.1,
+        backoff_cap: float = 1.0,
+        timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=5, connect=2),
+    ):
+        self._account_sid = account_sid
+        self._auth = aiohttp.BasicAuth(account_sid or "", auth_token or "")
+        self._api_url = api_url.rstrip("/")
+        self._deadline = deadline
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self._timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=20, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter
+        return random.uniform(0, min(self._backoff_cap, self._backoff_base * 2 ** (attempt - 1)))
+
+    async def _update(self, call_sid: str, twiml: str):
+        """Send one update request. Returns (status, Twilio error code, message)."""
+        url = f"{self._api_url}/2010-04-01/Accounts/{self._account_sid}/Calls/{call_sid}.json"
+        async with self._session.post(url, data={"Twiml": twiml}, auth=self._auth) as response:
+            if response.status < 400:
+                await response.read()
+                return response.status, None, None
+            try:
+                body = await response.json(content_type=None)
+            except Exception:
+                body = {}
+            return response.status, body.get("code"), body.get("message") or response.reason
+
+    async def forward(self, call_sid: str, twiml: str) -> ForwardResult:
+        """Redirect `call_sid` to `twiml`, retrying until the call accepts it.
+
+        Error 21220, rate limiting, server errors and connection failures are
+        retried. A timed-out request is not, since Twilio may have applied it.
+
+        Raises:
+            ForwardError: If the call could not be redirected before the deadline.
+        """
+        await self.start()
+        started = time.perf_counter()
+        deadline = started + self._deadline
+        attempt = 0
+        outcome = "error"
+        try:
+            while True:
+                attempt += 1
+                try:
+                    status, code, message = await self._update(call_sid, twiml)
+                except aiohttp.ClientConnectorError as e:
+                    status, code, message = None, None, f"connection failed: {e}"
+                except asyncio.TimeoutError:
+                    raise ForwardError("Twilio did not respond in time", attempt)
+
+                if status is not None and status < 400:
+                    outcome = "ok"
+                    return ForwardResult(attempt, time.perf_counter() - started)
+
+                retryable = status is None or status in RETRY_STATUSES or code == CALL_NOT_IN_PROGRESS
+                if not retryable:
+                    raise ForwardError(f"Twilio returned {status}: {message}", attempt, code)
+                delay = self._backoff(attempt)
+                if time.perf_counter() + delay > deadline:
+                    outcome = "deadline"
+                    raise ForwardError(
+                        f"Gave up after {attempt} attempts in {self._deadline}s (last: {message})",
+                        attempt,
+                        code,
+                    )
+                logger.debug(f"Forwarding {call_sid}: attempt {attempt} failed ({message}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+        finally:
+            metrics.CALL_FORWARD_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+            metrics.CALL_FORWARD_ATTEMPTS.observe(attempt, outcome=outcome)
+
+
+_forwarder: Optional[TwilioCallForwarder] = None
+
+
+def get_call_forwarder() -> TwilioCallForwarder:
+    """Return the process-wide forwarder, so calls share one connection pool."""
+    global _forwarder
+    if _forwarder is None:
+        _forwarder = TwilioCallForwarder(
+            os.getenv("TWILIO_ACCOUNT_SID"),
+            os.getenv("TWILIO_AUTH_TOKEN"),
+            api_url=os.getenv("TWILIO_API_URL", "https://api.twilio.com"),
+            deadline=float(os.getenv("TWILIO_FORWARD_DEADLINE", "10")),
+        )
+    return _forwarder
+
+
+async def close_call_forwarder():
+    """Close the process-wide forwarder's connections, if it was used."""
+    global _forwarder
+    if _forwarder is not None:
+        await _forwarder.close()
+        _forwarder = None
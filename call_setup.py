@@ -0,0 +1,125 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Dependency-aware async pipeline for the /call setup path.
+
+Call setup is a handful of small I/O-bound stages (patient lookup, room
+creation, bot start). Each stage declares the stages it depends on; stages
+without a dependency between them run concurrently. Every stage records its
+timing in a per-call `SetupTrace`.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class SetupTrace:
+    """Per-call record of setup stage timings.
+
+    Each entry stores when the stage started (relative to the start of the
+    trace) and how long it took, both in milliseconds.
+    """
+
+    def __init__(self, call_id: Optional[str] = None):
+        self.call_id = call_id
+        self._start = time.perf_counter()
+        self.stages: Dict[str, Tuple[float, float]] = {}
+        self.errors: Dict[str, str] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as the stage `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.errors[name] = type(e).__name__
+            raise
+        finally:
+            self.record(name, started, time.perf_counter())
+
+    def record(self, name: str, started: float, finished: float):
+        """Record a stage from `perf_counter()` start and finish timestamps."""
+        self.stages[name] = ((started - self._start) * 1000, (finished - started) * 1000)
+
+    @property
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the trace was created."""
+        return (time.perf_counter() - self._start) * 1000
+
+    def summary(self) -> str:
+        """One-line human readable summary, ordered by stage start time."""
+        parts = [
+            f"{name}=+{offset:.0f}ms/{duration:.0f}ms"
+            for name, (offset, duration) in sorted(self.stages.items(), key=lambda i: i[1][0])
+        ]
+        parts.append(f"total={self.elapsed_ms:.0f}ms")
+        return " ".join(parts)
+
+
+class SetupStage:
+    """A single step of call setup.
+
+    Args:
+        name: Stage name, used for dependencies and in the trace.
+        func: Coroutine function called with the results of its dependencies
+            as keyword arguments (keyed by dependency name).
+        depends_on: Names of stages that must finish before this one starts.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Awaitable],
+        depends_on: Iterable[str] = (),
+    ):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+async def run_setup_stages(stages: List[SetupStage], trace: SetupTrace) -> dict:
+    """Run setup stages as soon as their dependencies are satisfied.
+
+    Args:
+        stages: Stages to run. Dependencies must refer to stages in this list.
+        trace: Trace that receives the timing of every stage.
+
+    Returns:
+        dict: Stage results keyed by stage name.
+
+    Raises:
+        Exception: The first stage failure; all other stages are cancelled.
+    """
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in names]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {missing}")
+
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(stage: SetupStage):
+        deps = {dep: await tasks[dep] for dep in stage.depends_on}
+        with trace.stage(stage.name):
+            return await stage.func(**deps)
+
+    # Tasks only start running once we await below, so every dependency
+    # is registered before any stage looks it up
+    for stage in stages:
+        tasks[stage.name] = asyncio.create_task(run(stage))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    return {name: task.result() for name, task in tasks.items()}
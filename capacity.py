@@ -0,0 +1,201 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Admission control for concurrent calls.
+
+Past a certain number of live calls every call on a machine degrades at once
+(late TTS, missed turns). The capacity manager caps the number of admitted
+calls and keeps a short, bounded FIFO of callers waiting for a slot. Callers
+that cannot be admitted get alternative TwiML (hold and retry, or voicemail)
+instead of a bot that would perform badly.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from loguru import logger
+from twilio.twiml.voice_response import VoiceResponse
+
+# Twilio call statuses after which the call will not come back
+TERMINAL_CALL_STATUSES = {"completed", "busy", "failed", "no-answer", "canceled"}
+
+DEFAULT_HOLD_MUSIC_URL = "http://com.twilio.sounds.music.s3.amazonaws.com/MARKOVICHAMP-Borghestral.mp3"
+
+
+class CallCapacityManager:
+    """Tracks live calls and admits new ones up to a limit.
+
+    Args:
+        max_calls: Maximum number of concurrent calls. 0 means unlimited.
+        max_queue: Maximum number of callers waiting for a slot at once.
+        queue_timeout: Seconds a caller may wait for a slot before overflow.
+        max_call_duration: Seconds after which an admitted call is assumed to be
+            over, in case its end was never reported.
+    """
+
+    def __init__(
+        self,
+        max_calls: int = 0,
+        *,
+        max_queue: int = 0,
+        queue_timeout: float = 3.0,
+        max_call_duration: float = 2 * 60 * 60,
+    ):
+        self.max_calls = max(0, max_calls)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.max_call_duration = max_call_duration
+
+        self._active: Dict[str, float] = {}
+        self._waiters = deque()
+        self.admitted_total = 0
+        self.rejected_total = 0
+
+    @property
+    def active(self) -> int:
+        """Number of admitted calls that have not ended yet."""
+        return len(self._active)
+
+    @property
+    def queued(self) -> int:
+        """Number of callers currently waiting for a slot."""
+        return len(self._waiters)
+
+    def _has_capacity(self) -> bool:
+        return self.max_calls == 0 or len(self._active) < self.max_calls
+
+    def _admit_now(self, call_id: str):
+        self._active[call_id] = time.monotonic()
+        self.admitted_total += 1
+
+    async def admit(self, call_id: str) -> bool:
+        """Admit a call, waiting briefly in the queue if we are at capacity.
+
+        Admitting a call that is already active (e.g. a webhook retry) succeeds
+        without taking another slot.
+
+        Returns:
+            bool: True if the call was admitted, False if it should overflow.
+        """
+        self._expire_stale()
+        if call_id in self._active:
+            return True
+        if self._has_capacity() and not self._waiters:
+            self._admit_now(call_id)
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_total += 1
+            logger.warning(
+                f"Rejecting call {call_id}: {self.active}/{self.max_calls} active, queue full"
+            )
+            return False
+
+        waiter = (call_id, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout=self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.rejected_total += 1
+            logger.warning(f"Rejecting call {call_id}: no slot within {self.queue_timeout}s")
+            return False
+        except asyncio.CancelledError:
+            # Give the slot back if it was handed to us just as we were cancelled
+            if waiter[1].done() and not waiter[1].cancelled():
+                self.release(call_id)
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, call_id: str):
+        """Mark a call as ended and hand its slot to the next waiting caller."""
+        if self._active.pop(call_id, None) is not None:
+            logger.debug(f"Released capacity for call {call_id} ({self.active} active)")
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._waiters and self._has_capacity():
+            call_id, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._admit_now(call_id)
+            future.set_result(True)
+
+    def _expire_stale(self):
+        cutoff = time.monotonic() - self.max_call_duration
+        stale = [call_id for call_id, started in self._active.items() if started < cutoff]
+        for call_id in stale:
+            logger.warning(f"Call {call_id} exceeded max duration; releasing its slot")
+            self.release(call_id)
+
+    def snapshot(self) -> dict:
+        """Live counts for the status endpoint."""
+        self._expire_stale()
+        return {
+            "active_calls": self.active,
+            "queued_calls": self.queued,
+            "max_concurrent_calls": self.max_calls or None,
+            "max_queue": self.max_queue,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+        }
+
+
+def overflow_twiml(
+    attempt: int,
+    *,
+    mode: str = "retry",
+    max_retries: int = 3,
+    retry_url: str = "/call",
+    hold_music_url: Optional[str] = None,
+    voicemail_url: str = "/call/voicemail",
+    voicemail_status_url: str = "/call/voicemail/status",
+) -> str:
+    """TwiML for a caller we cannot take right now.
+
+    In "retry" mode the caller hears hold music and Twilio re-requests the
+    /call webhook, up to `max_retries` times. After that, or in "voicemail"
+    mode, the caller is asked to leave a message. The finished recording is
+    posted to `voicemail_url`, never back to /call, which would answer with
+    the same voicemail prompt (or start a bot) instead of hanging up.
+
+    Args:
+        attempt: Number of overflow retries the caller has already had.
+        mode: "retry" or "voicemail".
+        max_retries: Maximum number of hold-and-retry rounds.
+        retry_url: Webhook Twilio should retry.
+        hold_music_url: Audio played while holding.
+        voicemail_url: Webhook Twilio calls once the message is recorded.
+        voicemail_status_url: Webhook Twilio calls once the recording is available.
+
+    Returns:
+        str: TwiML document.
+    """
+    resp = VoiceResponse()
+    if mode == "retry" and attempt < max_retries:
+        if attempt == 0:
+            resp.say("Thank you for calling Thérapie Clinic. All of our lines are busy, please hold.")
+        resp.play(url=hold_music_url or DEFAULT_HOLD_MUSIC_URL)
+        resp.redirect(f"{retry_url}?overflow_attempt={attempt + 1}", method="POST")
+    else:
+        resp.say(
+            "Sorry, we can't take your call right now. "
+            "Please leave your name, number and a short message after the tone."
+        )
+        resp.record(
+            action=voicemail_url,
+            method="POST",
+            max_length=120,
+            play_beep=True,
+            recording_status_callback=voicemail_status_url,
+            recording_status_callback_method="POST",
+        )
+        # Only reached if nothing was recorded
+        resp.hangup()
+    return str(resp)
@@ -0,0 +1,251 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Token budget for the LLM context of long calls.
+
+Without a budget the context grows with every turn and tool result, so LLM
+latency and cost grow linearly with call length. `ContextBudget` sits right
+before the LLM and records the prompt size of every turn. When a prompt goes
+over `max_tokens`, older turns are compacted in the background, after the
+turn has been sent, so compaction never delays a response:
+
+- the system prompt and the most recent turns (up to `keep_turns`, within
+  `target_tokens`) are kept verbatim
+- older turns, including stale tool payloads, are folded into a rolling
+  summary message placed right after the system prompt
+- results of key tools (patient records, bookings) are carried over verbatim
+  in the summary message
+
+Compaction rewrites the start of the history, so it costs one prompt-cache
+miss; the gap between `max_tokens` and `target_tokens` keeps it infrequent.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+from loguru import logger
+from pipecat.frames.frames import CancelFrame, EndFrame
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+import metrics
+
+SUMMARY_MARKER = "Summary of the call so far:"
+KEY_RESULTS_MARKER = "Key tool results (verbatim):"
+
+SUMMARY_PROMPT = """Summarize this phone call between a clinic receptionist (Assistant) and a caller
+(User) for the receptionist's own notes. Keep names, phone numbers, emails, patient IDs,
+appointment IDs, dates, times, treatments and anything the caller still needs.
+Reply with the summary only, in at most 120 words.
+
+Previous summary:
+{previous}
+
+Conversation:
+{conversation}"""
+
+# Rough characters per token for English text and JSON
+_CHARS_PER_TOKEN = 4
+# Per-message overhead (role, separators) in tokens
+_MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(message: dict) -> int:
+    """Rough token count of one context message."""
+    chars = 0
+    content = message.get("content")
+    if isinstance(content, str):
+        chars += len(content)
+    elif isinstance(content, list):
+        chars += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+    for call in message.get("tool_calls") or ():
+        function = call.get("function", {})
+        chars += len(function.get("name", "")) + len(function.get("arguments", ""))
+    return chars // _CHARS_PER_TOKEN + _MESSAGE_OVERHEAD
+
+
+def _is_summary(message: dict) -> bool:
+    content = message.get("content")
+    return (
+        message.get("role") == "system"
+        and isinstance(content, str)
+        and content.startswith(SUMMARY_MARKER)
+    )
+
+
+def _one_line(text, limit: int = 300) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class ContextBudget(FrameProcessor):
+    """Keeps the LLM context within a token budget with a rolling summary.
+
+    Place it right before the LLM service.
+
+    Args:
+        context: LLM context shared with the context aggregators.
+        summarize: Coroutine function turning a prompt into a summary (e.g.
+            an out-of-band LLM call). If it fails, a plain transcript excerpt
+            is used instead.
+        max_tokens: Prompt size that triggers compaction.
+        target_tokens: Maximum size of the turns kept verbatim.
+        keep_turns: Maximum number of recent user turns kept verbatim.
+        key_tools: Tools whose results are carried over verbatim.
+        max_key_results: Maximum number of key tool results carried over.
+    """
+
+    def __init__(
+        self,
+        context: OpenAILLMContext,
+        summarize: Optional[Callable[[str], Awaitable[Optional[str]]]] = None,
+        *,
+        max_tokens: int = 6000,
+        target_tokens: int = 3000,
+        keep_turns: int = 6,
+        key_tools: Iterable[str] = (),
+        max_key_results: int = 10,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._context = context
+        self._summarize = summarize
+        self._max_tokens = max_tokens
+        self._target_tokens = target_tokens
+        self._keep_turns = max(1, keep_turns)
+        self._key_tools = set(key_tools)
+        self._max_key_results = max_key_results
+        self._compaction: Optional[asyncio.Task] = None
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            self._on_turn()
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            if self._compaction and not self._compaction.done():
+                self._compaction.cancel()
+
+        await self.push_frame(frame, direction)
+
+    def _on_turn(self):
+        messages = self._context.get_messages()
+        tokens = sum(estimate_tokens(m) for m in messages)
+        metrics.LLM_PROMPT_TOKENS.observe(tokens)
+        metrics.LLM_PROMPT_MESSAGES.observe(len(messages))
+        logger.debug(f"LLM prompt: ~{tokens} tokens in {len(messages)} messages")
+        if tokens > self._max_tokens and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.create_task(self._compact())
+
+    def _span_to_compact(self, messages: List[dict]):
+        """Return (start, end) of the old messages to fold into the summary."""
+        start = 1
+        if len(messages) > 1 and _is_summary(messages[1]):
+            start = 2
+        turn_starts = [i for i in range(start, len(messages)) if messages[i].get("role") == "user"]
+        if len(turn_starts) <= 1:
+            return None
+
+        # Keep recent turns while they fit the target, and always the latest one
+        end = turn_starts[-1]
+        kept_tokens = sum(estimate_tokens(m) for m in messages[end:])
+        for count, turn_start in enumerate(reversed(turn_starts[:-1]), start=2):
+            turn_tokens = sum(estimate_tokens(m) for m in messages[turn_start:end])
+            if count > self._keep_turns or kept_tokens + turn_tokens > self._target_tokens:
+                break
+            kept_tokens += turn_tokens
+            end = turn_start
+
+        # Never fold in tool calls that are still running; their results land in place
+        for i in range(start, end):
+            if messages[i].get("role") == "tool" and messages[i].get("content") == "IN_PROGRESS":
+                end = i
+                while end > start and messages[end].get("role") != "user":
+                    end -= 1
+                break
+        return (start, end) if end > start else None
+
+    def _transcript(self, span: List[dict]):
+        """Plain-text conversation and key tool results for a span of messages."""
+        calls = {}
+        lines = []
+        key_results = []
+        for message in span:
+            role = message.get("role")
+            if role == "assistant" and message.get("tool_calls"):
+                for call in message["tool_calls"]:
+                    function = call.get("function", {})
+                    calls[call.get("id")] = (function.get("name", ""), function.get("arguments", ""))
+            elif role == "tool":
+                name, arguments = calls.get(message.get("tool_call_id"), ("tool", ""))
+                content = message.get("content", "")
+                lines.append(f"Tool {name} returned: {_one_line(content)}")
+                if name in self._key_tools:
+                    key_results.append(f"- {name}({arguments}) -> {content}")
+            elif role in ("user", "assistant"):
+                text = message.get("content")
+                if isinstance(text, str) and text:
+                    lines.append(f"{role.capitalize()}: {_one_line(text)}")
+        return "\n".join(lines), key_results
+
+    async def _compact(self):
+        messages = self._context.get_messages()
+        span_range = self._span_to_compact(messages)
+        if span_range is None:
+            return
+        start, end = span_range
+        span = messages[start:end]
+        previous = messages[1] if start == 2 else None
+
+        previous_summary, previous_key_results = "", []
+        if previous is not None:
+            body = previous["content"][len(SUMMARY_MARKER):]
+            previous_summary, _, key_section = body.partition(f"\n\n{KEY_RESULTS_MARKER}\n")
+            previous_key_results = [line for line in key_section.split("\n") if line]
+        conversation, key_results = self._transcript(span)
+
+        result = "llm"
+        summary = None
+        if self._summarize:
+            prompt = SUMMARY_PROMPT.format(
+                previous=previous_summary.strip() or "(none)", conversation=conversation
+            )
+            try:
+                summary = await self._summarize(prompt)
+            except Exception as e:
+                logger.warning(f"Context summary failed, using a transcript excerpt: {e}")
+        if not summary:
+            result = "fallback"
+            summary = "\n".join(filter(None, [previous_summary.strip(), conversation]))[-2000:]
+
+        key_results = (previous_key_results + key_results)[-self._max_key_results:]
+        content = f"{SUMMARY_MARKER}\n{summary.strip()}"
+        if key_results:
+            content += f"\n\n{KEY_RESULTS_MARKER}\n" + "\n".join(key_results)
+
+        # The context may have changed while we were summarizing
+        messages = self._context.get_messages()
+        current = messages[start:end]
+        if (
+            len(current) != len(span)
+            or any(a is not b for a, b in zip(current, span))
+            or (previous is not None and messages[1] is not previous)
+        ):
+            metrics.LLM_CONTEXT_COMPACTIONS_TOTAL.inc(result="stale")
+            return
+
+        before = sum(estimate_tokens(m) for m in messages)
+        summary_message = {"role": "system", "content": content}
+        first = 1 if previous is not None else start
+        messages[first:end] = [summary_message]
+        self._context.set_messages(messages)
+        after = sum(estimate_tokens(m) for m in messages)
+        metrics.LLM_CONTEXT_COMPACTIONS_TOTAL.inc(result=result)
+        logger.info(f"Compacted LLM context from ~{before} to ~{after} tokens ({result})")
+
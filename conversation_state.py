@@ -0,0 +1,167 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Incrementally maintained view of the conversation.
+
+Finding the last user and assistant utterances by walking `get_messages()`
+costs more on every turn as the call grows. `ConversationState` is instead
+updated from frames as they pass, and answers in O(1). It needs three small
+observers in the pipeline, placed the same way the context aggregators see
+the frames:
+
+    stt -> state.user_observer -> user_ctx -> state.turn_observer -> ... -> llm
+        -> tts -> transport.output() -> state.assistant_observer -> assistant_ctx
+"""
+
+from typing import Callable, List
+
+from pipecat.frames.frames import (
+    BotStoppedSpeakingFrame,
+    FunctionCallInProgressFrame,
+    InterimTranscriptionFrame,
+    InterruptionFrame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    TextFrame,
+    TranscriptionFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+
+class ConversationState:
+    """Last utterances and turn counts of a call, updated from frames.
+
+    Attributes:
+        last_user_text: The most recent user turn sent to the LLM.
+        last_assistant_text: The most recent assistant response, as spoken.
+        user_turns: User turns sent to the LLM so far.
+        tool_calls: Tool calls the LLM has made so far.
+    """
+
+    def __init__(self):
+        self.last_user_text = ""
+        self.last_assistant_text = ""
+        self.user_turns = 0
+        self.tool_calls = 0
+        self._user_finals: List[str] = []
+        self._user_interim = ""
+        self._assistant_parts: List[str] = []
+        self._assistant_started = 0
+        self._user_text_listeners: List[Callable[[str], None]] = []
+
+        self.user_observer = _UserObserver(self)
+        self.turn_observer = _TurnObserver(self)
+        self.assistant_observer = _AssistantObserver(self)
+
+    def add_user_text_listener(self, listener: Callable[[str], None]):
+        """Call `listener(text)` with the current turn so far whenever a transcript arrives.
+
+        The text includes interim transcripts of a turn not yet sent to the LLM.
+        """
+        self._user_text_listeners.append(listener)
+
+    def add_assistant_text(self, text: str):
+        """Record something the bot said outside an LLM response, such as the greeting."""
+        self.last_assistant_text = text
+
+    def _user_text_so_far(self) -> str:
+        if self._user_interim:
+            return " ".join(self._user_finals + [self._user_interim])
+        return " ".join(self._user_finals)
+
+    def _on_transcript(self, text: str, final: bool):
+        if not text.strip():
+            return
+        if final:
+            self._user_finals.append(text)
+            self._user_interim = ""
+        else:
+            self._user_interim = text
+        user_text = self._user_text_so_far()
+        for listener in self._user_text_listeners:
+            listener(user_text)
+
+    def _on_user_turn_sent(self):
+        if not self._user_finals:
+            return
+        self.last_user_text = " ".join(self._user_finals)
+        self.user_turns += 1
+        self._user_finals = []
+        self._user_interim = ""
+
+    def _on_assistant_text(self, text: str):
+        if self._assistant_started:
+            self._assistant_parts.append(text)
+
+    def _on_assistant_done(self):
+        if self._assistant_parts:
+            self.last_assistant_text = " ".join(self._assistant_parts)
+            self._assistant_parts = []
+
+
+class _UserObserver(FrameProcessor):
+    """Sees user transcripts; place between the STT service and the user aggregator."""
+
+    def __init__(self, state: ConversationState, **kwargs):
+        super().__init__(**kwargs)
+        self._state = state
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, TranscriptionFrame):
+            self._state._on_transcript(frame.text, final=True)
+        elif isinstance(frame, InterimTranscriptionFrame):
+            self._state._on_transcript(frame.text, final=False)
+
+        await self.push_frame(frame, direction)
+
+
+class _TurnObserver(FrameProcessor):
+    """Sees user turns being sent to the LLM; place right after the user aggregator."""
+
+    def __init__(self, state: ConversationState, **kwargs):
+        super().__init__(**kwargs)
+        self._state = state
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            self._state._on_user_turn_sent()
+
+        await self.push_frame(frame, direction)
+
+
+class _AssistantObserver(FrameProcessor):
+    """Sees spoken assistant text; place right before the assistant aggregator."""
+
+    def __init__(self, state: ConversationState, **kwargs):
+        super().__init__(**kwargs)
+        self._state = state
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        # Mirrors how the assistant aggregator builds its messages
+        state = self._state
+        if isinstance(frame, InterruptionFrame):
+            state._on_assistant_done()
+            state._assistant_started = 0
+        elif isinstance(frame, LLMFullResponseStartFrame):
+            state._assistant_started += 1
+        elif isinstance(frame, LLMFullResponseEndFrame):
+            state._assistant_started = max(0, state._assistant_started - 1)
+            state._on_assistant_done()
+        elif isinstance(frame, TextFrame):
+            state._on_assistant_text(frame.text)
+        elif isinstance(frame, BotStoppedSpeakingFrame):
+            state._on_assistant_done()
+        elif isinstance(frame, FunctionCallInProgressFrame) and direction == FrameDirection.DOWNSTREAM:
+            state.tool_calls += 1
+
+        await self.push_frame(frame, direction)
@@ -0,0 +1,241 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Filler audio while tools or retrieval keep the caller waiting.
+
+Callers hear silence while a slow tool call (e.g. `book_appointment`) or a
+RAG lookup is pending. `FillerAudio` tracks pending work from frames and, if
+something is still pending after `delay` seconds while the bot is silent,
+plays a short pre-rendered phrase, then a soft thinking tone every
+`repeat_interval` seconds. Filler audio is paced out in small chunks, so it
+stops within one chunk when the real response starts or the caller speaks:
+
+    ... -> state.turn_observer -> filler.retrieval_started -> rag
+        -> filler.retrieval_finished -> ... -> llm -> tts -> filler.output
+        -> transport.output()
+"""
+
+import array
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    CancelFrame,
+    EndFrame,
+    FunctionCallCancelFrame,
+    FunctionCallInProgressFrame,
+    FunctionCallResultFrame,
+    InterruptionFrame,
+    LLMFullResponseStartFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+import metrics
+
+FILLER_TEXT = "Just a moment."
+
+_RETRIEVAL = "retrieval"
+
+
+def thinking_tone(sample_rate: int = 24000) -> bytes:
+    """A quiet two-note chime as 16-bit mono PCM."""
+    samples = array.array("h")
+    note_samples = int(sample_rate * 0.12)
+    for frequency in (660.0, 880.0):
+        for i in range(note_samples):
+            # Short fade in and out to avoid clicks
+            envelope = min(1.0, i / (0.01 * sample_rate), (note_samples - i) / (0.03 * sample_rate))
+            samples.append(int(2500 * envelope * math.sin(2 * math.pi * frequency * i / sample_rate)))
+    return samples.tobytes()
+
+
+class _FillerAudioFrame(TTSAudioRawFrame):
+    """Filler audio, told apart from the real response's audio."""
+
+
+class FillerAudio:
+    """Plays filler audio while tool calls or retrieval are slow.
+
+    Args:
+        phrase: Coroutine function returning the pre-rendered filler phrase
+            (16-bit mono PCM at `sample_rate`), or None to use the tone only.
+        sample_rate: Sample rate of the filler audio.
+        delay: Seconds something must be pending before filler plays.
+        repeat_interval: Seconds between thinking tones while still pending.
+        chunk_ms: Size of the audio chunks filler is paced out in.
+    """
+
+    def __init__(
+        self,
+        phrase: Optional[Callable[[], Awaitable[Optional[bytes]]]] = None,
+        *,
+        sample_rate: int = 24000,
+        delay: float = 0.4,
+        repeat_interval: float = 3.0,
+        chunk_ms: int = 20,
+    ):
+        self._phrase = phrase
+        self._sample_rate = sample_rate
+        self._delay = delay
+        self._repeat_interval = repeat_interval
+        self._chunk_bytes = int(sample_rate * chunk_ms / 1000) * 2
+        self._tone = thinking_tone(sample_rate)
+        # Pending work (tool call ID or retrieval) -> when it started
+        self._pending: Dict[str, float] = {}
+        self._bot_speaking = False
+        self._silent_since = 0.0
+        # The bot spoke (e.g. "give me one second") since work became pending
+        self._bot_spoke = False
+        self._played = 0
+        self._task: Optional[asyncio.Task] = None
+        self._playing: Optional[asyncio.Task] = None
+
+        self.retrieval_started = _RetrievalObserver(self, started=True)
+        self.retrieval_finished = _RetrievalObserver(self, started=False)
+        self.output = _FillerOutput(self)
+
+    def _begin(self, key: str):
+        if not self._pending:
+            self._played = 0
+            self._bot_spoke = self._bot_speaking
+        self._pending.setdefault(key, time.perf_counter())
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+
+    def _end(self, key: str):
+        self._pending.pop(key, None)
+
+    def _trigger(self) -> str:
+        return "retrieval" if _RETRIEVAL in self._pending else "tool"
+
+    async def _watch(self):
+        """Decide when to play filler while anything is pending."""
+        next_at = None
+        while self._pending:
+            now = time.perf_counter()
+            if next_at is None:
+                # Counted from when the bot went quiet, if it spoke meanwhile
+                next_at = max(min(self._pending.values()), self._silent_since) + self._delay
+            if now >= next_at and not self._bot_speaking and self._playing is None:
+                audio = None
+                # No phrase if the bot already told the caller to hold on
+                if self._played == 0 and not self._bot_spoke and self._phrase:
+                    try:
+                        audio = await self._phrase()
+                    except Exception as e:
+                        logger.debug(f"Filler phrase unavailable: {e}")
+                kind = "phrase" if audio else "tone"
+                if not self._pending:
+                    break
+                metrics.FILLER_PLAYED_TOTAL.inc(trigger=self._trigger(), kind=kind)
+                logger.debug(f"Playing filler {kind} ({self._trigger()} pending)")
+                self._playing = asyncio.create_task(self.output.play(audio or self._tone))
+                self._played += 1
+                next_at = time.perf_counter() + self._repeat_interval
+            await asyncio.sleep(0.05)
+
+    def _on_bot_speaking(self, speaking: bool):
+        if speaking and self._pending and self._playing is None:
+            self._bot_spoke = True
+        if not speaking:
+            self._silent_since = time.perf_counter()
+        self._bot_speaking = speaking
+
+    def _on_playing_done(self):
+        if self._playing is asyncio.current_task():
+            self._playing = None
+
+    def stop(self, reason: str):
+        """Stop filler audio right away (the real response started, or the caller spoke)."""
+        if self._playing is not None and not self._playing.done():
+            self._playing.cancel()
+            metrics.FILLER_CANCELLED_TOTAL.inc(reason=reason)
+        self._playing = None
+
+    def cancel(self):
+        self.stop("ended")
+        self._pending.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+
+class _RetrievalObserver(FrameProcessor):
+    """Sees a user turn enter (or leave) the RAG processor."""
+
+    def __init__(self, filler: FillerAudio, started: bool, **kwargs):
+        super().__init__(**kwargs)
+        self._filler = filler
+        self._started = started
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            if self._started:
+                self._filler._begin(_RETRIEVAL)
+            else:
+                self._filler._end(_RETRIEVAL)
+
+        await self.push_frame(frame, direction)
+
+
+class _FillerOutput(FrameProcessor):
+    """Tracks tool calls and plays filler; place right before the output transport."""
+
+    def __init__(self, filler: FillerAudio, **kwargs):
+        super().__init__(**kwargs)
+        self._filler = filler
+
+    async def play(self, audio: bytes):
+        """Push `audio` in real-time paced chunks, so stopping takes effect within a chunk."""
+        filler = self._filler
+        chunk_bytes = filler._chunk_bytes
+        chunk_seconds = chunk_bytes / (2 * filler._sample_rate)
+        started = time.perf_counter()
+        try:
+            for i, offset in enumerate(range(0, len(audio), chunk_bytes)):
+                await self.push_frame(
+                    _FillerAudioFrame(
+                        audio=audio[offset : offset + chunk_bytes],
+                        sample_rate=filler._sample_rate,
+                        num_channels=1,
+                    )
+                )
+                # Stay one chunk ahead of playback
+                await asyncio.sleep(max(0.0, started + i * chunk_seconds - time.perf_counter()))
+        finally:
+            filler._on_playing_done()
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        filler = self._filler
+        if isinstance(frame, FunctionCallInProgressFrame) and direction == FrameDirection.DOWNSTREAM:
+            filler._begin(frame.tool_call_id)
+        elif isinstance(frame, (FunctionCallResultFrame, FunctionCallCancelFrame)):
+            filler._end(frame.tool_call_id)
+        elif isinstance(frame, InterruptionFrame):
+            filler.stop("interruption")
+        elif isinstance(frame, (TTSStartedFrame, LLMFullResponseStartFrame)) or (
+            isinstance(frame, TTSAudioRawFrame) and not isinstance(frame, _FillerAudioFrame)
+        ):
+            filler.stop("response")
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            filler._on_bot_speaking(True)
+        elif isinstance(frame, BotStoppedSpeakingFrame):
+            filler._on_bot_speaking(False)
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            filler.cancel()
+
+        await self.push_frame(frame, direction)
@@ -0,0 +1,154 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Event-driven greeting with pre-synthesized audio.
+
+The bot used to wait a fixed 1.8 s after the client connected and then send
+the greeting through TTS, adding the sleep and a TTS round trip to every call
+however early the SIP leg was ready. `Greeter` instead greets shortly after
+the first readiness signal, dial-in connected or the first inbound audio,
+with a timeout fallback in case neither arrives:
+
+    transport.input() -> greeter.input_observer -> stt -> ...
+
+The greeting is still spoken with a `TTSSpeakFrame`, so it reaches the
+assistant context like any other bot utterance, but its audio is synthesized
+ahead of time and played from the TTS cache (see tts_cache.py).
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    InputAudioRawFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+import metrics
+from tts_cache import cache_key, get_tts_cache
+
+GREETING_TEXT = "Thank you for calling Thérapie Clinic, how can I help you today?"
+
+
+async def presynthesize(
+    text: str, voice_id: str, *, sample_rate: int = 24000, model: str = "sonic-2"
+) -> Optional[bytes]:
+    """Return the PCM audio for `text` from the TTS cache, synthesizing it if needed.
+
+    Returns None if synthesis fails, so the caller can fall back to regular TTS.
+    """
+    return await get_tts_cache().get_or_synthesize(cache_key(text, voice_id, sample_rate, model))
+
+
+class Greeter:
+    """Greets the caller once the call is ready.
+
+    Call `start()` when the client connects and `ready()` on dial-in
+    connected; the first inbound audio frame counts as ready too. Once
+    started, the greeting is played `safety_delay` seconds after the first
+    signal (so the caller's end of the line is actually listening), or
+    `timeout` seconds after `start()` if no signal arrives.
+
+    Args:
+        audio: Coroutine that puts the greeting in the TTS cache, returning
+            its audio or None if synthesis failed.
+        speak: Coroutine function that sends the greeting through TTS.
+        safety_delay: Seconds between a readiness signal and the greeting.
+        timeout: Seconds after `start()` to greet without a readiness signal.
+        on_greeted: Called with the trigger once the greeting is sent.
+    """
+
+    def __init__(
+        self,
+        audio: Awaitable[Optional[bytes]],
+        speak: Callable[[], Awaitable[None]],
+        *,
+        safety_delay: float = 0.2,
+        timeout: float = 3.0,
+        on_greeted: Optional[Callable[[str], None]] = None,
+    ):
+        self._audio_task = asyncio.ensure_future(audio)
+        self._speak = speak
+        self._safety_delay = safety_delay
+        self._timeout = timeout
+        self._on_greeted = on_greeted
+        self._started_at: Optional[float] = None
+        self._trigger: Optional[str] = None
+        self._greeting: Optional[asyncio.Task] = None
+        self._fallback: Optional[asyncio.Task] = None
+
+        self.input_observer = _InboundAudioObserver(self)
+
+    def start(self):
+        """The client connected: greet on the first signal, or after the timeout."""
+        if self._started_at is not None:
+            return
+        self._started_at = time.perf_counter()
+        if self._trigger is not None:
+            self._greeting = asyncio.create_task(self._greet_after(self._safety_delay, self._trigger))
+        else:
+            self._fallback = asyncio.create_task(self._greet_after(self._timeout, "timeout"))
+
+    def ready(self, trigger: str):
+        """A readiness signal arrived: greet after the safety delay (once started)."""
+        if self._trigger is not None:
+            return
+        self._trigger = trigger
+        if self._started_at is not None and self._greeting is None:
+            self._greeting = asyncio.create_task(self._greet_after(self._safety_delay, trigger))
+
+    async def _greet_after(self, delay: float, trigger: str):
+        await asyncio.sleep(delay)
+        if trigger == "timeout":
+            if self._greeting is not None:
+                return
+            self._greeting = asyncio.current_task()
+        elif self._fallback is not None:
+            self._fallback.cancel()
+
+        audio = None
+        try:
+            # Normally done long before; never hold the greeting on it. Without
+            # it the TTS service synthesizes the greeting as usual
+            audio = await asyncio.wait_for(asyncio.shield(self._audio_task), 0.05)
+        except Exception:
+            pass
+        await self._speak()
+
+        metrics.TIME_TO_GREETING_SECONDS.observe(time.perf_counter() - self._started_at, trigger=trigger)
+        logger.info(f"Greeted caller ({trigger}, {'pre-synthesized' if audio else 'tts'})")
+        if self._on_greeted:
+            self._on_greeted(trigger)
+
+    def cancel(self):
+        for task in (self._fallback, self._greeting, self._audio_task):
+            if task is not None and not task.done() and task is not asyncio.current_task():
+                task.cancel()
+
+
+class _InboundAudioObserver(FrameProcessor):
+    """Treats the first inbound audio as a readiness signal; place right after the input."""
+
+    def __init__(self, greeter: Greeter, **kwargs):
+        super().__init__(**kwargs)
+        self._greeter = greeter
+        self._heard = False
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if not self._heard and isinstance(frame, InputAudioRawFrame):
+            self._heard = True
+            self._greeter.ready("audio")
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            self._greeter.cancel()
+
+        await self.push_frame(frame, direction)
+
@@ -0,0 +1,258 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Outbound HTTP clients for Daily, Pipecat Cloud, the local /start path and webhooks.
+
+Each upstream gets its own aiohttp session and connection pool (with DNS
+caching and keep-alive), so a slow upstream cannot starve the others of
+connections. Transient failures are retried with jittered exponential backoff,
+but only while a global retry budget allows it: retries are capped at a
+fraction of recent requests, so an outage does not turn into a retry storm.
+
+`HostClient` mimics the `aiohttp.ClientSession` request methods, so it can be
+passed anywhere a session is expected (e.g. `DailyRESTHelper`).
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Iterable, Optional
+
+import aiohttp
+from loguru import logger
+
+import metrics
+
+DEFAULT_RETRY_STATUSES = (429, 502, 503, 504)
+# Statuses meaning the upstream did not act on the request; other statuses
+# (e.g. a 502 from a proxy after the upstream created a room) may hide a side effect
+NOT_PROCESSED_STATUSES = (429, 503)
+
+
+class RetryBudget:
+    """Limits retries to a fraction of requests, shared by all clients.
+
+    Every request deposits `ratio` tokens and every retry withdraws one. A
+    small steady refill keeps retries possible when traffic is low.
+
+    Args:
+        ratio: Retries allowed per request (0.2 allows one retry per 5 requests).
+        min_per_second: Tokens added per second regardless of traffic.
+        max_balance: Cap on saved-up tokens, bounding retry bursts.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_balance: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self._balance = max_balance
+        self._updated = time.monotonic()
+
+    def _refill(self, amount: float = 0.0):
+        now = time.monotonic()
+        self._balance = min(
+            self.max_balance,
+            self._balance + (now - self._updated) * self.min_per_second + amount,
+        )
+        self._updated = now
+
+    def record_request(self):
+        """Deposit the allowance for one request."""
+        self._refill(self.ratio)
+
+    def try_spend(self) -> bool:
+        """Withdraw one retry. Returns False if the budget is exhausted."""
+        self._refill()
+        if self._balance >= 1.0:
+            self._balance -= 1.0
+            return True
+        return False
+
+
+class HostClient:
+    """Connection pool and retry policy for one upstream.
+
+    Args:
+        name: Upstream name, used in logs and metric labels.
+        retry_budget: Budget shared with the other clients.
+        limit: Maximum concurrent connections to this upstream.
+        timeout: Per-attempt timeout.
+        max_attempts: Maximum attempts per request, including the first.
+        retry_statuses: Response statuses that are retried. Non-idempotent
+            requests are only retried on those in `NOT_PROCESSED_STATUSES`.
+        backoff_base: Backoff before the first retry (seconds, before jitter).
+        backoff_cap: Maximum backoff (seconds, before jitter).
+        keepalive_timeout: Seconds an idle connection is kept for reuse.
+        dns_cache_ttl: Seconds resolved addresses are cached.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        retry_budget: RetryBudget,
+        *,
+        limit: int = 50,
+        timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=5, connect=2),
+        max_attempts: int = 3,
+        retry_statuses: Iterable[int] = DEFAULT_RETRY_STATUSES,
+        backoff_base: float = 0.05,
+        backoff_cap: float = 1.0,
+        keepalive_timeout: float = 60.0,
+        dns_cache_ttl: int = 300,
+    ):
+        self.name = name
+        self._budget = retry_budget
+        self._limit = limit
+        self._timeout = timeout
+        self._max_attempts = max(1, max_attempts)
+        self._retry_statuses = set(retry_statuses)
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        connector = aiohttp.TCPConnector(
+            limit=self._limit,
+            ttl_dns_cache=self._dns_cache_ttl,
+            keepalive_timeout=self._keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def _may_retry(self, attempt: int, reason: str) -> bool:
+        if attempt >= self._max_attempts:
+            return False
+        if not self._budget.try_spend():
+            metrics.HTTP_CLIENT_RETRY_BUDGET_EXHAUSTED_TOTAL.inc(upstream=self.name)
+            logger.warning(f"{self.name}: retry budget exhausted, not retrying ({reason})")
+            return False
+        metrics.HTTP_CLIENT_RETRIES_TOTAL.inc(upstream=self.name, reason=reason)
+        return True
+
+    async def _backoff(self, attempt: int):
+        # Full jitter
+        await asyncio.sleep(random.uniform(0, min(self._backoff_cap, self._backoff_base * 2 ** (attempt - 1))))
+
+    def _observe(self, started: float, outcome):
+        metrics.HTTP_CLIENT_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, upstream=self.name, outcome=outcome
+        )
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, *, idempotent: bool = False, **kwargs):
+        """Send a request, retrying transient failures within the budget.
+
+        Connection failures (the request was never sent) are always
+        retryable. Timeouts, dropped connections and `retry_statuses` such as
+        502 and 504 are only retried for idempotent requests, since the
+        upstream may have acted; non-idempotent requests (POST) are retried
+        on 429 and 503, which mean it did not.
+
+        Yields:
+            aiohttp.ClientResponse: Released back to the pool on exit.
+        """
+        if self._session is None:
+            raise RuntimeError(f"HTTP client '{self.name}' is not started")
+        self._budget.record_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.perf_counter()
+            try:
+                response = await self._session.request(method, url, **kwargs)
+            except aiohttp.ClientConnectorError as e:
+                self._observe(started, "connect_error")
+                if self._may_retry(attempt, "connect_error"):
+                    logger.warning(f"{self.name}: connection failed ({e}), retrying")
+                    await self._backoff(attempt)
+                    continue
+                raise
+            except (asyncio.TimeoutError, aiohttp.ServerDisconnectedError) as e:
+                reason = "timeout" if isinstance(e, asyncio.TimeoutError) else "disconnected"
+                self._observe(started, reason)
+                if idempotent and self._may_retry(attempt, reason):
+                    logger.warning(f"{self.name}: {reason}, retrying")
+                    await self._backoff(attempt)
+                    continue
+                raise
+
+            self._observe(started, response.status)
+            retryable = response.status in self._retry_statuses and (
+                idempotent or response.status in NOT_PROCESSED_STATUSES
+            )
+            if retryable and self._may_retry(attempt, str(response.status)):
+                # Read the body so the connection can be reused for the retry
+                await response.read()
+                response.release()
+                logger.warning(f"{self.name}: got HTTP {response.status}, retrying")
+                await self._backoff(attempt)
+                continue
+            break
+
+        try:
+            yield response
+        finally:
+            response.release()
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, idempotent=True, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url: str, **kwargs):
+        return self.request("DELETE", url, idempotent=True, **kwargs)
+
+
+class HttpClients:
+    """The app's outbound clients, one pool per upstream.
+
+    Attributes:
+        daily: Daily REST API.
+        pipecat: Pipecat Cloud API (production bot start).
+        local: This server's own /start endpoint (local bot start).
+        webhook: Clinic webhooks (voicemail notifications).
+    """
+
+    def __init__(self, retry_budget: Optional[RetryBudget] = None):
+        self.retry_budget = retry_budget or RetryBudget()
+        self.daily = HostClient("daily", self.retry_budget)
+        # Starting a bot is not idempotent: only retry when the upstream
+        # clearly did not take the request
+        self.pipecat = HostClient(
+            "pipecat",
+            self.retry_budget,
+            timeout=aiohttp.ClientTimeout(total=10, connect=2),
+            retry_statuses=(429, 503),
+        )
+        self.local = HostClient(
+            "local",
+            self.retry_budget,
+            timeout=aiohttp.ClientTimeout(total=10, connect=2),
+            retry_statuses=(),
+        )
+        self.webhook = HostClient(
+            "webhook",
+            self.retry_budget,
+            limit=10,
+            timeout=aiohttp.ClientTimeout(total=10, connect=2),
+            retry_statuses=(429, 503),
+        )
+
+    async def start(self):
+        for client in (self.daily, self.pipecat, self.local, self.webhook):
+            await client.start()
+
+    async def close(self):
+        for client in (self.daily, self.pipecat, self.local, self.webhook):
+            await client.close()
@@ -0,0 +1,197 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""CallSid-based idempotency for the Twilio /call webhook.
+
+When /call is slow, Twilio retries the webhook with the same CallSid. Without
+deduplication every retry creates another Daily room and starts another bot,
+doubling the expensive work exactly when we are already overloaded.
+
+`CallSetupDeduplicator` makes setup idempotent per key: a retry that arrives
+while setup is in flight waits for the same setup, and a retry that arrives
+afterwards gets the stored TwiML. Results expire after a TTL. Coordination
+between server instances goes through a pluggable backend: the in-memory
+backend covers a single instance, and `RedisIdempotencyBackend` shares state
+across instances.
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+import metrics
+
+
+class IdempotencyBackend(ABC):
+    """Key-value store with per-key expiry used to coordinate call setup."""
+
+    @abstractmethod
+    async def add(self, key: str, value: str, ttl: float) -> bool:
+        """Set `key` only if it does not exist. Returns True if it was set."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Return the value for `key`, or None if missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float):
+        """Set `key`, replacing any existing value."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove `key` if present."""
+
+
+class InMemoryIdempotencyBackend(IdempotencyBackend):
+    """Process-local backend. Suitable for a single server instance and tests."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[str, float]] = {}
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+
+    async def add(self, key: str, value: str, ttl: float) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._entries[key] = (value, time.monotonic() + ttl)
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def set(self, key: str, value: str, ttl: float):
+        self._purge_expired()
+        self._entries[key] = (value, time.monotonic() + ttl)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+class RedisIdempotencyBackend(IdempotencyBackend):
+    """Backend shared between server instances, stored in Redis.
+
+    Requires the `redis` package (not installed by default).
+
+    Args:
+        url: Redis connection URL, e.g. redis://localhost:6379/0.
+        prefix: Prefix for all keys written by this backend.
+    """
+
+    def __init__(self, url: str, prefix: str = "call-setup:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RedisIdempotencyBackend requires the `redis` package") from e
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+
+    async def add(self, key: str, value: str, ttl: float) -> bool:
+        return bool(await self._redis.set(self._prefix + key, value, nx=True, px=int(ttl * 1000)))
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(self._prefix + key)
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self._redis.set(self._prefix + key, value, px=int(ttl * 1000))
+
+    async def delete(self, key: str):
+        await self._redis.delete(self._prefix + key)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class CallSetupDeduplicator:
+    """Runs call setup at most once per key and replays its result.
+
+    Args:
+        backend: Store shared by all server instances handling the number.
+        ttl: Seconds a completed setup's result is kept for retries.
+        in_flight_ttl: Seconds an in-flight claim is honoured. If the instance
+            holding it dies, another instance may take over after this long.
+        poll_interval: Seconds between checks while another instance sets up.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[IdempotencyBackend] = None,
+        *,
+        ttl: float = 600.0,
+        in_flight_ttl: float = 30.0,
+        poll_interval: float = 0.1,
+    ):
+        self.backend = backend or InMemoryIdempotencyBackend()
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+        self.poll_interval = poll_interval
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def run(self, key: str, setup: Callable[[], Awaitable[str]]) -> str:
+        """Return the result of `setup` for `key`, running it at most once.
+
+        Setup runs in its own task, so it completes even if the request that
+        started it is abandoned (e.g. Twilio timed out and retried). Failed
+        setups are not stored; the next retry runs setup again.
+
+        Args:
+            key: Idempotency key, e.g. the CallSid.
+            setup: Coroutine function producing the response (TwiML).
+
+        Returns:
+            str: The setup result.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            result = await self.backend.get(f"result:{key}")
+            if result is not None:
+                metrics.CALL_SETUP_REPLAYED_TOTAL.inc(source="stored")
+                logger.info(f"Replaying stored call setup result for {key}")
+                return result
+            # Another request for this key may have started while we awaited
+            task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_once(key, setup))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            metrics.CALL_SETUP_REPLAYED_TOTAL.inc(source="in_flight")
+            logger.info(f"Joining in-flight call setup for {key}")
+        return await asyncio.shield(task)
+
+    async def _run_once(self, key: str, setup: Callable[[], Awaitable[str]]) -> str:
+        claim_key = f"claim:{key}"
+        result_key = f"result:{key}"
+        while not await self.backend.add(claim_key, "1", self.in_flight_ttl):
+            # Another instance is setting this call up; wait for its result
+            result = await self.backend.get(result_key)
+            if result is not None:
+                metrics.CALL_SETUP_REPLAYED_TOTAL.inc(source="other_instance")
+                return result
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            result = await setup()
+        except BaseException:
+            await self.backend.delete(claim_key)
+            raise
+        await self.backend.set(result_key, result, self.ttl)
+        return result
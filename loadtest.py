@@ -0,0 +1,333 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Offline load test for the /call webhook.
+
+Fires realistic Twilio /call form posts at fixed rates against server.py and
+reports throughput, webhook latency percentiles and error rates. Local stub
+servers stand in for the Daily REST API, the Pipecat Cloud start API and the
+local /start path, so no network access or API keys are needed.
+
+By default the script starts its own server.py (via uvicorn) pointed at the
+stubs. Use --target to load an already running server instead.
+
+Usage:
+    uv run loadtest.py --rate 5 --rate 10 --rate 20 --duration 20
+    uv run loadtest.py --environment production --daily-latency 150 --start-latency 300
+    uv run loadtest.py --target http://localhost:7860 --rate 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import aiohttp
+from aiohttp import web
+
+# Twilio gives up on a webhook after 15 seconds
+TWILIO_WEBHOOK_TIMEOUT = 15.0
+
+
+class StubServices:
+    """Local stand-ins for Daily, Pipecat Cloud and the local /start endpoint.
+
+    Args:
+        daily_latency: Added latency (seconds) for each Daily REST request.
+        start_latency: Added latency (seconds) for each bot start request.
+        error_rate: Fraction of stub requests that fail with HTTP 503.
+    """
+
+    def __init__(self, daily_latency: float, start_latency: float, error_rate: float):
+        self.daily_latency = daily_latency
+        self.start_latency = start_latency
+        self.error_rate = error_rate
+        self.requests = {"rooms": 0, "meeting-tokens": 0, "cloud_start": 0, "local_start": 0}
+        self._runner = None
+        self.url = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/daily/rooms", self._create_room)
+        self.app.router.add_post("/daily/meeting-tokens", self._create_token)
+        self.app.router.add_post("/pipecat/public/{agent}/start", self._cloud_start)
+        self.app.router.add_post("/start", self._local_start)
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        port = _free_port()
+        await web.TCPSite(self._runner, "127.0.0.1", port).start()
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _respond(self, key: str, latency: float, payload: dict):
+        self.requests[key] += 1
+        await asyncio.sleep(latency)
+        if random.random() < self.error_rate:
+            return web.json_response({"error": "stub failure"}, status=503)
+        return web.json_response(payload)
+
+    async def _create_room(self, request: web.Request):
+        params = await request.json()
+        name = params.get("name") or f"stub-{uuid.uuid4().hex[:8]}"
+        properties = params.get("properties", {})
+        properties["sip_uri"] = {"endpoint": f"{name}@stub.sip.daily.co"}
+        room = {
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "api_created": True,
+            "privacy": params.get("privacy", "public"),
+            "url": f"https://stub.daily.co/{name}",
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+            "config": properties,
+        }
+        return await self._respond("rooms", self.daily_latency, room)
+
+    async def _create_token(self, request: web.Request):
+        return await self._respond("meeting-tokens", self.daily_latency, {"token": uuid.uuid4().hex})
+
+    async def _cloud_start(self, request: web.Request):
+        return await self._respond("cloud_start", self.start_latency, {"status": "started"})
+
+    async def _local_start(self, request: web.Request):
+        body = (await request.json()).get("body", {})
+        return await self._respond(
+            "local_start", self.start_latency, {"status": "started", "call_id": body.get("call_id")}
+        )
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _twilio_call_form(call_sid: str) -> dict:
+    """Form fields Twilio posts for an incoming call."""
+    return {
+        "AccountSid": "AC" + "0" * 32,
+        "ApiVersion": "2010-04-01",
+        "CallSid": call_sid,
+        "CallStatus": "ringing",
+        "Called": "+15005550006",
+        "Caller": f"+1415555{random.randint(0, 9999):04d}",
+        "Direction": "inbound",
+        "From": random.choice(["+14155550198", "+15125550140", f"+1415555{random.randint(0, 9999):04d}"]),
+        "To": "+15005550006",
+    }
+
+
+def start_server(port: int, env: dict, log_path: str) -> subprocess.Popen:
+    """Start server.py under uvicorn with the given environment overrides."""
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, **env},
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_until_healthy(session: aiohttp.ClientSession, url: str, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{url}/health") as r:
+                if r.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become healthy within {timeout}s")
+
+
+async def wait_until_warm(session: aiohttp.ClientSession, url: str, timeout: float = 120.0):
+    """Wait for background warm-up to finish, so it does not skew latencies."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        async with session.get(f"{url}/ready") as r:
+            if r.status == 404:
+                return
+            components = (await r.json()).get("components", {})
+            if "loading" not in components.values():
+                return
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not finish warming up within {timeout}s")
+
+
+async def run_load(
+    session: aiohttp.ClientSession,
+    url: str,
+    *,
+    rate: float,
+    duration: float,
+    call_duration: float,
+    timeout: float,
+) -> dict:
+    """Send /call webhooks at a fixed rate (open loop) and collect results.
+
+    Each admitted call is followed by a "completed" status callback after
+    `call_duration` seconds, so admission control sees calls end.
+    """
+    latencies = []
+    outcomes = {}
+    pending = []
+
+    async def one_call():
+        call_sid = "CA" + uuid.uuid4().hex
+        started = time.perf_counter()
+        try:
+            async with session.post(
+                f"{url}/call",
+                data=_twilio_call_form(call_sid),
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as r:
+                text = await r.text()
+                elapsed = time.perf_counter() - started
+            if r.status != 200:
+                outcome = f"http_{r.status}"
+            elif "<Record" in text or "<Redirect" in text:
+                outcome = "overflow"
+            else:
+                outcome = "ok"
+        except asyncio.TimeoutError:
+            elapsed = time.perf_counter() - started
+            outcome = "timeout"
+        except aiohttp.ClientError as e:
+            elapsed = time.perf_counter() - started
+            outcome = type(e).__name__
+        latencies.append(elapsed)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+        if outcome == "ok":
+            await asyncio.sleep(call_duration)
+            try:
+                async with session.post(
+                    f"{url}/call/status", data={"CallSid": call_sid, "CallStatus": "completed"}
+                ):
+                    pass
+            except aiohttp.ClientError:
+                pass
+
+    interval = 1.0 / rate
+    started = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - started < duration:
+        pending.append(asyncio.create_task(one_call()))
+        sent += 1
+        next_at = started + sent * interval
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+    send_window = time.perf_counter() - started
+    await asyncio.gather(*pending)
+
+    return {
+        "rate": rate,
+        "sent": sent,
+        "send_window": send_window,
+        "latencies": latencies,
+        "outcomes": outcomes,
+    }
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def print_report(result: dict):
+    latencies = sorted(result["latencies"])
+    outcomes = result["outcomes"]
+    ok = outcomes.get("ok", 0)
+    errors = result["sent"] - ok - outcomes.get("overflow", 0)
+    print(
+        f"rate={result['rate']:g}/s sent={result['sent']} "
+        f"onboarded={ok / result['send_window']:.1f}/s "
+        f"p50={_percentile(latencies, 50) * 1000:.0f}ms "
+        f"p95={_percentile(latencies, 95) * 1000:.0f}ms "
+        f"p99={_percentile(latencies, 99) * 1000:.0f}ms "
+        f"max={(latencies[-1] if latencies else 0) * 1000:.0f}ms "
+        f"error_rate={errors / max(1, result['sent']):.1%} "
+        f"outcomes={dict(sorted(outcomes.items()))}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the /call webhook")
+    parser.add_argument("--rate", type=float, action="append", help="Calls per second (repeatable)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to send at each rate")
+    parser.add_argument("--call-duration", type=float, default=30.0, help="Simulated call length (s)")
+    parser.add_argument("--timeout", type=float, default=TWILIO_WEBHOOK_TIMEOUT, help="Webhook timeout (s)")
+    parser.add_argument("--target", help="Load an already running server instead of starting one")
+    parser.add_argument("--environment", choices=["local", "production"], default="local")
+    parser.add_argument("--daily-latency", type=float, default=100.0, help="Stub Daily latency (ms)")
+    parser.add_argument("--start-latency", type=float, default=200.0, help="Stub bot start latency (ms)")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="Stub failure fraction")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the started server (repeatable)")
+    parser.add_argument("--server-log", default="loadtest_server.log", help="Started server's log file")
+    args = parser.parse_args()
+    rates = args.rate or [5.0]
+
+    stubs = StubServices(args.daily_latency / 1000, args.start_latency / 1000, args.stub_error_rate)
+    await stubs.start()
+
+    server = None
+    url = args.target
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        try:
+            if not url:
+                port = _free_port()
+                env = {
+                    "ENVIRONMENT": args.environment,
+                    "DAILY_API_KEY": "loadtest",
+                    "DAILY_API_URL": f"{stubs.url}/daily",
+                    "PIPECAT_API_URL": f"{stubs.url}/pipecat",
+                    "PIPECAT_API_TOKEN": "loadtest",
+                    "PIPECAT_AGENT_NAME": "loadtest",
+                    "LOCAL_SERVER_URL": stubs.url,
+                    # Keep the run offline and the bots out of the picture
+                    "QDRANT_URL": "",
+                    "BOT_WORKERS": "0",
+                }
+                env.update(kv.split("=", 1) for kv in args.server_env)
+                server = start_server(port, env, args.server_log)
+                url = f"http://127.0.0.1:{port}"
+                print(f"Started server.py on {url} (log: {args.server_log}), stubs on {stubs.url}")
+            await wait_until_healthy(session, url)
+            await wait_until_warm(session, url)
+
+            for rate in rates:
+                result = await run_load(
+                    session,
+                    url,
+                    rate=rate,
+                    duration=args.duration,
+                    call_duration=args.call_duration,
+                    timeout=args.timeout,
+                )
+                print_report(result)
+            print(f"stub requests: {stubs.requests}")
+        finally:
+            if server:
+                server.terminate()
+                server.wait(timeout=10)
+            await stubs.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,381 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Minimal Prometheus metrics for the webhook server and bots.
+
+A small in-process registry that renders the Prometheus text exposition
+format, so we can expose /metrics without adding a client library. Bot worker
+processes cannot share memory with the server, so a worker installs a
+forwarder (see `set_forwarder`) and every update is replayed into the server's
+registry by the supervisor (see `apply_forwarded`).
+
+All metrics are defined at the bottom of this module so that every process
+knows them by name.
+"""
+
+import math
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Set in bot worker processes: updates are sent to the server instead of applied
+_forwarder: Optional[Callable[[tuple], None]] = None
+
+
+def set_forwarder(forwarder: Optional[Callable[[tuple], None]]):
+    """Send metric updates to `forwarder` instead of the local registry."""
+    global _forwarder
+    _forwarder = forwarder
+
+
+def apply_forwarded(record: tuple):
+    """Apply an update forwarded from another process to the local registry."""
+    name, op, labels, value = record
+    metric = REGISTRY.get(name)
+    if metric is not None:
+        metric._apply(op, labels, value)
+
+
+def _format_labels(labelnames, labelvalues, extra: str = "") -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Registry:
+    """Named collection of metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric"):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional["_Metric"]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        return "".join(metric._render() for metric in self._metrics.values())
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, object] = {}
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _update(self, op: str, labels: dict, value: float):
+        key = self._key(labels)
+        if _forwarder is not None:
+            _forwarder((self.name, op, key, value))
+        else:
+            self._apply(op, key, value)
+
+    def _render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._render_samples())
+        return "\n".join(lines) + "\n"
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        self._update("inc", labels, amount)
+
+    def _apply(self, op, key, value):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def _render_samples(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self._update("set", labels, value)
+
+    def inc(self, amount: float = 1, **labels):
+        self._update("inc", labels, amount)
+
+    def dec(self, amount: float = 1, **labels):
+        self._update("inc", labels, -amount)
+
+    def clear(self):
+        """Drop all label sets (e.g. before re-populating at scrape time)."""
+        with self._lock:
+            self._values.clear()
+
+    def _apply(self, op, key, value):
+        with self._lock:
+            if op == "set":
+                self._values[key] = value
+            else:
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def _render_samples(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        self._update("observe", labels, value)
+
+    def _apply(self, op, key, value):
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts, _, _ = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_samples(self):
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+# Call setup (/call webhook)
+CALL_SETUP_STAGE_SECONDS = Histogram(
+    "call_setup_stage_seconds",
+    "Duration of each /call setup stage (lookup, room, room_create, token, bot_start).",
+    ("stage",),
+)
+CALL_SETUP_SECONDS = Histogram(
+    "call_setup_seconds",
+    "Time from receiving the /call webhook to returning TwiML.",
+)
+CALL_ERRORS_TOTAL = Counter(
+    "call_errors_total",
+    "Errors by stage, during setup and in live calls.",
+    ("stage",),
+)
+CALLS_TOTAL = Counter(
+    "calls_total",
+    "Calls received by the /call webhook, by outcome (admitted, rejected).",
+    ("outcome",),
+)
+VOICEMAILS_TOTAL = Counter(
+    "voicemails_total",
+    "Overflow voicemails, by result (forwarded, logged: no webhook configured, failed).",
+    ("result",),
+)
+CALL_SETUP_REPLAYED_TOTAL = Counter(
+    "call_setup_replayed_total",
+    "/call webhook retries answered without running setup again, by source (stored: a "
+    "stored result, in_flight: joined setup in progress, other_instance: set up elsewhere).",
+    ("source",),
+)
+ROOM_POOL_REQUESTS_TOTAL = Counter(
+    "room_pool_requests_total",
+    "Pre-warmed room requests, by result (hit, miss).",
+    ("result",),
+)
+
+# Outbound HTTP (Daily, Pipecat Cloud, local /start)
+HTTP_CLIENT_REQUEST_SECONDS = Histogram(
+    "http_client_request_seconds",
+    "Outbound request latency per attempt, by upstream and outcome (status or error).",
+    ("upstream", "outcome"),
+)
+HTTP_CLIENT_RETRIES_TOTAL = Counter(
+    "http_client_retries_total",
+    "Outbound request retries, by upstream and reason.",
+    ("upstream", "reason"),
+)
+HTTP_CLIENT_RETRY_BUDGET_EXHAUSTED_TOTAL = Counter(
+    "http_client_retry_budget_exhausted_total",
+    "Retries skipped because the global retry budget was exhausted.",
+    ("upstream",),
+)
+
+# Live calls (sampled when /metrics is scraped)
+ACTIVE_CALLS = Gauge("active_calls", "Calls currently admitted.")
+QUEUED_CALLS = Gauge("queued_calls", "Callers waiting for a free call slot.")
+BOT_WORKER_ACTIVE_CALLS = Gauge(
+    "bot_worker_active_calls",
+    "Calls running on each bot worker process.",
+    ("worker",),
+)
+POOLED_ROOMS = Gauge("pooled_rooms", "Pre-warmed SIP rooms ready in the pool.")
+
+# Bot processes
+RING_TO_GREETING_SECONDS = Histogram(
+    "ring_to_greeting_seconds",
+    "Time from the /call webhook to the greeting being sent by the bot.",
+    buckets=(0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0, 7.5, 10.0, 15.0),
+)
+TIME_TO_GREETING_SECONDS = Histogram(
+    "time_to_greeting_seconds",
+    "Time from the client connecting to the greeting being sent, by trigger (dialin, audio, timeout).",
+    ("trigger",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0),
+)
+BOT_CALLS_ACTIVE = Gauge("bot_calls_active", "Bot pipelines currently running.")
+CALL_FORWARD_SECONDS = Histogram(
+    "call_forward_seconds",
+    "Time to redirect the Twilio call to the Daily SIP endpoint, by outcome (ok, error, deadline).",
+    ("outcome",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0),
+)
+CALL_FORWARD_ATTEMPTS = Histogram(
+    "call_forward_attempts",
+    "Twilio update requests needed to redirect a call, by outcome.",
+    ("outcome",),
+    buckets=(1, 2, 3, 4, 5, 7, 10, 15, 20),
+)
+TOOL_CALL_SECONDS = Histogram(
+    "tool_call_seconds",
+    "Tool (function call) latency, by tool and outcome (ok, error, timeout, cancelled).",
+    ("tool", "outcome"),
+)
+TOOL_PREFETCH_TOTAL = Counter(
+    "tool_prefetch_total",
+    "Tool results prefetched at call start, by tool and result (ok, failed, late: after the first LLM turn).",
+    ("tool", "result"),
+)
+TURN_LATENCY_SECONDS = Histogram(
+    "turn_latency_seconds",
+    "Time from the caller's end of speech (VAD stop) to each stage of the bot's response "
+    "(turn_end, stt_final, rag_done, llm_first_token, tts_first_byte, audio_out).",
+    ("stage",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0, 7.5),
+)
+CALL_USER_TURNS = Histogram(
+    "call_user_turns",
+    "User turns per finished call.",
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 100),
+)
+
+# RAG (bot processes)
+RAG_LOOKUPS_TOTAL = Counter(
+    "rag_lookups_total",
+    "End-of-turn RAG results, by outcome (hit: speculative result reused, wait: joined the "
+    "in-flight speculative lookup, miss: looked up after end-of-turn, timeout, error).",
+    ("outcome",),
+)
+RAG_TURN_WAIT_SECONDS = Histogram(
+    "rag_turn_wait_seconds",
+    "Time each user turn was held before the LLM waiting for RAG.",
+)
+RAG_CACHE_REQUESTS_TOTAL = Counter(
+    "rag_cache_requests_total",
+    "RAG lookups by cache result (exact, semantic, miss).",
+    ("result",),
+)
+RAG_CACHE_SAVED_SECONDS_TOTAL = Counter(
+    "rag_cache_saved_seconds_total",
+    "Estimated lookup time saved by cache hits, by hit level (exact, semantic).",
+    ("level",),
+)
+
+# Filler audio (bot processes)
+FILLER_PLAYED_TOTAL = Counter(
+    "filler_played_total",
+    "Filler audio played while work was pending, by trigger (tool, retrieval) and kind (phrase, tone).",
+    ("trigger", "kind"),
+)
+FILLER_CANCELLED_TOTAL = Counter(
+    "filler_cancelled_total",
+    "Filler audio cut short, by reason (response, interruption, ended).",
+    ("reason",),
+)
+
+# TTS cache (bot processes)
+TTS_CACHE_REQUESTS_TOTAL = Counter(
+    "tts_cache_requests_total",
+    "TTS cache lookups, by result (memory, disk, miss).",
+    ("result",),
+)
+
+# Smart-turn inference (bot processes)
+SMART_TURN_BATCH_SIZE = Histogram(
+    "smart_turn_batch_size",
+    "End-of-turn predictions run together in one smart-turn inference.",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 32),
+)
+SMART_TURN_SECONDS = Histogram(
+    "smart_turn_seconds",
+    "Time from requesting an end-of-turn prediction to the result, including queueing.",
+    buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0),
+)
+SMART_TURN_REJECTED_TOTAL = Counter(
+    "smart_turn_rejected_total",
+    "End-of-turn predictions not run because the queue was full (the turn ends on silence instead).",
+)
+
+# LLM context (bot processes)
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Estimated prompt size sent to the LLM per turn, in tokens.",
+    buckets=(500, 1000, 2000, 3000, 4000, 6000, 8000, 12000, 16000, 32000),
+)
+LLM_PROMPT_MESSAGES = Histogram(
+    "llm_prompt_messages",
+    "Messages in the LLM context per turn.",
+    buckets=(5, 10, 20, 30, 50, 75, 100, 150, 200),
+)
+LLM_CONTEXT_COMPACTIONS_TOTAL = Counter(
+    "llm_context_compactions_total",
+    "Context compactions, by result (llm, fallback: transcript excerpt, stale: context changed meanwhile).",
+    ("result",),
+)
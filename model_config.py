@@ -1,6 +1,6 @@
-from datetime import datetime
-import uuid
 import json
+import uuid
+from datetime import datetime
 
 system_prompt="""
 <role>
@@ -0,0 +1,212 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Process-wide cache of RAG lookup results.
+
+Callers keep asking the same few questions (prices, opening hours, laser
+aftercare), so `rag_lookup` results are cached at two levels:
+
+1. Exact: keyed on the normalized user text. A hit skips the embedding and
+   the Qdrant query.
+2. Semantic: nearest neighbour over the embeddings of the cached user texts.
+   A hit within the cosine similarity threshold skips the Qdrant query, so
+   close paraphrases are served from the cache too.
+
+Entries are scoped (see `cache_scope`), and both levels only match within
+the same scope. Most questions stand on their own ("how much is laser hair
+removal on the legs") and share the global scope, so they hit across calls
+whatever the bot said before. Short or referring replies ("yes, how much is
+it?") only make sense with the assistant message they answer. They are
+looked up together with that message and scoped to it.
+
+Entries are evicted least-recently-used beyond `max_size` and expire after
+`ttl`. `clear()` invalidates everything when the collection is re-ingested;
+lookups that were in flight during a clear do not repopulate the cache.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+
+# Words that make the caller's text depend on what the assistant just said
+_REFERRING_WORDS = frozenset(
+    "it it's its that that's this those these them they one ones same "
+    "yes yeah yep no nope ok okay sure".split()
+)
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def cache_scope(user_text: str, assistant_text: str, min_words: int = 4) -> str:
+    """Scope of a lookup: "" if the user text stands on its own, else the assistant message.
+
+    Args:
+        user_text: Normalized user text.
+        assistant_text: The assistant message the user text answers.
+        min_words: Shorter user texts are taken to depend on the assistant message.
+
+    Returns:
+        str: "" (shared by all calls) or the normalized assistant message.
+    """
+    words = user_text.split()
+    if len(words) >= min_words and _REFERRING_WORDS.isdisjoint(words):
+        return ""
+    return normalize_query(assistant_text)
+
+
+class _Entry:
+    __slots__ = ("embedding", "result", "expires_at")
+
+    def __init__(self, embedding, result: str, expires_at: float):
+        self.embedding = embedding
+        self.result = result
+        self.expires_at = expires_at
+
+
+class SemanticQueryCache:
+    """LRU/TTL cache of lookup results with an embedding similarity fallback.
+
+    Not thread-safe: use it from the event loop only.
+
+    Args:
+        max_size: Maximum number of cached queries.
+        ttl: Seconds an entry stays valid.
+        similarity: Minimum cosine similarity for a semantic hit.
+        latency_smoothing: Weight of each new sample in the moving averages
+            of lookup latency used to estimate time saved by hits.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 512,
+        ttl: float = 3600.0,
+        similarity: float = 0.95,
+        latency_smoothing: float = 0.1,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity = similarity
+        self._smoothing = latency_smoothing
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        # Scope -> stacked, unit-length embeddings of its entries and their
+        # keys, rebuilt when the scope's entries change
+        self._matrices: Dict[str, Tuple[object, List[Tuple[str, str]]]] = {}
+        self._encode_seconds: Optional[float] = None
+        self._query_seconds: Optional[float] = None
+        # Bumped by clear(), so stale in-flight lookups are not stored
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _record_hit(self, level: str, saved: Optional[float]):
+        metrics.RAG_CACHE_REQUESTS_TOTAL.inc(result=level)
+        if saved:
+            metrics.RAG_CACHE_SAVED_SECONDS_TOTAL.inc(saved, level=level)
+
+    def _remove(self, key: Tuple[str, str]):
+        del self._entries[key]
+        self._matrices.pop(key[0], None)
+
+    def get(self, scope: str, text: str) -> Optional[str]:
+        """Exact lookup by normalized scope and user text."""
+        key = (scope, text)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        saved = (self._encode_seconds or 0.0) + (self._query_seconds or 0.0)
+        self._record_hit("exact", saved)
+        return entry.result
+
+    def get_similar(self, scope: str, embedding) -> Optional[str]:
+        """Nearest-neighbour lookup by user text embedding, within `scope`."""
+        import numpy as np
+
+        if scope not in self._matrices:
+            keys = [key for key in self._entries if key[0] == scope]
+            if not keys:
+                return None
+            self._matrices[scope] = (np.stack([self._entries[k].embedding for k in keys]), keys)
+        matrix, keys = self._matrices[scope]
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        scores = matrix @ (query / norm)
+        now = time.monotonic()
+        for index in np.argsort(scores)[::-1]:
+            if scores[index] < self.similarity:
+                break
+            key = keys[index]
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                continue
+            self._entries.move_to_end(key)
+            self._record_hit("semantic", self._query_seconds)
+            return entry.result
+        return None
+
+    def record_miss(self, encode_seconds: float, query_seconds: float):
+        """Record a lookup that went to Qdrant, to estimate time saved by hits."""
+        metrics.RAG_CACHE_REQUESTS_TOTAL.inc(result="miss")
+        alpha = self._smoothing
+        if self._encode_seconds is None:
+            self._encode_seconds, self._query_seconds = encode_seconds, query_seconds
+        else:
+            self._encode_seconds += alpha * (encode_seconds - self._encode_seconds)
+            self._query_seconds += alpha * (query_seconds - self._query_seconds)
+
+    def put(self, scope: str, text: str, embedding, result: str, generation: int):
+        """Cache `result` unless the cache was cleared since the lookup started.
+
+        Args:
+            scope: Scope from `cache_scope`.
+            text: Normalized user text.
+            embedding: Embedding of the user text.
+            result: Lookup result.
+            generation: `generation` when the lookup started.
+        """
+        if not self.enabled or generation != self.generation:
+            return
+        import numpy as np
+
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return
+        key = (scope, text)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(vector / norm, result, time.monotonic() + self.ttl)
+        self._matrices.pop(scope, None)
+
+        now = time.monotonic()
+        for stale in [k for k, e in self._entries.items() if e.expires_at <= now]:
+            self._remove(stale)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        """Drop all entries, e.g. after the collection is re-ingested."""
+        self._entries.clear()
+        self._matrices.clear()
+        self.generation += 1
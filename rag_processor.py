@@ -0,0 +1,276 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Speculative RAG for the voice pipeline.
+
+Retrieval used to start only once the user stopped speaking, so the embed and
+the Qdrant query sat on the critical path of every turn. Instead, lookups now
+start from interim and final STT transcripts while the user is still talking.
+When the aggregated user turn reaches the LLM, the latest speculative result
+is reused if the final transcript has not materially changed, so RAG usually
+adds no latency after end-of-turn.
+
+Transcripts and the last utterances come from `ConversationState`:
+
+    stt -> state.user_observer -> user_ctx -> state.turn_observer -> rag -> llm
+"""
+
+import asyncio
+import time
+from difflib import SequenceMatcher
+from typing import Awaitable, Callable, Optional, Tuple
+
+from loguru import logger
+from pipecat.frames.frames import CancelFrame, EndFrame
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+import metrics
+from conversation_state import ConversationState
+from rag_cache import normalize_query
+from ragprocessing import rag_lookup
+
+RAG_CONTEXT_MARKER = "Relevant Context (only use if relevant to the conversation):"
+
+
+def _is_rag_message(message) -> bool:
+    content = message.get("content")
+    return (
+        message.get("role") == "system"
+        and isinstance(content, str)
+        and content.startswith(RAG_CONTEXT_MARKER)
+    )
+
+
+def place_rag_context(messages: list, bullets: Optional[str]) -> list:
+    """Put retrieved context in a trailing message, replacing the previous one.
+
+    Providers cache prompts by prefix, so the system prompt, tools and
+    conversation history must stay byte-identical from one turn to the next.
+    Retrieved context therefore lives in its own system message at the end of
+    the context rather than in the system prompt. When `bullets` is empty the
+    previous context is carried over.
+
+    Args:
+        messages: LLM context messages, modified in place.
+        bullets: Retrieved context for this turn, if any.
+
+    Returns:
+        list: `messages`.
+    """
+    previous = None
+    # The previous context message follows the previous user turn, so stop
+    # looking after two user messages rather than scanning the whole history
+    users_seen = 0
+    for i in range(len(messages) - 1, -1, -1):
+        if _is_rag_message(messages[i]):
+            previous = messages.pop(i)
+            break
+        if messages[i].get("role") == "user":
+            users_seen += 1
+            if users_seen == 2:
+                break
+    if bullets:
+        messages.append({"role": "system", "content": f"{RAG_CONTEXT_MARKER}\n{bullets}"})
+    elif previous is not None:
+        messages.append(previous)
+    return messages
+
+
+def same_query(a: str, b: str, similarity: float) -> bool:
+    """Whether two normalized queries are close enough to share a result."""
+    if a == b:
+        return True
+    if not a or not b:
+        return False
+    return SequenceMatcher(None, a, b).ratio() >= similarity
+
+
+class SpeculativeRetriever:
+    """Runs lookups ahead of end-of-turn and keeps the latest result.
+
+    Queries are identified by a scope, which must match exactly (the previous
+    assistant message), and normalized user text, which only has to be
+    similar. At most one lookup runs at a time; updates that arrive meanwhile
+    replace the pending query, so a burst of interim transcripts costs a
+    couple of lookups rather than one per transcript.
+
+    Args:
+        lookup: Coroutine function returning the result for a query and its scope.
+        similarity: Minimum `same_query` similarity for a result to be reused.
+    """
+
+    def __init__(self, lookup: Callable[[str, str], Awaitable[str]], *, similarity: float = 0.85):
+        self._lookup = lookup
+        self._similarity = similarity
+        # (scope, text, query) to look up next
+        self._pending: Optional[Tuple[str, str, str]] = None
+        # (scope, text) being looked up
+        self._running: Optional[Tuple[str, str]] = None
+        # (scope, text, result) of the last completed lookup
+        self._latest: Optional[Tuple[str, str, str]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _covers(self, entry, scope: str, text: str) -> bool:
+        return entry is not None and entry[0] == scope and same_query(entry[1], text, self._similarity)
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._pending is not None:
+            scope, text, query = self._pending
+            self._pending = None
+            if self._covers(self._latest, scope, text):
+                continue
+            running = self._running = (scope, text)
+            try:
+                result = await self._lookup(query, scope)
+            except Exception as e:
+                logger.warning(f"RAG lookup failed: {e}")
+                continue
+            finally:
+                # A cancelled lookup may finish after its replacement has started
+                if self._running is running:
+                    self._running = None
+            self._latest = (scope, text, result)
+
+    def speculate(self, scope: str, text: str, query: str):
+        """Look up `query` in the background unless a result already covers it."""
+        if self._covers(self._latest, scope, text) or self._covers(self._running, scope, text):
+            self._pending = None
+            return
+        self._pending = (scope, text, query)
+        self._ensure_running()
+
+    async def result(self, scope: str, text: str, query: str, timeout: float) -> Tuple[Optional[str], str]:
+        """Return the result for a turn's final query, reusing speculation if possible.
+
+        Args:
+            scope: Exact-match part of the query identity.
+            text: Normalized final user text.
+            query: Query to look up if no speculative result covers `text`.
+            timeout: Maximum seconds to wait for an in-flight or new lookup.
+
+        Returns:
+            Tuple[Optional[str], str]: The result (None if unavailable) and the
+            outcome: "hit", "wait", "miss", "timeout" or "error".
+        """
+        if self._covers(self._latest, scope, text):
+            return self._latest[2], "hit"
+
+        joined = self._covers(self._running, scope, text)
+        if joined:
+            self._pending = None
+        else:
+            # Whatever is in flight was speculated on stale text. The cancelled
+            # task is not done until it next runs, so drop it rather than wait
+            if self._task is not None and not self._task.done():
+                self._task.cancel()
+                self._task = None
+                self._running = None
+            self._pending = (scope, text, query)
+            self._ensure_running()
+
+        # asyncio.wait neither cancels the lookup on timeout nor raises if it was cancelled
+        done, _ = await asyncio.wait({self._task}, timeout=timeout)
+        if not done:
+            return None, "timeout"
+        if self._covers(self._latest, scope, text):
+            return self._latest[2], "wait" if joined else "miss"
+        return None, "error"
+
+    def cancel(self):
+        self._pending = None
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+
+class RagProcessor(FrameProcessor):
+    """Adds retrieved clinic knowledge to the context before each LLM turn.
+
+    The aggregated user turn (the context frame that triggers the LLM) is only
+    held when no speculative result covers the final transcript, and then for
+    at most `timeout` seconds. Place it after `state.turn_observer`.
+
+    Args:
+        context: LLM context shared with the context aggregators.
+        state: Conversation state, which provides the transcripts.
+        lookup: Coroutine function returning context bullets for the user's
+            text and the assistant message it answers.
+        enabled: When False, frames pass through untouched.
+        similarity: Minimum similarity of normalized user text for a
+            speculative result to be reused.
+        timeout: Maximum seconds to hold a turn waiting for retrieval.
+        min_words: Transcripts shorter than this are not looked up speculatively.
+    """
+
+    def __init__(
+        self,
+        context: OpenAILLMContext,
+        state: ConversationState,
+        lookup: Callable[[str, str], Awaitable[str]] = rag_lookup,
+        *,
+        enabled: bool = True,
+        similarity: float = 0.85,
+        timeout: float = 1.0,
+        min_words: int = 2,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._context = context
+        self._state = state
+        self._enabled = enabled
+        self._timeout = timeout
+        self._min_words = min_words
+        self._retriever = SpeculativeRetriever(lookup, similarity=similarity)
+        state.add_user_text_listener(self._speculate)
+
+    def _speculate(self, user_text: str):
+        """Start a speculative lookup for the user's turn so far."""
+        if not self._enabled or len(user_text.split()) < self._min_words:
+            return
+        last_assistant = self._state.last_assistant_text
+        self._retriever.speculate(last_assistant, normalize_query(user_text), user_text)
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if (
+            self._enabled
+            and isinstance(frame, OpenAILLMContextFrame)
+            and direction == FrameDirection.DOWNSTREAM
+        ):
+            await self._update_context()
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            self._retriever.cancel()
+
+        await self.push_frame(frame, direction)
+
+    async def _update_context(self):
+        # The turn observer has already recorded this turn's user text
+        last_user = self._state.last_user_text
+        last_assistant = self._state.last_assistant_text
+        if not last_user:
+            return
+
+        started = time.perf_counter()
+        bullets, outcome = await self._retriever.result(
+            last_assistant, normalize_query(last_user), last_user, self._timeout
+        )
+        metrics.RAG_TURN_WAIT_SECONDS.observe(time.perf_counter() - started)
+        metrics.RAG_LOOKUPS_TOTAL.inc(outcome=outcome)
+        if outcome == "timeout":
+            logger.warning(f"RAG lookup took longer than {self._timeout}s, continuing without it")
+
+        messages = place_rag_context(self._context.get_messages(), bullets)
+        self._context.set_messages(messages)
+        if bullets:
+            logger.debug(f"RAG context updated ({outcome})")
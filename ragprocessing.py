@@ -1,35 +1,113 @@
 import os
+
 # Silence Hugging Face tokenizers fork/parallelism warning in dev reload scenarios
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 
-from sentence_transformers import SentenceTransformer
-from qdrant_client import AsyncQdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-import time
+import asyncio
+import importlib
 import json
+import threading
+import time
+
 from dotenv import load_dotenv
-import asyncio
+
+from rag_cache import SemanticQueryCache, cache_scope, normalize_query
 
 load_dotenv()
 
-model = SentenceTransformer('minishlab/potion-retrieval-32M', device='cpu')
+# sentence-transformers and qdrant-client are slow to import, so they are
+# imported on first use rather than when this module is imported
+
+# Shared embedding model, loaded on first use by get_model()
+_model = None
+_model_lock = threading.Lock()
 
-# Shared RAG state, initialized once at server startup
+# Shared RAG state, initialized once per process and used by all calls
 _collection_name = None
 _qdrant_client = None
+_init_lock = None
+_init_error = None
+_init_failed_at = 0.0
+# Calls holding the shared client (see acquire_rag/release_rag)
+_refs = 0
+_shutdown_requested = False
+
+# After a failed init, fail fast for this long instead of retrying on every call
+RAG_INIT_RETRY_INTERVAL = 30.0
+
+# Process-wide cache of lookup results (RAG_CACHE_SIZE=0 disables it)
+_query_cache = SemanticQueryCache(
+    max_size=int(os.getenv("RAG_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("RAG_CACHE_TTL", "3600")),
+    similarity=float(os.getenv("RAG_CACHE_SIMILARITY", "0.95")),
+)
+
+
+def get_model():
+    """Return the shared embedding model, loading it on first use.
+
+    Loading takes seconds, so call this from a worker thread when on the event loop.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+
+                _model = SentenceTransformer('minishlab/potion-retrieval-32M', device='cpu')
+    return _model
+
+
+def _encode(texts):
+    return get_model().encode(texts)
+
 
 async def init_rag_system(collection_name):
-    """Initialize the global RAG client and ensure the collection exists.
+    """Initialize the shared RAG client and ensure the collection exists.
 
-    This should be called once during server startup.
+    Safe to call from many calls at once: the work is done once per process
+    and later calls for the same collection return immediately.
     """
+    global _init_lock, _init_error, _init_failed_at
+
+    if _qdrant_client is not None and _collection_name == collection_name:
+        return
+    if _init_lock is None:
+        _init_lock = asyncio.Lock()
+    async with _init_lock:
+        if _qdrant_client is not None and _collection_name == collection_name:
+            return
+        if _init_error is not None and time.monotonic() - _init_failed_at < RAG_INIT_RETRY_INTERVAL:
+            raise RuntimeError(f"RAG init failed recently: {_init_error}")
+        try:
+            await _init_rag_system(collection_name)
+        except Exception as e:
+            _init_error = e
+            _init_failed_at = time.monotonic()
+            raise
+        _init_error = None
+
+
+async def _init_rag_system(collection_name):
     global _qdrant_client, _collection_name
 
-    # Create async client
-    _qdrant_client = AsyncQdrantClient(
-        url=os.environ["QDRANT_URL"],
-        api_key=os.environ["QDRANT_API_KEY"],
-    )
+    # Importing qdrant-client takes most of a second; do it off the event loop
+    await asyncio.to_thread(importlib.import_module, "qdrant_client")
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.models import Distance, VectorParams
+
+    # Load the embedding model off the event loop
+    model = await asyncio.to_thread(get_model)
+
+    # One async client (and HTTP connection pool) shared by all calls
+    if _qdrant_client is None:
+        import httpx
+
+        _qdrant_client = AsyncQdrantClient(
+            url=os.environ["QDRANT_URL"],
+            api_key=os.environ["QDRANT_API_KEY"],
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60),
+        )
 
     # Ensure collection exists
     exists = await _qdrant_client.collection_exists(collection_name)
@@ -42,22 +120,50 @@ async def init_rag_system(collection_name):
             ),
         )
 
+    if collection_name != _collection_name:
+        _query_cache.clear()
     _collection_name = collection_name
 
     # Warm up the embedding model to avoid first-request latency
     try:
         # Run in a thread to avoid blocking the event loop
-        await asyncio.to_thread(model.encode, ["warmup", "hello world"])
+        await asyncio.to_thread(_encode, ["warmup", "hello world"])
     except Exception as e:
         print(f"Embedding model warm-up failed: {e}")
 
 
+async def acquire_rag(collection_name):
+    """Take a reference to the shared RAG client for a call, initializing it if needed.
+
+    Every successful call must be matched by release_rag().
+    """
+    global _refs
+    await init_rag_system(collection_name)
+    _refs += 1
+
+
+async def release_rag():
+    """Drop a reference taken by acquire_rag()."""
+    global _refs
+    _refs = max(0, _refs - 1)
+    if _refs == 0 and _shutdown_requested:
+        await _close_rag()
+
+
 async def shutdown_rag():
-    """Clean up RAG resources on server shutdown."""
-    global _qdrant_client
+    """Clean up RAG resources on shutdown, once no call is using them."""
+    global _shutdown_requested
+    _shutdown_requested = True
+    if _refs == 0:
+        await _close_rag()
+
+
+async def _close_rag():
+    global _qdrant_client, _collection_name
+    client, _qdrant_client, _collection_name = _qdrant_client, None, None
     try:
-        if _qdrant_client and hasattr(_qdrant_client, "close"):
-            await _qdrant_client.close()
+        if client and hasattr(client, "close"):
+            await client.close()
     except Exception:
         # Best-effort cleanup; ignore if client doesn't support close
         pass
@@ -69,11 +175,13 @@ async def add_to_qdrant(scenarios):
     """
     if _qdrant_client is None or _collection_name is None:
         raise RuntimeError("RAG not initialized. Call init_rag_system() first.")
+    from qdrant_client.models import PointStruct
+
     points = []
     for index, scenario in enumerate(scenarios):
         json_text = json.dumps(scenario, sort_keys=True, ensure_ascii=False)
         # Offload encoding to a thread to avoid blocking the event loop
-        vector = (await asyncio.to_thread(model.encode, json_text)).tolist()
+        vector = (await asyncio.to_thread(_encode, json_text)).tolist()
         points.append(
             PointStruct(
                 id=index,
@@ -83,14 +191,43 @@ async def add_to_qdrant(scenarios):
         )
     if points:
         await _qdrant_client.upsert(collection_name=_collection_name, points=points)
+        # Cached results may no longer match the collection
+        _query_cache.clear()
+
+async def rag_lookup(user_text, assistant_text=""):
+    """Retrieve top results from the shared RAG collection for the caller's turn.
 
-async def rag_lookup(query):
-    """Retrieve top results from the shared RAG collection for the given query."""
+    Args:
+        user_text: What the caller said.
+        assistant_text: The assistant message the caller is answering; it
+            is part of the query for short or referring replies ("yes, the
+            lower legs"), which are only cached for that message.
+    """
     if _qdrant_client is None or _collection_name is None:
         raise RuntimeError("RAG not initialized. Call init_rag_system() first.")
 
+    # Self-contained questions are cached for all calls, replies for the message they answer
+    key = normalize_query(user_text)
+    scope = cache_scope(key, assistant_text)
+    cached = _query_cache.get(scope, key)
+    if cached is not None:
+        return cached
+    generation = _query_cache.generation
+
     # Offload encoding to a thread to avoid blocking the event loop
-    embedding = await asyncio.to_thread(model.encode, query)
+    started = time.perf_counter()
+    if scope:
+        query = f"Assistant: {assistant_text} User: {user_text}"
+        embedding, user_embedding = await asyncio.to_thread(_encode, [query, user_text])
+    else:
+        # The result must not depend on the assistant message it is shared across
+        embedding = user_embedding = (await asyncio.to_thread(_encode, [user_text]))[0]
+    encoded = time.perf_counter()
+
+    # Close paraphrases of a cached question share its result
+    cached = _query_cache.get_similar(scope, user_embedding)
+    if cached is not None:
+        return cached
 
     results = await _qdrant_client.query_points(
         collection_name=_collection_name,
@@ -98,6 +235,7 @@ async def rag_lookup(query):
         limit=5,
         with_payload=True
     )
+    _query_cache.record_miss(encoded - started, time.perf_counter() - encoded)
     points = results.points if hasattr(results, "points") else results
 
     def _one_line(text):
@@ -116,4 +254,6 @@ async def rag_lookup(query):
         if context or guidelines:
             bullets_lines.append(f"- {context}, {guidelines}")
 
-    return "\n".join(bullets_lines)
\ No newline at end of file
+    bullets = "\n".join(bullets_lines)
+    _query_cache.put(scope, key, user_embedding, bullets, generation)
+    return bullets
\ No newline at end of file
@@ -0,0 +1,148 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Pre-warmed pool of Daily SIP dial-in rooms.
+
+Creating a room and its meeting token costs two Daily REST round trips, which
+the caller hears as extra ringback. The pool keeps a small number of ready
+rooms around so the /call webhook can take one instantly, and refills itself
+in the background. Rooms are retired well before their `exp` so a pooled room
+always has enough lifetime left for a full call.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+
+class SipRoomPool:
+    """Background-maintained pool of ready SIP rooms and tokens.
+
+    Args:
+        create_room: Coroutine factory returning a new room config. The returned
+            object must expose an `expires_at` attribute (unix timestamp).
+        target_size: Number of ready rooms to keep in the pool.
+        expiry_margin: Minimum lifetime (seconds) a room must have left to be
+            handed out, about as long as the longest expected call. Rooms
+            closer to their `exp` are dropped from the pool and replaced, so
+            an idle pool replaces each room every `room_lifetime - expiry_margin`.
+        refill_concurrency: Maximum number of rooms created at the same time.
+        retry_delay: Seconds to wait before refilling again after a failure.
+        prune_interval: Seconds between expiry sweeps while the pool is full.
+        room_lifetime: Seconds a newly created room lives, if known. Used to
+            reject an `expiry_margin` that no new room could satisfy.
+
+    Raises:
+        ValueError: If `expiry_margin` is not less than `room_lifetime`.
+    """
+
+    def __init__(
+        self,
+        create_room: Callable[[], Awaitable],
+        *,
+        target_size: int,
+        expiry_margin: float = 30 * 60,
+        refill_concurrency: int = 2,
+        retry_delay: float = 5.0,
+        prune_interval: float = 30.0,
+        room_lifetime: Optional[float] = None,
+    ):
+        if room_lifetime is not None and expiry_margin >= room_lifetime:
+            raise ValueError(
+                f"SIP room pool expiry margin ({expiry_margin:.0f}s) must be less than "
+                f"the room lifetime ({room_lifetime:.0f}s)"
+            )
+        self._create_room = create_room
+        self.target_size = max(0, target_size)
+        self._expiry_margin = expiry_margin
+        self._refill_concurrency = max(1, refill_concurrency)
+        self._retry_delay = retry_delay
+        self._prune_interval = prune_interval
+
+        self._rooms = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def size(self) -> int:
+        """Number of rooms currently ready in the pool."""
+        return len(self._rooms)
+
+    async def start(self):
+        """Start the background refill task."""
+        if self._task is None and self.target_size > 0:
+            self._task = asyncio.create_task(self._refill_loop())
+            logger.info(f"SIP room pool started (target size {self.target_size})")
+
+    async def stop(self):
+        """Stop refilling and forget any pooled rooms.
+
+        Pooled rooms are created with `eject_at_room_exp`, so Daily cleans them
+        up on expiry; there is no need to delete them here.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._rooms.clear()
+
+    def acquire(self):
+        """Take a ready room from the pool without waiting.
+
+        Returns:
+            A room config, or None if the pool is empty (the caller should then
+            create a room on demand).
+        """
+        self._prune()
+        room = self._rooms.popleft() if self._rooms else None
+        self._wakeup.set()
+        return room
+
+    def _is_usable(self, room) -> bool:
+        return room.expires_at - time.time() > self._expiry_margin
+
+    def _prune(self):
+        expired = [room for room in self._rooms if not self._is_usable(room)]
+        for room in expired:
+            self._rooms.remove(room)
+        if expired:
+            logger.debug(f"Dropped {len(expired)} pooled SIP room(s) close to expiry")
+
+    async def _refill_loop(self):
+        while True:
+            self._prune()
+            missing = self.target_size - len(self._rooms)
+            if missing <= 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._prune_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = min(missing, self._refill_concurrency)
+            results = await asyncio.gather(
+                *(self._create_room() for _ in range(batch)), return_exceptions=True
+            )
+            failed = False
+            for result in results:
+                if isinstance(result, BaseException):
+                    failed = True
+                    logger.warning(f"SIP room pool refill failed: {result}")
+                elif self._is_usable(result):
+                    self._rooms.append(result)
+                else:
+                    # Retrying at once would only create more unusable rooms
+                    failed = True
+                    logger.warning("SIP room pool refill created a room already within the expiry margin")
+            if failed:
+                await asyncio.sleep(self._retry_delay)
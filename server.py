@@ -10,6 +10,14 @@ This server provides two main endpoints:
 - /call: Twilio webhook handler that receives incoming calls
 - /start: Bot starting endpoint for local development (mimics Pipecat Cloud)
 
+Plus /call/status (Twilio status callback), /call/voicemail and
+/call/voicemail/status (overflow voicemail), /status (live call counts),
+/metrics (Prometheus metrics), /health (liveness) and /ready (readiness).
+
+Heavy modules and models are loaded in the background after startup, so the
+server answers requests well before everything is warm; /ready reports when
+warm-up has finished.
+
 The server automatically detects the environment (local vs production) and routes
 bot starting requests accordingly:
 - Local: Uses internal /start endpoint
@@ -19,77 +27,231 @@ All call data (room_url, token, call_id, sip_uri) flows through the body paramet
 to ensure consistency between local and cloud deployments.
 """
 
+import asyncio
+import importlib
 import os
 import time
 import uuid
-from typing import Optional
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, nullcontext
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlencode
 
-import aiohttp
 import uvicorn
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from loguru import logger
-from pipecat.transports.daily.utils import (
-    DailyRESTHelper,
-    DailyRoomParams,
-    DailyRoomProperties,
-    DailyRoomSipParams,
-)
 from twilio.twiml.voice_response import VoiceResponse
-from ragprocessing import init_rag_system, shutdown_rag
+
+import metrics
+from bot_workers import BotWorkerSupervisor
+from call_setup import SetupStage, SetupTrace, run_setup_stages
+from capacity import TERMINAL_CALL_STATUSES, CallCapacityManager, overflow_twiml
+from http_clients import HttpClients, RetryBudget
+from idempotency import CallSetupDeduplicator, InMemoryIdempotencyBackend, RedisIdempotencyBackend
 from model_config import lookup_patient
+from ragprocessing import init_rag_system, shutdown_rag
+from room_pool import SipRoomPool
+
+if TYPE_CHECKING:
+    from pipecat.transports.daily.utils import DailyRESTHelper
 
 # Load environment variables
 load_dotenv()
 
 
-# Initialize FastAPI app with aiohttp session
+async def warm_up(app: FastAPI):
+    """Load heavy modules and models in the background.
+
+    The server accepts requests as soon as the lifespan yields; this fills in
+    `app.state.readiness` as each component becomes available.
+    """
+    readiness = app.state.readiness
+    # Needed by /call and the room pool to create rooms
+    await wait_for_daily(app)
+    readiness["daily"] = "ready"
+
+    # Bots started in this process need the bot module (and pipecat) imported.
+    # The import holds the GIL for seconds, so let the server answer its first
+    # health check before starting it
+    if readiness.get("bot") == "loading":
+        try:
+            await asyncio.wait_for(app.state.serving.wait(), STARTUP_GRACE)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await asyncio.to_thread(importlib.import_module, "bot")
+            readiness["bot"] = "ready"
+        except Exception as e:
+            readiness["bot"] = "failed"
+            logger.error(f"Failed to preload bot module: {e}")
+
+    # Initialize shared RAG resources; RAG is optional
+    try:
+        await init_rag_system(os.getenv("RAG_COLLECTION_NAME", "therapie_clinic_rag"))
+        readiness["rag"] = "ready"
+        logger.info("RAG system initialised")
+    except Exception as e:
+        readiness["rag"] = "disabled"
+        logger.warning(f"RAG disabled (init failed): {e}")
+
+
+# Longest the bot import waits for the first health check
+STARTUP_GRACE = 2.0
+
+
+async def wait_for_daily(app: FastAPI):
+    """Wait for pipecat's Daily helpers, which are imported in a worker thread.
+
+    Importing them takes a while; doing it on the event loop (or waiting on the
+    import lock there) would stall every request until it finishes.
+    """
+    await asyncio.shield(app.state.daily_import)
+
+
+# Initialize FastAPI app with outbound HTTP clients
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create aiohttp session to be used for Daily API calls
-    app.state.session = aiohttp.ClientSession()
-    # Initialize shared RAG resources once at startup
-    await init_rag_system(os.getenv("RAG_COLLECTION_NAME", "therapie_clinic_rag"))
-    logger.info("RAG system initialised")
+    # Outbound HTTP clients, with a separate connection pool per upstream
+    app.state.http = HttpClients(
+        RetryBudget(ratio=float(os.getenv("HTTP_RETRY_BUDGET_RATIO", "0.2")))
+    )
+    await app.state.http.start()
+    # One Daily REST helper for the whole app, created on first use
+    app.state.daily_rest_helper = None
+    app.state.daily_import = asyncio.create_task(
+        asyncio.to_thread(importlib.import_module, "pipecat.transports.daily.utils")
+    )
+    # Keep a pool of ready SIP rooms so /call does not wait on the Daily API
+    app.state.room_pool = None
+    pool_size = int(os.getenv("SIP_ROOM_POOL_SIZE", "0"))
+    if pool_size > 0:
+
+        async def create_pooled_room():
+            await wait_for_daily(app)
+            return await create_sip_room_without_dialout(
+                get_daily_rest_helper(app),
+                sip_caller_phone=POOLED_ROOM_DISPLAY_NAME,
+                room_exp_duration=POOLED_ROOM_EXP_DURATION,
+                token_exp_duration=POOLED_ROOM_EXP_DURATION,
+            )
+
+        app.state.room_pool = SipRoomPool(
+            create_pooled_room,
+            target_size=pool_size,
+            expiry_margin=float(os.getenv("SIP_ROOM_POOL_EXPIRY_MARGIN", str(30 * 60))),
+            room_lifetime=POOLED_ROOM_EXP_DURATION * 60 * 60,
+        )
+        await app.state.room_pool.start()
+    # Admission control: cap concurrent calls, with a short wait queue
+    app.state.capacity = CallCapacityManager(
+        int(os.getenv("MAX_CONCURRENT_CALLS", "0")),
+        max_queue=int(os.getenv("CALL_QUEUE_SIZE", "0")),
+        queue_timeout=float(os.getenv("CALL_QUEUE_TIMEOUT", "3")),
+    )
+    app.state.call_status_seen = False
+    if app.state.capacity.max_calls and os.getenv("ENVIRONMENT", "local") == "production":
+        logger.warning(
+            f"Admission control is on ({app.state.capacity.max_calls} calls): calls only free "
+            "their slot when Twilio posts to /call/status"
+        )
+    # Deduplicate Twilio webhook retries by CallSid, across instances if REDIS_URL is set
+    redis_url = os.getenv("REDIS_URL")
+    app.state.call_dedup = CallSetupDeduplicator(
+        RedisIdempotencyBackend(redis_url) if redis_url else InMemoryIdempotencyBackend(),
+        ttl=float(os.getenv("CALL_IDEMPOTENCY_TTL", "600")),
+    )
+    # In local mode, run bots in worker processes rather than on this event loop
+    # (BOT_WORKERS=0 keeps them in-process; unset sizes the pool to the cores)
+    app.state.bot_workers = None
+    bot_workers = int(os.getenv("BOT_WORKERS") or os.cpu_count() or 1)
+    if os.getenv("ENVIRONMENT", "local") != "production" and bot_workers > 0:
+        app.state.bot_workers = BotWorkerSupervisor(
+            bot_workers, on_call_ended=app.state.capacity.release
+        )
+        await app.state.bot_workers.start()
+    # Load models and heavy modules off the startup path; see /ready
+    app.state.readiness = {"daily": "loading", "rag": "loading"}
+    app.state.serving = asyncio.Event()
+    if os.getenv("ENVIRONMENT", "local") != "production" and not app.state.bot_workers:
+        app.state.readiness["bot"] = "loading"
+    app.state.warmup = asyncio.create_task(warm_up(app))
     yield
-    # Close session when shutting down
-    await app.state.session.close()
+    if not app.state.warmup.done():
+        app.state.warmup.cancel()
+    if app.state.bot_workers:
+        await app.state.bot_workers.stop()
+    if app.state.room_pool:
+        await app.state.room_pool.stop()
+    if isinstance(app.state.call_dedup.backend, RedisIdempotencyBackend):
+        await app.state.call_dedup.backend.close()
+    # Close outbound HTTP clients when shutting down
+    await app.state.http.close()
     # Shutdown RAG resources
     await shutdown_rag()
 
 
 app = FastAPI(lifespan=lifespan)
 
+# SIP display name for pre-warmed rooms, which are created before the caller is known
+POOLED_ROOM_DISPLAY_NAME = "Caller"
+# Hours a new room (and its token) stays valid
+ROOM_EXP_DURATION = 2.0
+# Pooled rooms may wait a while before a call takes them; with the expiry margin
+# (time left for the call) this bounds how often an idle pool replaces its rooms
+POOLED_ROOM_EXP_DURATION = 6.0
+
 
 class SipRoomConfig:
-    def __init__(self, room_url: str, token: str, sip_endpoint: Optional[str] = None):
+    def __init__(
+        self,
+        room_url: str,
+        token: str,
+        sip_endpoint: Optional[str] = None,
+        expires_at: Optional[float] = None,
+    ):
         self.room_url = room_url
         self.token = token
         self.sip_endpoint = sip_endpoint
+        # Earliest of the room and token expiry (unix timestamp)
+        self.expires_at = expires_at
+
+
+def get_daily_rest_helper(app: FastAPI) -> "DailyRESTHelper":
+    """Return the app-wide Daily REST helper, creating it on first use."""
+    helper = app.state.daily_rest_helper
+    if helper is None:
+        from pipecat.transports.daily.utils import DailyRESTHelper
+
+        api_key = os.getenv("DAILY_API_KEY")
+        if not api_key:
+            raise Exception(
+                "DAILY_API_KEY environment variable is required. Get your API key from https://dashboard.daily.co/developers"
+            )
+        helper = DailyRESTHelper(
+            daily_api_key=api_key,
+            daily_api_url=os.getenv("DAILY_API_URL", "https://api.daily.co/v1"),
+            aiohttp_session=app.state.http.daily,
+        )
+        app.state.daily_rest_helper = helper
+    return helper
 
 
 async def create_sip_room_without_dialout(
-    aiohttp_session: aiohttp.ClientSession,
+    daily_rest_helper: "DailyRESTHelper",
     *,
     sip_caller_phone: str,
-    room_exp_duration: float = 2.0,
-    token_exp_duration: float = 2.0,
+    room_exp_duration: float = ROOM_EXP_DURATION,
+    token_exp_duration: float = ROOM_EXP_DURATION,
     sip_enable_video: bool = False,
     sip_num_endpoints: int = 1,
     sip_codecs: Optional[dict] = None,
+    trace: Optional[SetupTrace] = None,
 ) -> SipRoomConfig:
-    api_key = os.getenv("DAILY_API_KEY")
-    if not api_key:
-        raise Exception(
-            "DAILY_API_KEY environment variable is required. Get your API key from https://dashboard.daily.co/developers"
-        )
-
-    daily_rest_helper = DailyRESTHelper(
-        daily_api_key=api_key,
-        daily_api_url=os.getenv("DAILY_API_URL", "https://api.daily.co/v1"),
-        aiohttp_session=aiohttp_session,
+    from pipecat.transports.daily.utils import (
+        DailyRoomParams,
+        DailyRoomProperties,
+        DailyRoomSipParams,
     )
 
     room_name = f"pipecat-sip-{uuid.uuid4().hex[:8]}"
@@ -117,17 +279,237 @@ async def create_sip_room_without_dialout(
 
     room_params = DailyRoomParams(name=room_name, properties=room_properties)
 
-    room_response = await daily_rest_helper.create_room(room_params)
+    with trace.stage("room_create") if trace else nullcontext():
+        room_response = await daily_rest_helper.create_room(room_params)
     room_url = room_response.url
     logger.info(f"Created Daily room: {room_url}")
 
     token_expiry_seconds = token_exp_duration * 60 * 60
-    token = await daily_rest_helper.get_token(room_url, token_expiry_seconds)
+    token_expiration_time = time.time() + token_expiry_seconds
+    with trace.stage("token") if trace else nullcontext():
+        token = await daily_rest_helper.get_token(room_url, token_expiry_seconds)
 
     sip_endpoint = room_response.config.sip_endpoint
     logger.info(f"SIP endpoint: {sip_endpoint}")
 
-    return SipRoomConfig(room_url=room_url, token=token, sip_endpoint=sip_endpoint)
+    return SipRoomConfig(
+        room_url=room_url,
+        token=token,
+        sip_endpoint=sip_endpoint,
+        expires_at=min(expiration_time, token_expiration_time),
+    )
+
+
+async def lookup_caller(caller_phone: str) -> Optional[dict]:
+    """Look up the patient record for the caller's phone number.
+
+    The lookup runs in a worker thread so a slow patient store does not hold
+    up the rest of call setup. Failures are logged and treated as no match.
+    """
+    try:
+        patient = await asyncio.to_thread(lookup_patient, caller_phone)
+        if patient:
+            logger.debug(f"Matched patient by phone: {patient.get('patient_id')} - {patient.get('name')}")
+        else:
+            logger.debug("No patient match found for caller phone")
+        return patient
+    except Exception as e:
+        logger.warning(f"Patient lookup failed: {e}")
+        return None
+
+
+async def acquire_sip_room(app: FastAPI, caller_phone: str, trace: SetupTrace) -> SipRoomConfig:
+    """Take a pre-warmed SIP room, or create one if the pool is empty.
+
+    Raises:
+        HTTPException: If the room cannot be created or has no SIP endpoint.
+    """
+    # Take a pre-warmed room if one is ready, otherwise create a Daily room
+    # with SIP capabilities, without dial-out enabled
+    try:
+        room_pool = app.state.room_pool
+        sip_config = room_pool.acquire() if room_pool else None
+        if room_pool:
+            metrics.ROOM_POOL_REQUESTS_TOTAL.inc(result="hit" if sip_config else "miss")
+        if sip_config:
+            logger.debug(f"Using pre-warmed Daily room: {sip_config.room_url}")
+        else:
+            await wait_for_daily(app)
+            sip_config = await create_sip_room_without_dialout(
+                get_daily_rest_helper(app), sip_caller_phone=caller_phone, trace=trace
+            )
+    except Exception as e:
+        logger.error(f"Error creating Daily room: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to create Daily room: {str(e)}")
+
+    # Make sure we have a SIP endpoint
+    if not sip_config.sip_endpoint:
+        raise HTTPException(status_code=500, detail="No SIP endpoint provided by Daily")
+
+    return sip_config
+
+
+async def start_bot(http: HttpClients, call_sid: str, body_data: dict):
+    """Start the bot, either locally or via Pipecat Cloud.
+
+    Raises:
+        HTTPException: If the bot could not be started.
+    """
+    try:
+        # Check environment mode (local development vs production)
+        environment = os.getenv("ENVIRONMENT", "local")  # "local" or "production"
+
+        if environment == "production":
+            # Production: Call Pipecat Cloud API to start the bot
+            pipecat_api_token = os.getenv("PIPECAT_API_TOKEN")
+            agent_name = os.getenv("PIPECAT_AGENT_NAME")
+            pipecat_api_url = os.getenv("PIPECAT_API_URL", "https://api.pipecat.daily.co/v1")
+
+            if not pipecat_api_token:
+                raise HTTPException(
+                    status_code=500, detail="PIPECAT_API_TOKEN required for production mode"
+                )
+
+            logger.debug(f"Starting bot via Pipecat Cloud for call {call_sid}")
+            async with http.pipecat.post(
+                f"{pipecat_api_url}/public/{agent_name}/start",
+                headers={
+                    "Authorization": f"Bearer {pipecat_api_token}",
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "createDailyRoom": False,  # We already created the room
+                    "body": body_data,
+                },
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Failed to start bot via Pipecat Cloud: {error_text}",
+                    )
+                cloud_data = await response.json()
+                logger.debug(f"Bot started successfully via Pipecat Cloud")
+        else:
+            # Local development: Call internal /start endpoint to start the bot
+            local_server_url = os.getenv("LOCAL_SERVER_URL", "http://localhost:7860")
+
+            logger.debug(f"Starting bot via local /start endpoint for call {call_sid}")
+            async with http.local.post(
+                f"{local_server_url}/start",
+                headers={"Content-Type": "application/json"},
+                json={
+                    "createDailyRoom": False,  # We already created the room
+                    "body": body_data,
+                },
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Failed to start bot via local /start endpoint: {error_text}",
+                    )
+                local_data = await response.json()
+                logger.debug(f"Bot started successfully via local /start endpoint")
+
+    except Exception as e:
+        logger.error(f"Error starting bot: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to start bot: {str(e)}")
+
+
+def record_setup_metrics(trace: SetupTrace):
+    """Export a finished call setup trace as Prometheus metrics."""
+    for stage, (_, duration_ms) in trace.stages.items():
+        metrics.CALL_SETUP_STAGE_SECONDS.observe(duration_ms / 1000, stage=stage)
+    for stage in trace.errors:
+        metrics.CALL_ERRORS_TOTAL.inc(stage=stage)
+    metrics.CALL_SETUP_SECONDS.observe(trace.elapsed_ms / 1000)
+
+
+async def setup_call(
+    app: FastAPI,
+    call_sid: str,
+    caller_phone: str,
+    *,
+    overflow_attempt: int,
+    received_at: float,
+) -> str:
+    """Admit the call, set it up and return the TwiML for Twilio.
+
+    Raises:
+        HTTPException: If any setup stage fails.
+    """
+    # Over capacity: hold and retry, or take a voicemail, rather than
+    # starting a bot that would degrade every live call
+    capacity = app.state.capacity
+    if not await capacity.admit(call_sid):
+        metrics.CALLS_TOTAL.inc(outcome="rejected")
+        if os.getenv("ENVIRONMENT", "local") == "production" and not app.state.call_status_seen:
+            # Cloud bots only free their slot through /call/status (or after max_call_duration)
+            logger.warning(
+                "Rejecting a call over capacity, but no call status callback has been received: "
+                "point the number's \"Call status changes\" webhook at /call/status"
+            )
+        return overflow_twiml(
+            overflow_attempt,
+            mode=os.getenv("OVERFLOW_MODE", "retry"),
+            max_retries=int(os.getenv("OVERFLOW_MAX_RETRIES", "3")),
+            hold_music_url=os.getenv("OVERFLOW_HOLD_MUSIC_URL"),
+            # Recording status callbacks don't include the caller's number
+            voicemail_status_url=f"/call/voicemail/status?{urlencode({'caller': caller_phone})}",
+        )
+    metrics.CALLS_TOTAL.inc(outcome="admitted")
+
+    trace = SetupTrace(call_sid)
+
+    async def lookup():
+        return await lookup_caller(caller_phone)
+
+    async def room():
+        return await acquire_sip_room(app, caller_phone, trace)
+
+    async def bot_start(lookup: Optional[dict], room: SipRoomConfig):
+        # Prepare body data with all necessary information
+        # This data structure is consistent between local and cloud deployments
+        body_data = {
+            "room_url": room.room_url,
+            "token": room.token,
+            "call_id": call_sid,
+            "sip_uri": room.sip_endpoint,
+            "caller_phone": caller_phone,
+            "patient": lookup,
+            "call_received_at": received_at,
+        }
+        await start_bot(app.state.http, call_sid, body_data)
+
+    # Patient lookup and room creation are independent, so they run concurrently
+    try:
+        await run_setup_stages(
+            [
+                SetupStage("lookup", lookup),
+                SetupStage("room", room),
+                SetupStage("bot_start", bot_start, depends_on=("lookup", "room")),
+            ],
+            trace,
+        )
+    except BaseException:
+        capacity.release(call_sid)
+        raise
+    finally:
+        logger.info(f"Call setup trace for {call_sid}: {trace.summary()}")
+        record_setup_metrics(trace)
+
+    # Generate TwiML response to put the caller on hold with music
+    # The caller hears this while the bot connects to the Daily room
+    # You can replace the URL with your own music file or use Twilio's built-in music
+    # See: https://www.twilio.com/docs/voice/twiml/play#music-on-hold
+    resp = VoiceResponse()
+    resp.play(
+        url="https://therapeutic-crayon-2467.twil.io/assets/US_ringback_tone.mp3",
+        loop=10,
+    )
+
+    return str(resp)
 
 
 @app.post("/call", response_class=PlainTextResponse)
@@ -136,14 +518,19 @@ async def handle_call(request: Request):
 
     This endpoint:
     1. Receives Twilio webhook data for incoming calls
-    2. Creates a Daily room with SIP capabilities
+    2. Looks up the caller and gets a Daily room with SIP capabilities, concurrently
     3. Starts the bot (locally or via Pipecat Cloud based on ENVIRONMENT)
     4. Returns TwiML to put caller on hold while bot connects
 
+    Twilio retries of the same webhook (same CallSid) reuse the in-flight or
+    completed setup and get the same TwiML.
+
     Returns:
         TwiML response with hold music for the caller
     """
     logger.debug("Received call webhook from Twilio")
+    # Start of ring-to-greeting, measured by the bot
+    received_at = time.time()
 
     try:
         # Get form data from Twilio webhook
@@ -159,118 +546,23 @@ async def handle_call(request: Request):
         caller_phone = str(data.get("From", "unknown-caller"))
         logger.debug(f"Processing call with ID: {call_sid} from {caller_phone}")
 
-        # Attempt to look up the patient by phone number right away
-        try:
-            patient = lookup_patient(caller_phone)
-            if patient:
-                logger.debug(f"Matched patient by phone: {patient.get('patient_id')} - {patient.get('name')}")
-            else:
-                logger.debug("No patient match found for caller phone")
-        except Exception as e:
-            logger.warning(f"Patient lookup failed: {e}")
-            patient = None
-
-        # Create a Daily room with SIP capabilities, without dial-out enabled
+        # Overflow redirects come back with the same CallSid, so each
+        # attempt is deduplicated separately
         try:
-            sip_config = await create_sip_room_without_dialout(
-                request.app.state.session, sip_caller_phone=caller_phone
+            overflow_attempt = max(0, int(request.query_params.get("overflow_attempt", "0")))
+        except ValueError:
+            overflow_attempt = 0
+
+        async def setup():
+            return await setup_call(
+                request.app,
+                call_sid,
+                caller_phone,
+                overflow_attempt=overflow_attempt,
+                received_at=received_at,
             )
-        except Exception as e:
-            logger.error(f"Error creating Daily room: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to create Daily room: {str(e)}")
-
-        # Extract necessary details
-        room_url = sip_config.room_url
-        token = sip_config.token
-        sip_endpoint = sip_config.sip_endpoint
-
-        # Make sure we have a SIP endpoint
-        if not sip_endpoint:
-            raise HTTPException(status_code=500, detail="No SIP endpoint provided by Daily")
 
-        # Start the bot - either locally or via Pipecat Cloud
-        try:
-            # Check environment mode (local development vs production)
-            environment = os.getenv("ENVIRONMENT", "local")  # "local" or "production"
-
-            # Prepare body data with all necessary information
-            # This data structure is consistent between local and cloud deployments
-            body_data = {
-                "room_url": room_url,
-                "token": token,
-                "call_id": call_sid,
-                "sip_uri": sip_endpoint,
-                "caller_phone": caller_phone,
-                "patient": patient,
-            }
-
-            if environment == "production":
-                # Production: Call Pipecat Cloud API to start the bot
-                pipecat_api_token = os.getenv("PIPECAT_API_TOKEN")
-                agent_name = os.getenv("PIPECAT_AGENT_NAME")
-
-                if not pipecat_api_token:
-                    raise HTTPException(
-                        status_code=500, detail="PIPECAT_API_TOKEN required for production mode"
-                    )
-
-                logger.debug(f"Starting bot via Pipecat Cloud for call {call_sid}")
-                async with request.app.state.session.post(
-                    f"https://api.pipecat.daily.co/v1/public/{agent_name}/start",
-                    headers={
-                        "Authorization": f"Bearer {pipecat_api_token}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "createDailyRoom": False,  # We already created the room
-                        "body": body_data,
-                    },
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise HTTPException(
-                            status_code=500,
-                            detail=f"Failed to start bot via Pipecat Cloud: {error_text}",
-                        )
-                    cloud_data = await response.json()
-                    logger.debug(f"Bot started successfully via Pipecat Cloud")
-            else:
-                # Local development: Call internal /start endpoint to start the bot
-                local_server_url = os.getenv("LOCAL_SERVER_URL", "http://localhost:7860")
-
-                logger.debug(f"Starting bot via local /start endpoint for call {call_sid}")
-                async with request.app.state.session.post(
-                    f"{local_server_url}/start",
-                    headers={"Content-Type": "application/json"},
-                    json={
-                        "createDailyRoom": False,  # We already created the room
-                        "body": body_data,
-                    },
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise HTTPException(
-                            status_code=500,
-                            detail=f"Failed to start bot via local /start endpoint: {error_text}",
-                        )
-                    local_data = await response.json()
-                    logger.debug(f"Bot started successfully via local /start endpoint")
-
-        except Exception as e:
-            logger.error(f"Error starting bot: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to start bot: {str(e)}")
-
-        # Generate TwiML response to put the caller on hold with music
-        # The caller hears this while the bot connects to the Daily room
-        # You can replace the URL with your own music file or use Twilio's built-in music
-        # See: https://www.twilio.com/docs/voice/twiml/play#music-on-hold
-        resp = VoiceResponse()
-        resp.play(
-            url="https://therapeutic-crayon-2467.twil.io/assets/US_ringback_tone.mp3",
-            loop=10,
-        )
-
-        return str(resp)
+        return await request.app.state.call_dedup.run(f"{call_sid}:{overflow_attempt}", setup)
 
     except HTTPException:
         raise
@@ -309,6 +601,15 @@ async def start_bot_endpoint(request: Request):
                 detail="Missing required parameters in body: room_url, token, call_id, sip_uri",
             )
 
+        # Place the call on the least-loaded bot worker process if we have them
+        bot_workers = request.app.state.bot_workers
+        if bot_workers:
+            worker_id = await bot_workers.start_call(call_id, body)
+            return {"status": "Bot started successfully", "call_id": call_id, "worker_id": worker_id}
+
+        # Normally preloaded by warm_up(); import off the event loop if not
+        await asyncio.to_thread(importlib.import_module, "bot")
+
         from pipecat.runner.types import DailyRunnerArguments
 
         from bot import bot as bot_function
@@ -322,10 +623,9 @@ async def start_bot_endpoint(request: Request):
         )
         runner_args.handle_sigint = False
 
-        # Start the bot in the background
-        import asyncio
-
-        asyncio.create_task(bot_function(runner_args))
+        # Start the bot in the background, on this process's event loop
+        task = asyncio.create_task(bot_function(runner_args))
+        task.add_done_callback(lambda _: request.app.state.capacity.release(call_id))
 
         return {"status": "Bot started successfully", "call_id": call_id}
 
@@ -334,16 +634,184 @@ async def start_bot_endpoint(request: Request):
         raise HTTPException(status_code=500, detail=f"Failed to start bot: {str(e)}")
 
 
+@app.post("/call/status")
+async def handle_call_status(request: Request):
+    """Twilio call status callback.
+
+    Configure this URL as the number's "Call status changes" webhook so that
+    calls release their capacity slot as soon as Twilio reports them finished,
+    including calls whose bot runs on Pipecat Cloud.
+
+    Returns:
+        dict: The call ID and reported status
+    """
+    form_data = await request.form()
+    call_sid = form_data.get("CallSid")
+    call_status = form_data.get("CallStatus")
+    logger.debug(f"Call status for {call_sid}: {call_status}")
+    request.app.state.call_status_seen = True
+    if call_sid and call_status in TERMINAL_CALL_STATUSES:
+        request.app.state.capacity.release(call_sid)
+    return {"call_id": call_sid, "status": call_status}
+
+
+@app.post("/call/voicemail", response_class=PlainTextResponse)
+async def handle_voicemail(request: Request):
+    """Twilio `<Record>` action for overflow voicemail.
+
+    Called once the caller has left a message. The recording itself is
+    handled by /call/voicemail/status when Twilio has stored it.
+
+    Returns:
+        TwiML thanking the caller and hanging up
+    """
+    form_data = await request.form()
+    logger.info(
+        f"Voicemail left on call {form_data.get('CallSid')} "
+        f"({form_data.get('RecordingDuration', '?')}s)"
+    )
+    resp = VoiceResponse()
+    resp.say("Thank you, we'll call you back as soon as we can. Goodbye.")
+    resp.hangup()
+    return str(resp)
+
+
+async def forward_voicemail(http: HttpClients, url: str, voicemail: dict):
+    """Post a voicemail's details to the clinic's webhook."""
+    async with http.webhook.post(url, json=voicemail) as response:
+        response.raise_for_status()
+
+
+@app.post("/call/voicemail/status")
+async def handle_voicemail_status(request: Request):
+    """Twilio recording status callback for overflow voicemail.
+
+    Completed recordings are logged and, if VOICEMAIL_WEBHOOK_URL is set,
+    forwarded there as JSON so someone calls the patient back. Recordings
+    stay in the Twilio account; only their URL is passed on.
+
+    Returns:
+        dict: The recording ID and how it was handled
+    """
+    form_data = await request.form()
+    recording_sid = form_data.get("RecordingSid")
+    if form_data.get("RecordingStatus") != "completed":
+        logger.warning(f"Voicemail recording {recording_sid}: {form_data.get('RecordingStatus')}")
+        metrics.VOICEMAILS_TOTAL.inc(result="failed")
+        return {"recording_sid": recording_sid, "result": "failed"}
+
+    voicemail = {
+        "call_id": form_data.get("CallSid"),
+        "caller_phone": request.query_params.get("caller"),
+        "recording_sid": recording_sid,
+        "recording_url": form_data.get("RecordingUrl"),
+        "duration": int(form_data.get("RecordingDuration") or 0),
+    }
+    logger.info(f"Voicemail from {voicemail['caller_phone']}: {voicemail['recording_url']}")
+    result = "logged"
+    webhook_url = os.getenv("VOICEMAIL_WEBHOOK_URL")
+    if webhook_url:
+        try:
+            await forward_voicemail(request.app.state.http, webhook_url, voicemail)
+            result = "forwarded"
+        except Exception as e:
+            # Still in the Twilio account, and logged above
+            logger.error(f"Failed to forward voicemail {recording_sid}: {e}")
+            result = "failed"
+    metrics.VOICEMAILS_TOTAL.inc(result=result)
+    return {"recording_sid": recording_sid, "result": result}
+
+
+@app.get("/status")
+async def status(request: Request):
+    """Live call counts and capacity.
+
+    Returns:
+        dict: Capacity counters, bot worker status and pooled room count
+    """
+    bot_workers = request.app.state.bot_workers
+    room_pool = request.app.state.room_pool
+    return {
+        **request.app.state.capacity.snapshot(),
+        "bot_workers": bot_workers.snapshot() if bot_workers else None,
+        "pooled_rooms": room_pool.size if room_pool else None,
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics(request: Request):
+    """Prometheus metrics for call setup and live calls.
+
+    Includes metrics reported by bots running in this process or on its bot
+    worker processes.
+
+    Returns:
+        Metrics in the Prometheus text exposition format
+    """
+    capacity = request.app.state.capacity
+    metrics.ACTIVE_CALLS.set(capacity.active)
+    metrics.QUEUED_CALLS.set(capacity.queued)
+    room_pool = request.app.state.room_pool
+    if room_pool:
+        metrics.POOLED_ROOMS.set(room_pool.size)
+    bot_workers = request.app.state.bot_workers
+    if bot_workers:
+        metrics.BOT_WORKER_ACTIVE_CALLS.clear()
+        for worker in bot_workers.snapshot():
+            metrics.BOT_WORKER_ACTIVE_CALLS.set(worker["active_calls"], worker=worker["worker_id"])
+    return Response(
+        content=metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/health")
-async def health_check():
-    """Health check endpoint.
+async def health_check(request: Request):
+    """Health check endpoint (liveness).
 
     Returns:
         dict: Status indicating server health
     """
+    request.app.state.serving.set()
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check(request: Request):
+    """Readiness endpoint.
+
+    Reports whether background warm-up (modules, models, bot workers) has
+    finished. RAG being disabled does not make the server unready. Bot worker
+    slots that crashed too often to be restarted are listed as failed; the
+    server stays ready while any worker can take calls.
+
+    Returns:
+        Component states, with status 200 when ready and 503 otherwise
+    """
+    request.app.state.serving.set()
+    components = dict(request.app.state.readiness)
+    failed_workers = []
+    bot_workers = request.app.state.bot_workers
+    if bot_workers:
+        workers = bot_workers.snapshot()
+        ready_workers = sum(1 for w in workers if w["ready"] and w["alive"])
+        failed_workers = [w["worker_id"] for w in workers if w["failed"]]
+        if ready_workers:
+            components["bot_workers"] = "ready"
+        elif len(failed_workers) == len(workers):
+            components["bot_workers"] = "failed"
+        else:
+            components["bot_workers"] = "loading"
+    ready = all(state in ("ready", "disabled") for state in components.values())
+    return JSONResponse(
+        {
+            "status": "ready" if ready else "failed" if "failed" in components.values() else "starting",
+            "components": components,
+            "failed_bot_workers": failed_workers,
+        },
+        status_code=200 if ready else 503,
+    )
+
+
 if __name__ == "__main__":
     # Run the server
     port = int(os.getenv("PORT", "7860"))
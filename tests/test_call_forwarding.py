@@ -0,0 +1,143 @@
+import asyncio
+import base64
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import call_forwarding
+from call_forwarding import CALL_NOT_IN_PROGRESS, ForwardError, TwilioCallForwarder
+
+TWIML = "<Response><Dial><Sip>sip:bot@example.sip.daily.co</Sip></Dial></Response>"
+
+
+class StubTwilio:
+    """Local stand-in for the Twilio Calls API, answering from a list of responses."""
+
+    def __init__(self, responses, delay: float = 0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.requests = []
+
+    async def update_call(self, request):
+        form = await request.post()
+        match = request.match_info
+        self.requests.append(
+            (match["account"], match["call"], form.get("Twiml"), request.headers.get("Authorization"))
+        )
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        status, code = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if status < 400:
+            return web.json_response({"sid": request.match_info["call"]}, status=status)
+        return web.json_response({"code": code, "message": f"error {code}"}, status=status)
+
+
+def _serve(stub: StubTwilio, scenario):
+    """Run `scenario(api_url)` against the stub Twilio API."""
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/2010-04-01/Accounts/{account}/Calls/{call}.json", stub.update_call)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        port = runner.addresses[0][1]
+        try:
+            await scenario(f"http://127.0.0.1:{port}")
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """Record the jitter ranges drawn by the forwarder, and keep the waits short."""
+    ranges = []
+
+    def uniform(low, high):
+        ranges.append((low, high))
+        return high / 10
+
+    monkeypatch.setattr(call_forwarding.random, "uniform", uniform)
+    return ranges
+
+
+def _forwarder(api_url, **kwargs):
+    return TwilioCallForwarder("AC123", "secret", api_url=api_url, **kwargs)
+
+
+def test_not_in_progress_is_retried_with_jittered_backoff(backoffs):
+    stub = StubTwilio([(400, CALL_NOT_IN_PROGRESS)] * 3 + [(200, None)])
+
+    async def scenario(api_url):
+        forwarder = _forwarder(api_url, backoff_base=0.01, backoff_cap=0.03)
+        try:
+            result = await forwarder.forward("CA1", TWIML)
+        finally:
+            await forwarder.close()
+        assert result.attempts == 4
+
+    _serve(stub, scenario)
+    assert len(stub.requests) == 4
+    account, call, twiml, auth = stub.requests[0]
+    assert (account, call, twiml) == ("AC123", "CA1", TWIML)
+    assert auth == "Basic " + base64.b64encode(b"AC123:secret").decode()
+    # Full jitter over an exponentially growing, capped range
+    assert backoffs == [(0, 0.01), (0, 0.02), (0, 0.03)]
+
+
+def test_gives_up_at_the_deadline(backoffs):
+    stub = StubTwilio([(400, CALL_NOT_IN_PROGRESS)])
+
+    async def scenario(api_url):
+        forwarder = _forwarder(api_url, deadline=0.3, backoff_base=0.5, backoff_cap=0.5)
+        try:
+            with pytest.raises(ForwardError) as error:
+                await forwarder.forward("CA1", TWIML)
+        finally:
+            await forwarder.close()
+        assert error.value.code == CALL_NOT_IN_PROGRESS
+        assert error.value.attempts == len(stub.requests)
+
+    _serve(stub, scenario)
+    # Waits of 0.05s each: the next one would overrun the 0.3s deadline
+    assert 2 <= len(stub.requests) <= 7
+
+
+def test_non_retryable_error_is_returned_immediately(backoffs):
+    stub = StubTwilio([(404, 20404), (200, None)])
+
+    async def scenario(api_url):
+        forwarder = _forwarder(api_url)
+        try:
+            with pytest.raises(ForwardError) as error:
+                await forwarder.forward("CA1", TWIML)
+        finally:
+            await forwarder.close()
+        assert error.value.code == 20404
+        assert error.value.attempts == 1
+
+    _serve(stub, scenario)
+    assert len(stub.requests) == 1
+    assert backoffs == []
+
+
+def test_timed_out_update_is_not_retried(backoffs):
+    stub = StubTwilio([(200, None)], delay=0.5)
+
+    async def scenario(api_url):
+        forwarder = _forwarder(api_url, timeout=aiohttp.ClientTimeout(total=0.1))
+        try:
+            with pytest.raises(ForwardError) as error:
+                await forwarder.forward("CA1", TWIML)
+        finally:
+            await forwarder.close()
+        assert error.value.attempts == 1
+        # Twilio may still apply the first update; a second one must not follow
+        await asyncio.sleep(0.2)
+
+    _serve(stub, scenario)
+    assert len(stub.requests) == 1
+    assert backoffs == []
@@ -0,0 +1,113 @@
+import asyncio
+
+from capacity import CallCapacityManager, overflow_twiml
+
+
+def test_admits_up_to_limit_then_overflows():
+    async def scenario():
+        capacity = CallCapacityManager(2)
+        assert await capacity.admit("CA1")
+        assert await capacity.admit("CA2")
+        assert not await capacity.admit("CA3")
+        assert capacity.active == 2
+        assert capacity.rejected_total == 1
+
+    asyncio.run(scenario())
+
+
+def test_retried_webhook_does_not_take_another_slot():
+    async def scenario():
+        capacity = CallCapacityManager(1)
+        assert await capacity.admit("CA1")
+        assert await capacity.admit("CA1")
+        assert capacity.active == 1
+        assert capacity.admitted_total == 1
+
+    asyncio.run(scenario())
+
+
+def test_release_hands_slot_to_waiters_in_order():
+    async def scenario():
+        capacity = CallCapacityManager(1, max_queue=2, queue_timeout=1.0)
+        assert await capacity.admit("CA1")
+        second = asyncio.create_task(capacity.admit("CA2"))
+        third = asyncio.create_task(capacity.admit("CA3"))
+        await asyncio.sleep(0)
+        assert capacity.queued == 2
+
+        capacity.release("CA1")
+        assert await second
+        assert not third.done()
+        assert capacity.queued == 1
+
+        capacity.release("CA2")
+        assert await third
+        assert capacity.active == 1
+        assert capacity.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiter_times_out():
+    async def scenario():
+        capacity = CallCapacityManager(1, max_queue=1, queue_timeout=0.01)
+        assert await capacity.admit("CA1")
+        assert not await capacity.admit("CA2")
+        assert capacity.queued == 0
+        assert capacity.rejected_total == 1
+
+    asyncio.run(scenario())
+
+
+def test_new_caller_does_not_jump_the_queue():
+    async def scenario():
+        capacity = CallCapacityManager(1, max_queue=1, queue_timeout=1.0)
+        assert await capacity.admit("CA1")
+        waiting = asyncio.create_task(capacity.admit("CA2"))
+        await asyncio.sleep(0)
+        capacity.release("CA1")
+        # The slot went to the waiter, so a new caller finds the queue full
+        assert not await capacity.admit("CA3")
+        assert await waiting
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        capacity = CallCapacityManager(1, max_queue=1, queue_timeout=1.0)
+        assert await capacity.admit("CA1")
+        waiting = asyncio.create_task(capacity.admit("CA2"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert capacity.queued == 0
+
+        capacity.release("CA1")
+        assert capacity.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_stale_calls_are_released():
+    async def scenario():
+        capacity = CallCapacityManager(1, max_call_duration=0.01)
+        assert await capacity.admit("CA1")
+        await asyncio.sleep(0.02)
+        # CA1's end was never reported, so its slot is reclaimed
+        assert await capacity.admit("CA2")
+        assert capacity.active == 1
+
+    asyncio.run(scenario())
+
+
+def test_overflow_twiml_retries_then_takes_a_message():
+    first = overflow_twiml(0, max_retries=2)
+    assert "please hold" in first
+    assert "/call?overflow_attempt=1" in first
+
+    last = overflow_twiml(2, max_retries=2)
+    assert "<Record" in last
+    assert "<Redirect" not in last
+
+    assert "<Record" in overflow_twiml(0, mode="voicemail")
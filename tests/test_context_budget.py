@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+
+from context_budget import KEY_RESULTS_MARKER, SUMMARY_MARKER, ContextBudget, estimate_tokens
+
+SYSTEM = {"role": "system", "content": "You are the clinic receptionist."}
+
+
+def _turn(i: int, words: int = 50) -> list:
+    return [
+        {"role": "user", "content": f"question {i} " + "word " * words},
+        {"role": "assistant", "content": f"answer {i} " + "word " * words},
+    ]
+
+
+def _tool_turn(i: int, name: str, result) -> list:
+    call_id = f"call_{i}"
+    return [
+        {"role": "user", "content": f"please check {i}"},
+        {
+            "role": "assistant",
+            "tool_calls": [
+                {"id": call_id, "type": "function", "function": {"name": name, "arguments": "{}"}}
+            ],
+        },
+        {"role": "tool", "tool_call_id": call_id, "content": json.dumps(result)},
+        {"role": "assistant", "content": f"done {i}"},
+    ]
+
+
+def _budget(messages, summarize=None, **kwargs):
+    context = OpenAILLMContext(messages)
+    return context, ContextBudget(context, summarize, **kwargs)
+
+
+def test_estimate_tokens_counts_text_and_tool_calls():
+    assert estimate_tokens({"role": "user", "content": "x" * 40}) == 14
+    call = {"function": {"name": "book", "arguments": "x" * 36}}
+    assert estimate_tokens({"role": "assistant", "tool_calls": [call]}) == 14
+
+
+def test_keeps_recent_turns_and_summarizes_the_rest():
+    messages = [SYSTEM] + [m for i in range(6) for m in _turn(i)]
+    prompts = []
+
+    async def summarize(prompt):
+        prompts.append(prompt)
+        return "Caller asked about prices."
+
+    context, budget = _budget(messages, summarize, keep_turns=2, target_tokens=10_000)
+    asyncio.run(budget._compact())
+
+    result = context.get_messages()
+    assert result[0] is SYSTEM
+    assert result[1] == {"role": "system", "content": f"{SUMMARY_MARKER}\nCaller asked about prices."}
+    assert [m["content"].split()[:2] for m in result[2:]] == [
+        ["question", "4"],
+        ["answer", "4"],
+        ["question", "5"],
+        ["answer", "5"],
+    ]
+    assert "question 0" in prompts[0] and "question 4" not in prompts[0]
+
+
+def test_target_tokens_limits_the_turns_kept():
+    messages = [SYSTEM] + [m for i in range(4) for m in _turn(i, words=200)]
+    context, budget = _budget(messages, keep_turns=10, target_tokens=300)
+    asyncio.run(budget._compact())
+
+    result = context.get_messages()
+    # Only the latest turn fits; it is always kept
+    assert result[2]["content"].startswith("question 3")
+    assert len(result) == 4
+
+
+def test_falls_back_to_transcript_when_summary_fails():
+    messages = [SYSTEM] + [m for i in range(3) for m in _turn(i, words=2)]
+
+    async def summarize(prompt):
+        raise RuntimeError("LLM unavailable")
+
+    context, budget = _budget(messages, summarize, keep_turns=1)
+    asyncio.run(budget._compact())
+
+    summary = context.get_messages()[1]["content"]
+    assert summary.startswith(SUMMARY_MARKER)
+    assert "User: question 0" in summary and "Assistant: answer 1" in summary
+
+
+def test_key_tool_results_are_carried_over_verbatim():
+    patient = {"patient_id": "P-17", "name": "Sarah Murphy"}
+    messages = [SYSTEM] + _tool_turn(0, "lookup_patient", patient) + _turn(1) + _turn(2)
+
+    async def summarize(prompt):
+        return "Summary."
+
+    context, budget = _budget(messages, summarize, keep_turns=1, key_tools={"lookup_patient"})
+    asyncio.run(budget._compact())
+    summary = context.get_messages()[1]["content"]
+    assert f"{KEY_RESULTS_MARKER}\n- lookup_patient({{}}) -> {json.dumps(patient)}" in summary
+
+    # Compacting again folds in the old summary and keeps one copy of the key result
+    context.get_messages().extend(_turn(3))
+    asyncio.run(budget._compact())
+    result = context.get_messages()
+    assert len(result) == 4
+    assert "question 2" not in json.dumps(result)
+    assert result[1]["content"].count("P-17") == 1
+
+
+def test_tool_calls_in_progress_are_not_compacted():
+    running = _tool_turn(1, "check_availability", "IN_PROGRESS")
+    running[2]["content"] = "IN_PROGRESS"
+    messages = [SYSTEM] + _turn(0) + running + _turn(2)
+
+    context, budget = _budget(messages, keep_turns=1)
+    asyncio.run(budget._compact())
+
+    result = context.get_messages()
+    assert any(m.get("content") == "IN_PROGRESS" for m in result)
+    assert "question 0" in result[1]["content"]
+
+
+def test_stale_compaction_is_discarded():
+    messages = [SYSTEM] + [m for i in range(3) for m in _turn(i)]
+    context, budget = _budget(messages, keep_turns=1)
+
+    async def summarize(prompt):
+        # The conversation moves on while the summary is generated
+        context.set_messages([SYSTEM] + _turn(9))
+        return "Summary."
+
+    budget._summarize = summarize
+    asyncio.run(budget._compact())
+    assert context.get_messages() == [SYSTEM] + _turn(9)
@@ -0,0 +1,204 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import http_clients
+from http_clients import HostClient, RetryBudget
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_clients.time, "monotonic", clock)
+    return clock
+
+
+def test_budget_starts_full_and_runs_out(clock):
+    budget = RetryBudget(ratio=0.5, min_per_second=0, max_balance=2)
+    assert budget.try_spend()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+
+def test_requests_earn_retries(clock):
+    budget = RetryBudget(ratio=0.5, min_per_second=0, max_balance=2)
+    while budget.try_spend():
+        pass
+    budget.record_request()
+    assert not budget.try_spend()
+    budget.record_request()
+    assert budget.try_spend()
+
+
+def test_budget_refills_over_time_up_to_the_cap(clock):
+    budget = RetryBudget(ratio=0, min_per_second=1, max_balance=3)
+    while budget.try_spend():
+        pass
+    clock.now += 1
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+    clock.now += 60
+    spent = 0
+    while budget.try_spend():
+        spent += 1
+    assert spent == 3
+
+
+def _serve(handler, scenario):
+    """Run `scenario(client, url)` against a local server answering with `handler`."""
+
+    async def run():
+        app = web.Application()
+        app.router.add_route("*", "/", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        port = runner.addresses[0][1]
+        try:
+            await scenario(f"http://127.0.0.1:{port}/")
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def _client(budget=None, **kwargs):
+    return HostClient("test", budget or RetryBudget(), backoff_base=0, backoff_cap=0, **kwargs)
+
+
+def test_retries_retryable_status():
+    statuses = [503, 503, 200]
+
+    async def handler(request):
+        return web.Response(status=statuses.pop(0))
+
+    async def scenario(url):
+        client = _client(max_attempts=3)
+        await client.start()
+        try:
+            async with client.post(url) as response:
+                assert response.status == 200
+        finally:
+            await client.close()
+
+    _serve(handler, scenario)
+    assert statuses == []
+
+
+def test_gives_up_after_max_attempts():
+    attempts = 0
+
+    async def handler(request):
+        nonlocal attempts
+        attempts += 1
+        return web.Response(status=503)
+
+    async def scenario(url):
+        client = _client(max_attempts=2)
+        await client.start()
+        try:
+            async with client.get(url) as response:
+                assert response.status == 503
+        finally:
+            await client.close()
+
+    _serve(handler, scenario)
+    assert attempts == 2
+
+
+def test_no_retry_when_budget_is_exhausted():
+    attempts = 0
+
+    async def handler(request):
+        nonlocal attempts
+        attempts += 1
+        return web.Response(status=503)
+
+    async def scenario(url):
+        budget = RetryBudget(ratio=0, min_per_second=0, max_balance=0)
+        client = _client(budget, max_attempts=3)
+        await client.start()
+        try:
+            async with client.get(url) as response:
+                assert response.status == 503
+        finally:
+            await client.close()
+
+    _serve(handler, scenario)
+    assert attempts == 1
+
+
+def test_timeouts_are_only_retried_when_idempotent():
+    attempts = 0
+
+    async def handler(request):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            await asyncio.sleep(1)
+        return web.Response(status=200)
+
+    async def scenario(url):
+        nonlocal attempts
+        client = _client(timeout=aiohttp.ClientTimeout(total=0.1), max_attempts=2)
+        await client.start()
+        try:
+            # The upstream may have acted on a POST that timed out
+            with pytest.raises(asyncio.TimeoutError):
+                async with client.post(url):
+                    pass
+            attempts = 0
+            async with client.get(url) as response:
+                assert response.status == 200
+        finally:
+            await client.close()
+
+    _serve(handler, scenario)
+    assert attempts == 2
+
+
+def test_ambiguous_gateway_errors_are_only_retried_when_idempotent():
+    requests = []
+    statuses = {"502": [502, 200], "504": [504, 200], "503": [503, 200]}
+
+    async def handler(request):
+        key = request.query["status"]
+        requests.append((request.method, key))
+        return web.Response(status=statuses[key].pop(0))
+
+    async def scenario(url):
+        client = _client(max_attempts=2)
+        await client.start()
+        try:
+            # The upstream may have created a room behind a 502/504
+            for status in ("502", "504"):
+                async with client.post(url, params={"status": status}) as response:
+                    assert response.status == int(status)
+                async with client.get(url, params={"status": status}) as response:
+                    assert response.status == 200
+            # 503 means the request was not processed
+            async with client.post(url, params={"status": "503"}) as response:
+                assert response.status == 200
+        finally:
+            await client.close()
+
+    _serve(handler, scenario)
+    assert requests == [
+        ("POST", "502"),
+        ("GET", "502"),
+        ("POST", "504"),
+        ("GET", "504"),
+        ("POST", "503"),
+        ("POST", "503"),
+    ]
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+import metrics
+from idempotency import CallSetupDeduplicator, IdempotencyBackend, InMemoryIdempotencyBackend
+
+
+def _replayed(source: str) -> float:
+    return metrics.CALL_SETUP_REPLAYED_TOTAL._values.get((source,), 0)
+
+
+def test_backend_must_implement_every_method():
+    class Partial(IdempotencyBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_in_memory_backend_add_and_expiry():
+    async def scenario():
+        backend = InMemoryIdempotencyBackend()
+        assert await backend.add("k", "a", ttl=0.01)
+        assert not await backend.add("k", "b", ttl=0.01)
+        assert await backend.get("k") == "a"
+        await asyncio.sleep(0.02)
+        assert await backend.get("k") is None
+        assert await backend.add("k", "c", ttl=1)
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_requests_share_one_setup():
+    async def scenario():
+        dedup = CallSetupDeduplicator()
+        runs = 0
+        release = asyncio.Event()
+
+        async def setup():
+            nonlocal runs
+            runs += 1
+            await release.wait()
+            return "<Response/>"
+
+        before = _replayed("in_flight")
+        first = asyncio.create_task(dedup.run("CA1", setup))
+        second = asyncio.create_task(dedup.run("CA1", setup))
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(first, second) == ["<Response/>", "<Response/>"]
+        assert runs == 1
+        assert _replayed("in_flight") == before + 1
+
+    asyncio.run(scenario())
+
+
+def test_later_retry_replays_stored_result():
+    async def scenario():
+        dedup = CallSetupDeduplicator()
+        runs = 0
+
+        async def setup():
+            nonlocal runs
+            runs += 1
+            return f"<Response>{runs}</Response>"
+
+        before = _replayed("stored")
+        assert await dedup.run("CA1", setup) == "<Response>1</Response>"
+        assert await dedup.run("CA1", setup) == "<Response>1</Response>"
+        assert await dedup.run("CA2", setup) == "<Response>2</Response>"
+        assert runs == 2
+        assert _replayed("stored") == before + 1
+
+    asyncio.run(scenario())
+
+
+def test_setup_survives_abandoned_request():
+    async def scenario():
+        dedup = CallSetupDeduplicator()
+        runs = 0
+
+        async def setup():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return "<Response/>"
+
+        # Twilio gave up on the first request and retried
+        first = asyncio.create_task(dedup.run("CA1", setup))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await dedup.run("CA1", setup) == "<Response/>"
+        assert runs == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_setup_is_retried():
+    async def scenario():
+        dedup = CallSetupDeduplicator()
+        attempts = 0
+
+        async def setup():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise RuntimeError("Daily unavailable")
+            return "<Response/>"
+
+        with pytest.raises(RuntimeError):
+            await dedup.run("CA1", setup)
+        assert await dedup.run("CA1", setup) == "<Response/>"
+        assert attempts == 2
+
+    asyncio.run(scenario())
+
+
+def test_waits_for_setup_claimed_by_another_instance():
+    async def scenario():
+        backend = InMemoryIdempotencyBackend()
+        other = CallSetupDeduplicator(backend, poll_interval=0.01)
+        ours = CallSetupDeduplicator(backend, poll_interval=0.01)
+        release = asyncio.Event()
+
+        async def other_setup():
+            await release.wait()
+            return "<Response>other</Response>"
+
+        async def our_setup():
+            raise AssertionError("setup ran twice")
+
+        before = _replayed("other_instance")
+        theirs = asyncio.create_task(other.run("CA1", other_setup))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(ours.run("CA1", our_setup))
+        await asyncio.sleep(0.03)
+        assert not waiting.done()
+        release.set()
+        assert await waiting == "<Response>other</Response>"
+        assert await theirs == "<Response>other</Response>"
+        assert _replayed("other_instance") == before + 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import ragprocessing
+from rag_cache import SemanticQueryCache, cache_scope, normalize_query
+
+GREETING = normalize_query("Thank you for calling Thérapie Clinic, how can I help you today?")
+
+
+def test_normalize_query():
+    assert normalize_query("  How MUCH is it?!  ") == "how much is it"
+
+
+def test_self_contained_questions_share_the_global_scope():
+    assert cache_scope("how much is laser hair removal", "Is there anything else?") == ""
+    assert cache_scope("how much is laser hair removal", "") == ""
+    assert cache_scope("how much is it", "Botox is our most popular treatment.") == (
+        "botox is our most popular treatment"
+    )
+    assert cache_scope("yes the lower legs please", "Which area?") == "which area"
+    assert cache_scope("the legs", "Which area?") == "which area"
+
+
+def test_exact_hits_are_scoped():
+    cache = SemanticQueryCache()
+    cache.put(GREETING, "how much is botox", [1.0, 0.0], "- Botox pricing", cache.generation)
+    assert cache.get(GREETING, "how much is botox") == "- Botox pricing"
+    assert cache.get("would you like to book", "how much is botox") is None
+
+
+def test_semantic_hits_compare_user_text_within_scope():
+    cache = SemanticQueryCache(similarity=0.95)
+    cache.put(GREETING, "how much is botox", [1.0, 0.0, 0.0], "- Botox pricing", cache.generation)
+    cache.put(GREETING, "what time do you open", [0.0, 1.0, 0.0], "- Opening hours", cache.generation)
+
+    assert cache.get_similar(GREETING, [0.99, 0.05, 0.0]) == "- Botox pricing"
+    assert cache.get_similar(GREETING, [0.6, 0.6, 0.5]) is None
+    assert cache.get_similar("is there anything else", [1.0, 0.0, 0.0]) is None
+
+
+def test_lru_eviction_and_expiry():
+    cache = SemanticQueryCache(max_size=2, ttl=0.01)
+    for i, text in enumerate(("a", "b", "c")):
+        cache.put("", text, [1.0, float(i)], text.upper(), cache.generation)
+    assert len(cache) == 2
+    assert cache.get("", "a") is None
+    time.sleep(0.02)
+    assert cache.get("", "c") is None
+
+
+def test_clear_drops_entries_and_stale_lookups():
+    cache = SemanticQueryCache()
+    started = cache.generation
+    cache.put("", "a", np.ones(2), "A", started)
+    cache.clear()
+    assert cache.get("", "a") is None
+    # A lookup that started before the clear is not stored
+    cache.put("", "b", np.ones(2), "B", started)
+    assert len(cache) == 0
+
+
+@pytest.fixture
+def rag(monkeypatch):
+    """rag_lookup against a fake embedding model and Qdrant client, with a fresh cache."""
+    queries = []
+
+    def encode(texts):
+        # Hash words into a small bag-of-words vector
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in normalize_query(text).split():
+                vectors[row, hash(word) % 64] += 1.0
+        return vectors
+
+    async def query_points(collection_name, query, limit, with_payload):
+        queries.append(query)
+        point = SimpleNamespace(payload={"context": "Laser pricing", "responseGuidelines": "Quote per area"})
+        return SimpleNamespace(points=[point])
+
+    monkeypatch.setattr(ragprocessing, "_encode", encode)
+    monkeypatch.setattr(ragprocessing, "_qdrant_client", SimpleNamespace(query_points=query_points))
+    monkeypatch.setattr(ragprocessing, "_collection_name", "test")
+    monkeypatch.setattr(ragprocessing, "_query_cache", SemanticQueryCache())
+    return queries
+
+
+def test_repeated_question_hits_after_different_assistant_turns(rag):
+    async def scenario():
+        first = await ragprocessing.rag_lookup(
+            "How much is laser hair removal?", "Thank you for calling, how can I help you today?"
+        )
+        # Another caller, who asked something else first
+        second = await ragprocessing.rag_lookup(
+            "how much is laser hair removal", "Your appointment is booked. Anything else?"
+        )
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == "- Laser pricing, Quote per area"
+    assert len(rag) == 1
+
+
+def test_replies_are_only_cached_for_the_message_they_answer(rag):
+    async def scenario():
+        await ragprocessing.rag_lookup("yes please", "Would you like to hear about laser?")
+        await ragprocessing.rag_lookup("yes please", "Shall I book you in for Tuesday?")
+        await ragprocessing.rag_lookup("yes please", "Would you like to hear about laser?")
+
+    asyncio.run(scenario())
+    assert len(rag) == 2
@@ -0,0 +1,130 @@
+import asyncio
+
+from rag_processor import RAG_CONTEXT_MARKER, SpeculativeRetriever, place_rag_context
+
+
+class FakeLookup:
+    """Lookup whose calls finish when the test says so."""
+
+    def __init__(self):
+        self.queries = []
+        self._gates = {}
+
+    async def __call__(self, query: str, scope: str) -> str:
+        self.queries.append(query)
+        gate = self._gates.setdefault(query, asyncio.Event())
+        await gate.wait()
+        if query.startswith("fail"):
+            raise RuntimeError("qdrant unavailable")
+        return f"result for {query}"
+
+    def finish(self, query: str):
+        self._gates.setdefault(query, asyncio.Event()).set()
+
+
+def test_reuses_speculative_result():
+    async def scenario():
+        lookup = FakeLookup()
+        lookup.finish("q1")
+        retriever = SpeculativeRetriever(lookup)
+        retriever.speculate("greeting", "how much is laser hair removal", "q1")
+        await asyncio.sleep(0)
+        result = await retriever.result("greeting", "how much is laser hair removal", "q2", 1)
+        assert result == ("result for q1", "hit")
+        assert lookup.queries == ["q1"]
+
+    asyncio.run(scenario())
+
+
+def test_joins_in_flight_lookup_for_similar_text():
+    async def scenario():
+        lookup = FakeLookup()
+        retriever = SpeculativeRetriever(lookup)
+        retriever.speculate("greeting", "how much is laser hair removal", "q1")
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(
+            retriever.result("greeting", "how much is laser hair removal?", "q2", 1)
+        )
+        await asyncio.sleep(0)
+        lookup.finish("q1")
+        assert await waiting == ("result for q1", "wait")
+        assert lookup.queries == ["q1"]
+
+    asyncio.run(scenario())
+
+
+def test_final_text_differs_from_in_flight_speculation():
+    async def scenario():
+        lookup = FakeLookup()
+        lookup.finish("final")
+        retriever = SpeculativeRetriever(lookup)
+        retriever.speculate("greeting", "do you do", "interim")
+        await asyncio.sleep(0)
+        # The interim lookup is still running when the turn ends
+        result = await retriever.result("greeting", "do you do botox on saturdays", "final", 1)
+        assert result == ("result for final", "miss")
+        assert lookup.queries == ["interim", "final"]
+
+    asyncio.run(scenario())
+
+
+def test_scope_must_match_exactly():
+    async def scenario():
+        lookup = FakeLookup()
+        lookup.finish("q1")
+        lookup.finish("q2")
+        retriever = SpeculativeRetriever(lookup)
+        retriever.speculate("greeting", "yes please", "q1")
+        await asyncio.sleep(0)
+        result = await retriever.result("would you like to book", "yes please", "q2", 1)
+        assert result == ("result for q2", "miss")
+
+    asyncio.run(scenario())
+
+
+def test_interim_bursts_are_coalesced():
+    async def scenario():
+        lookup = FakeLookup()
+        retriever = SpeculativeRetriever(lookup)
+        retriever.speculate("greeting", "how", "q1")
+        await asyncio.sleep(0)
+        retriever.speculate("greeting", "how much", "q2")
+        retriever.speculate("greeting", "how much is it for", "q3")
+        lookup.finish("q1")
+        lookup.finish("q3")
+        for _ in range(5):
+            await asyncio.sleep(0)
+        result = await retriever.result("greeting", "how much is it for", "q4", 1)
+        assert result == ("result for q3", "hit")
+        assert lookup.queries == ["q1", "q3"]
+
+    asyncio.run(scenario())
+
+
+def test_timeout_and_error():
+    async def scenario():
+        lookup = FakeLookup()
+        retriever = SpeculativeRetriever(lookup)
+        assert await retriever.result("greeting", "slow question", "slow", 0.01) == (None, "timeout")
+        retriever.cancel()
+
+        lookup.finish("fail")
+        assert await retriever.result("greeting", "other question", "fail", 1) == (None, "error")
+
+    asyncio.run(scenario())
+
+
+def test_rag_context_trails_the_conversation():
+    messages = [
+        {"role": "system", "content": "prompt"},
+        {"role": "user", "content": "hi"},
+    ]
+    place_rag_context(messages, "- Opening hours, 8am")
+    assert messages[-1]["content"] == f"{RAG_CONTEXT_MARKER}\n- Opening hours, 8am"
+
+    messages.append({"role": "assistant", "content": "Hello"})
+    messages.append({"role": "user", "content": "thanks"})
+    # No new context: the previous one moves to the end
+    place_rag_context(messages, None)
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "user", "system"]
+    assert messages[-1]["content"].endswith("8am")
@@ -0,0 +1,111 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import metrics
+import server
+from capacity import overflow_twiml
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No lifespan: these endpoints need none of the warm-up
+    monkeypatch.setattr(server.app.state, "http", None, raising=False)
+    monkeypatch.delenv("VOICEMAIL_WEBHOOK_URL", raising=False)
+    return TestClient(server.app)
+
+
+def _recording(**overrides):
+    return {
+        "CallSid": "CA1",
+        "RecordingSid": "RE1",
+        "RecordingUrl": "https://api.twilio.com/recordings/RE1",
+        "RecordingStatus": "completed",
+        "RecordingDuration": "12",
+        **overrides,
+    }
+
+
+def test_recording_is_posted_to_the_voicemail_endpoint_not_call():
+    twiml = overflow_twiml(0, mode="voicemail", voicemail_status_url="/call/voicemail/status?caller=x")
+    assert 'action="/call/voicemail"' in twiml
+    assert 'recordingStatusCallback="/call/voicemail/status?caller=x"' in twiml
+
+
+def test_record_action_hangs_up(client):
+    response = client.post("/call/voicemail", data={"CallSid": "CA1", "RecordingDuration": "12"})
+    assert response.status_code == 200
+    assert "<Hangup />" in response.text
+    assert "<Record" not in response.text
+    assert "<Redirect" not in response.text
+
+
+def test_completed_recording_is_forwarded(client, monkeypatch):
+    forwarded = []
+
+    async def forward(http, url, voicemail):
+        forwarded.append((url, voicemail))
+
+    monkeypatch.setattr(server, "forward_voicemail", forward)
+    monkeypatch.setenv("VOICEMAIL_WEBHOOK_URL", "https://clinic.example/voicemail")
+    before = metrics.VOICEMAILS_TOTAL._values.get(("forwarded",), 0)
+
+    response = client.post("/call/voicemail/status?caller=%2B15550100", data=_recording())
+
+    assert response.json() == {"recording_sid": "RE1", "result": "forwarded"}
+    assert forwarded == [
+        (
+            "https://clinic.example/voicemail",
+            {
+                "call_id": "CA1",
+                "caller_phone": "+15550100",
+                "recording_sid": "RE1",
+                "recording_url": "https://api.twilio.com/recordings/RE1",
+                "duration": 12,
+            },
+        )
+    ]
+    assert metrics.VOICEMAILS_TOTAL._values[("forwarded",)] == before + 1
+
+
+def test_recording_is_only_logged_without_a_webhook(client):
+    response = client.post("/call/voicemail/status?caller=%2B15550100", data=_recording())
+    assert response.json() == {"recording_sid": "RE1", "result": "logged"}
+
+
+def test_forwarding_failure_is_reported(client, monkeypatch):
+    async def forward(http, url, voicemail):
+        raise RuntimeError("webhook down")
+
+    monkeypatch.setattr(server, "forward_voicemail", forward)
+    monkeypatch.setenv("VOICEMAIL_WEBHOOK_URL", "https://clinic.example/voicemail")
+    response = client.post("/call/voicemail/status", data=_recording())
+    assert response.json() == {"recording_sid": "RE1", "result": "failed"}
+
+
+def test_failed_recording_is_not_forwarded(client, monkeypatch):
+    async def forward(http, url, voicemail):
+        raise AssertionError("should not forward")
+
+    monkeypatch.setattr(server, "forward_voicemail", forward)
+    monkeypatch.setenv("VOICEMAIL_WEBHOOK_URL", "https://clinic.example/voicemail")
+    response = client.post("/call/voicemail/status", data=_recording(RecordingStatus="failed"))
+    assert response.json() == {"recording_sid": "RE1", "result": "failed"}
+
+
+def test_malformed_overflow_attempt_is_treated_as_the_first(client, monkeypatch):
+    attempts = []
+
+    async def setup_call(app, call_sid, caller_phone, *, overflow_attempt, received_at):
+        attempts.append(overflow_attempt)
+        return "<Response />"
+
+    class Dedup:
+        async def run(self, key, setup):
+            return await setup()
+
+    monkeypatch.setattr(server, "setup_call", setup_call)
+    monkeypatch.setattr(server.app.state, "call_dedup", Dedup(), raising=False)
+    for query in ("abc", "-2", "1"):
+        response = client.post(f"/call?overflow_attempt={query}", data={"CallSid": "CA1"})
+        assert response.status_code == 200
+    assert attempts == [0, 0, 1]
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import stat
+import time
+
+import tts_cache
+from tts_cache import TTSCache, cache_key, is_template_phrase
+
+
+def test_template_phrases():
+    assert is_template_phrase("Is there anything else I can help you with?")
+    assert is_template_phrase("Thank you for calling Thérapie Clinic, how can I help you today?")
+    assert is_template_phrase("Let me check that for you.")
+
+
+def test_personal_details_are_not_template_phrases():
+    assert not is_template_phrase("Your appointment is on the 14th at 3pm.")
+    assert not is_template_phrase("Thanks Sarah, let me check that for you.")
+    assert not is_template_phrase("I have you down as sarah@example.com, is that right?")
+    assert not is_template_phrase("Is your number five five five, one two three four?")
+    assert not is_template_phrase("See you at ten o'clock.")
+
+
+def test_only_frequent_template_phrases_are_cached(tmp_path, monkeypatch):
+    filled = []
+
+    async def fill(self, key):
+        filled.append(key[0])
+
+    monkeypatch.setattr(TTSCache, "_fill", fill)
+
+    async def scenario():
+        cache = TTSCache(str(tmp_path), min_count=2)
+        for text in ("Let me check that for you.", "Thanks Sarah, see you soon."):
+            for _ in range(3):
+                cache.record_miss(cache_key(text, "voice", 24000, "sonic-2"))
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert filled == ["Let me check that for you."]
+
+
+def test_min_count_zero_disables_automatic_caching(tmp_path, monkeypatch):
+    filled = []
+
+    async def fill(self, key):
+        filled.append(key[0])
+
+    monkeypatch.setattr(TTSCache, "_fill", fill)
+
+    async def scenario():
+        cache = TTSCache(str(tmp_path), min_count=0)
+        for _ in range(5):
+            cache.record_miss(cache_key("Let me check that for you.", "voice", 24000, "sonic-2"))
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert filled == []
+
+
+def test_files_are_private_and_expire(tmp_path):
+    directory = tmp_path / "tts"
+    key = cache_key("Let me check that for you.", "voice", 24000, "sonic-2")
+
+    async def scenario():
+        cache = TTSCache(str(directory), max_age=60)
+        await cache.put(key, b"\x00\x01" * 100)
+        return cache._path(key)
+
+    path = asyncio.run(scenario())
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    # Older than max_age: removed when the next cache (e.g. after a restart) starts
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    cache = TTSCache(str(directory), max_age=60)
+    assert not os.path.exists(path)
+    assert asyncio.run(cache.get(key)) is None
+
+
+def test_default_directory_is_not_in_tmp():
+    assert not tts_cache.DEFAULT_CACHE_DIR.startswith("/tmp")
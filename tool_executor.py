@@ -0,0 +1,193 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Async execution of the bot's tool backends.
+
+The `model_config` tool functions are synchronous. Called inline from a
+function-call handler, a slow practice-management request would stall the
+event loop, and with it the audio of every call in the process. The
+`ToolExecutor` runs blocking backends on a bounded thread pool and wraps each
+handler with a per-tool timeout, a fallback result for the LLM, and latency
+metrics.
+
+Pipecat starts the tool calls of one LLM response as separate tasks, so
+independent tools requested together run concurrently once their backends no
+longer block the event loop.
+"""
+
+import asyncio
+import dataclasses
+import functools
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from loguru import logger
+from pipecat.services.llm_service import FunctionCallParams
+
+import metrics
+
+DEFAULT_FALLBACK = {
+    "error": "The clinic system did not respond in time. Apologise, and offer to take a message "
+    "or have the clinic call the patient back."
+}
+
+
+class ToolExecutor:
+    """Runs tool backends off the event loop with timeouts and fallbacks.
+
+    A timed-out backend keeps running in its thread (Python threads cannot be
+    cancelled) but the LLM gets the fallback right away; `max_workers` bounds
+    how many backend calls can be in flight in this process.
+
+    Args:
+        max_workers: Size of the thread pool for blocking backends.
+        default_timeout: Seconds a tool may take unless registered otherwise.
+    """
+
+    def __init__(self, max_workers: int = 8, default_timeout: float = 5.0):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self.default_timeout = default_timeout
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call a blocking backend on the thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+
+    def register(
+        self,
+        llm,
+        name: str,
+        handler: Callable[[FunctionCallParams], Awaitable[None]],
+        *,
+        timeout: Optional[float] = None,
+        fallback: Optional[dict] = None,
+        cancel_on_interruption: bool = True,
+    ):
+        """Register `handler` with the LLM under a timeout, fallback and metrics.
+
+        Args:
+            llm: LLM service to register the function with.
+            name: Function name, as in the tool schema.
+            handler: Function-call handler; blocking work should go through `run()`.
+            timeout: Seconds before the fallback is returned instead.
+            fallback: Result given to the LLM on timeout or unexpected error.
+            cancel_on_interruption: Passed through to `register_function`.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        fallback = fallback or DEFAULT_FALLBACK
+
+        async def guarded(params: FunctionCallParams):
+            started = time.perf_counter()
+            outcome = None
+
+            async def result_callback(result, **kwargs):
+                nonlocal outcome
+                outcome = "error" if isinstance(result, dict) and "error" in result else "ok"
+                await params.result_callback(result, **kwargs)
+
+            try:
+                await asyncio.wait_for(
+                    handler(dataclasses.replace(params, result_callback=result_callback)), timeout
+                )
+            except asyncio.TimeoutError:
+                if outcome is None:
+                    outcome = "timeout"
+                    logger.warning(f"Tool {name} timed out after {timeout}s, returning fallback")
+                    await params.result_callback(fallback)
+            except Exception as e:
+                if outcome is None:
+                    outcome = "error"
+                    logger.error(f"Tool {name} failed: {e}")
+                    await params.result_callback(fallback)
+            finally:
+                metrics.TOOL_CALL_SECONDS.observe(
+                    time.perf_counter() - started, tool=name, outcome=outcome or "cancelled"
+                )
+
+        llm.register_function(name, guarded, cancel_on_interruption=cancel_on_interruption)
+
+
+_executor: Optional[ToolExecutor] = None
+
+
+def get_tool_executor() -> ToolExecutor:
+    """Return the process-wide executor, so all calls share one bounded pool."""
+    global _executor
+    if _executor is None:
+        _executor = ToolExecutor(
+            max_workers=int(os.getenv("TOOL_THREADS", "8")),
+            default_timeout=float(os.getenv("TOOL_TIMEOUT", "5")),
+        )
+    return _executor
+
+
+async def prefetch_tool_results(
+    calls: List[Tuple[str, Callable[[FunctionCallParams], Awaitable[None]], dict]],
+    llm,
+    context,
+    timeout: float = 2.0,
+) -> List[dict]:
+    """Run tool handlers ahead of the LLM and return their results as context messages.
+
+    The messages look exactly like the LLM had called the tools itself (an
+    assistant tool-call message followed by the tool results), so the model
+    can answer from them without a tool round trip. Calls that fail or time
+    out are left out; the LLM can still call those tools normally.
+
+    Args:
+        calls: (function name, handler, arguments) for each tool to run.
+        llm: LLM service passed to the handlers.
+        context: LLM context passed to the handlers.
+        timeout: Seconds to wait for each call.
+
+    Returns:
+        List[dict]: Messages to add to the context (empty if nothing succeeded).
+    """
+
+    async def run_one(name, handler, arguments):
+        results = []
+
+        async def result_callback(result, **kwargs):
+            results.append(result)
+
+        tool_call_id = f"prefetch_{uuid.uuid4().hex[:12]}"
+        params = FunctionCallParams(name, tool_call_id, arguments, llm, context, result_callback)
+        try:
+            await asyncio.wait_for(handler(params), timeout)
+        except Exception as e:
+            logger.warning(f"Prefetching {name} failed: {e!r}")
+        result = results[0] if results else None
+        if result is None or (isinstance(result, dict) and "error" in result):
+            metrics.TOOL_PREFETCH_TOTAL.inc(tool=name, result="failed")
+            return None
+        return tool_call_id, name, arguments, result
+
+    done = [r for r in await asyncio.gather(*(run_one(*call) for call in calls)) if r]
+    if not done:
+        return []
+    # Same layout as pipecat's OpenAI assistant aggregator uses for real tool calls
+    messages = [
+        {
+            "role": "assistant",
+            "tool_calls": [
+                {
+                    "id": tool_call_id,
+                    "function": {"name": name, "arguments": json.dumps(arguments)},
+                    "type": "function",
+                }
+                for tool_call_id, name, arguments, _ in done
+            ],
+        }
+    ]
+    messages.extend(
+        {"role": "tool", "content": json.dumps(result), "tool_call_id": tool_call_id}
+        for tool_call_id, _, _, result in done
+    )
+    return messages
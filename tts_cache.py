@@ -0,0 +1,363 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Cache of synthesized speech for fixed and frequent phrases.
+
+The greeting, "give me one second to search this up", confirmations and
+sign-offs were synthesized again on every call. `TTSCache` keeps their audio,
+keyed on (text, voice_id, sample_rate, model):
+
+- an in-memory LRU, bounded in bytes, answers most hits without I/O
+- behind it, an on-disk store of raw 16-bit PCM files (one per phrase) that
+  survives restarts and is shared by the bot workers; files are read with mmap
+
+`CachedCartesiaTTSService` plays cached phrases straight to the output
+instead of sending them to Cartesia. Phrases enter the cache when they are
+preloaded (`FIXED_PHRASES`) or once they have been spoken `min_count` times.
+
+Responses are read back to patients with their names, appointment times and
+phone numbers, so frequent phrases are only cached automatically if they
+look like templates (see `is_template_phrase`). Cached audio stays in memory
+for the life of the process and on disk for `max_age` seconds (7 days by
+default), in a directory only the bot's user can read.
+"""
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncGenerator, Dict, Iterable, Optional, Tuple
+
+import aiohttp
+from loguru import logger
+from pipecat.frames.frames import Frame, InterruptionFrame, TTSAudioRawFrame, TTSStartedFrame
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.services.cartesia.tts import CartesiaTTSService
+
+import metrics
+
+CARTESIA_API_URL = "https://api.cartesia.ai"
+CARTESIA_VERSION = "2024-11-13"
+
+# Phrases the bot says on most calls, synthesized ahead of time
+FIXED_PHRASES = (
+    "Ok thank you give me one second to search this up",
+    "Give me one second to search this up.",
+    "Is there anything else I can help you with?",
+    "You're welcome, have a great day!",
+)
+
+CacheKey = Tuple[str, str, int, str]
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tts-cache")
+
+_WORD = re.compile(r"[^\W\d_][\w'’-]*")
+# Capitalized words that do not make a sentence personal
+_COMMON_PROPER_WORDS = frozenset({"I", "I'm", "I'll", "I've", "I'd", "Thérapie", "Clinic", "Ok", "OK"})
+_NUMBER_WORDS = frozenset(
+    "zero oh one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+    "fifteen sixteen seventeen eighteen nineteen twenty thirty forty fifty sixty seventy eighty "
+    "ninety hundred thousand o'clock".split()
+)
+
+
+def is_template_phrase(text: str) -> bool:
+    """Whether `text` may be cached automatically: no digits, emails or names.
+
+    Any capitalized word other than the first (and a few common words) is
+    taken to be a name, and number words to be part of a time or phone number.
+    """
+    if any(c.isdigit() for c in text) or "@" in text:
+        return False
+    words = _WORD.findall(text)
+    for i, word in enumerate(words):
+        if word.lower() in _NUMBER_WORDS:
+            return False
+        if i > 0 and word[0].isupper() and word not in _COMMON_PROPER_WORDS:
+            return False
+    return True
+
+
+def cache_key(text: str, voice_id: str, sample_rate: int, model: str) -> CacheKey:
+    # Whitespace at the ends does not change the audio
+    return (text.strip(), voice_id, sample_rate, model)
+
+
+async def synthesize(text: str, voice_id: str, sample_rate: int, model: str) -> bytes:
+    """Synthesize `text` with Cartesia's HTTP API as raw 16-bit mono PCM."""
+    payload = {
+        "model_id": model,
+        "transcript": text,
+        "voice": {"mode": "id", "id": voice_id},
+        "output_format": {"container": "raw", "encoding": "pcm_s16le", "sample_rate": sample_rate},
+        "language": "en",
+    }
+    headers = {"Cartesia-Version": CARTESIA_VERSION, "X-API-Key": os.getenv("CARTESIA_API_KEY", "")}
+    timeout = aiohttp.ClientTimeout(total=10, connect=3)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.post(f"{CARTESIA_API_URL}/tts/bytes", json=payload, headers=headers) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Cartesia returned {response.status}: {await response.text()}")
+            return await response.read()
+
+
+class TTSCache:
+    """In-memory LRU in front of an on-disk store of PCM audio.
+
+    Args:
+        directory: Directory of the on-disk store (created if needed).
+        max_memory_bytes: Maximum audio kept in memory.
+        max_disk_bytes: Maximum audio kept on disk; the least recently
+            written files are removed first.
+        max_chars: Longer texts are never cached.
+        min_count: Times a template phrase must be spoken before it is
+            cached. 0 disables automatic caching.
+        max_age: Seconds a file is kept on disk.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        max_chars: int = 120,
+        min_count: int = 3,
+        max_age: float = 7 * 24 * 60 * 60,
+    ):
+        self._directory = directory
+        self._max_memory_bytes = max_memory_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self.max_chars = max_chars
+        self._min_count = min_count
+        self._max_age = max_age
+        self._memory: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._counts: Dict[CacheKey, int] = {}
+        self._filling: Dict[CacheKey, asyncio.Task] = {}
+        # Private to the bot's user, like the files in it
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._trim_disk()
+
+    def _path(self, key: CacheKey) -> str:
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self._directory, f"{digest}.pcm")
+
+    def _remember(self, key: CacheKey, audio: bytes):
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self._max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return bytes(mapped)
+        except (FileNotFoundError, ValueError):
+            # ValueError: empty file (an interrupted write)
+            return None
+
+    def _write(self, path: str, audio: bytes):
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+            f.write(audio)
+        os.replace(tmp, path)
+        self._trim_disk()
+
+    def _trim_disk(self):
+        files = []
+        total = 0
+        with os.scandir(self._directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pcm"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        expired_before = time.time() - self._max_age
+        for mtime, size, path in sorted(files):
+            if total <= self._max_disk_bytes and mtime >= expired_before:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    async def get(self, key: CacheKey) -> Optional[bytes]:
+        """Return the cached audio for `key`, or None."""
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            metrics.TTS_CACHE_REQUESTS_TOTAL.inc(result="memory")
+            return audio
+        audio = await asyncio.to_thread(self._read, self._path(key))
+        if audio:
+            self._remember(key, audio)
+            metrics.TTS_CACHE_REQUESTS_TOTAL.inc(result="disk")
+            return audio
+        metrics.TTS_CACHE_REQUESTS_TOTAL.inc(result="miss")
+        return None
+
+    async def put(self, key: CacheKey, audio: bytes):
+        """Store audio in memory and on disk."""
+        if not audio:
+            return
+        self._remember(key, audio)
+        try:
+            await asyncio.to_thread(self._write, self._path(key), audio)
+        except OSError as e:
+            logger.warning(f"Could not write TTS cache file: {e}")
+
+    async def get_or_synthesize(self, key: CacheKey) -> Optional[bytes]:
+        """Return the audio for `key`, synthesizing and storing it on a miss.
+
+        Concurrent callers share one synthesis. Returns None if it fails.
+        """
+        audio = await self.get(key)
+        if audio is not None:
+            return audio
+        task = self._filling.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fill(key))
+            self._filling[key] = task
+        return await asyncio.shield(task)
+
+    async def _fill(self, key: CacheKey) -> Optional[bytes]:
+        try:
+            audio = await synthesize(*key)
+            await self.put(key, audio)
+            return audio
+        except Exception as e:
+            logger.warning(f"TTS cache fill failed for '{key[0]}': {e}")
+            return None
+        finally:
+            self._filling.pop(key, None)
+
+    def record_miss(self, key: CacheKey):
+        """Count a synthesized phrase; cache it in the background once it is frequent."""
+        if (
+            not self._min_count
+            or len(key[0]) > self.max_chars
+            or key in self._filling
+            or not is_template_phrase(key[0])
+        ):
+            return
+        count = self._counts.get(key, 0) + 1
+        if count >= self._min_count:
+            self._counts.pop(key, None)
+            self._filling[key] = asyncio.create_task(self._fill(key))
+            return
+        self._counts[key] = count
+        if len(self._counts) > 10000:
+            # Forget one-off phrases rather than growing without bound
+            self._counts.clear()
+
+    async def preload(self, keys: Iterable[CacheKey]):
+        """Make sure `keys` are cached, synthesizing any that are missing."""
+        await asyncio.gather(*(self.get_or_synthesize(key) for key in keys))
+
+
+_cache: Optional[TTSCache] = None
+
+
+def get_tts_cache() -> TTSCache:
+    """Return the process-wide cache (bot workers share the on-disk store)."""
+    global _cache
+    if _cache is None:
+        _cache = TTSCache(
+            os.getenv("TTS_CACHE_DIR", DEFAULT_CACHE_DIR),
+            max_memory_bytes=int(os.getenv("TTS_CACHE_MEMORY_MB", "32")) * 1024 * 1024,
+            max_disk_bytes=int(os.getenv("TTS_CACHE_DISK_MB", "512")) * 1024 * 1024,
+            min_count=int(os.getenv("TTS_CACHE_MIN_COUNT", "3")),
+            max_age=float(os.getenv("TTS_CACHE_MAX_AGE_DAYS", "7")) * 24 * 60 * 60,
+        )
+    return _cache
+
+
+class CachedCartesiaTTSService(CartesiaTTSService):
+    """Cartesia TTS that plays cached phrases instead of synthesizing them.
+
+    Cartesia streams all sentences of an LLM response through one audio
+    context, so cached audio can only be slotted in where a new context would
+    start: the first sentence of a response, and `TTSSpeakFrame`s. Later
+    sentences are synthesized as usual (and counted towards caching).
+
+    Args:
+        cache: Cache to use; defaults to the process-wide one.
+        **kwargs: Passed to `CartesiaTTSService`.
+    """
+
+    def __init__(self, *, cache: Optional[TTSCache] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._cache = cache or get_tts_cache()
+        # A cached phrase was played and its response has not been closed yet
+        self._cached_response_open = False
+        # Where the next cached phrase's words start, relative to the response
+        self._cached_words_offset = 0.0
+
+    def cache_key(self, text: str) -> CacheKey:
+        return cache_key(text, self._voice_id, self.sample_rate, self.model_name)
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        key = self.cache_key(text)
+        cacheable = len(key[0]) <= self._cache.max_chars
+        audio = None
+        if cacheable and not self._context_id:
+            audio = await self._cache.get(key)
+
+        if audio is None:
+            if cacheable:
+                self._cache.record_miss(key)
+            # Cartesia closes its context itself, including ours before it
+            self._cached_response_open = False
+            async for frame in super().run_tts(text):
+                yield frame
+            return
+
+        logger.debug(f"{self}: Playing cached TTS [{text}]")
+        yield TTSStartedFrame()
+        # Its own audio context keeps it in order with audio still streaming
+        context_id = str(uuid.uuid4())
+        await self.create_audio_context(context_id)
+        await self.append_to_audio_context(
+            context_id, TTSAudioRawFrame(audio=audio, sample_rate=self.sample_rate, num_channels=1)
+        )
+        await self.remove_audio_context(context_id)
+
+        # Spread the words over the audio so the assistant context gets the text
+        if not self._cached_response_open:
+            self._cached_words_offset = 0.0
+        self.start_word_timestamps()
+        words = key[0].split()
+        duration = len(audio) / (2 * self.sample_rate)
+        offset = self._cached_words_offset
+        await self.add_word_timestamps(
+            [(word, offset + duration * i / len(words)) for i, word in enumerate(words)]
+        )
+        # The audio context task adds half a second of silence after each context
+        self._cached_words_offset = offset + duration + 0.5
+        self._cached_response_open = True
+        yield None
+
+    async def flush_audio(self):
+        if self._cached_response_open and not self._context_id:
+            # No Cartesia context after the cached phrase will close the response
+            self._cached_response_open = False
+            await self.add_word_timestamps([("TTSStoppedFrame", 0), ("Reset", 0)])
+        await super().flush_audio()
+
+    async def _handle_interruption(self, frame: InterruptionFrame, direction: FrameDirection):
+        await super()._handle_interruption(frame, direction)
+        self._cached_response_open = False
@@ -0,0 +1,139 @@
+#
+# Copyright (c) 2024–2025, Daily
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Per-turn latency breakdown, from the caller's end of speech to first audio out.
+
+`TurnLatencyObserver` is a pipeline observer (passed to `PipelineTask`). It
+timestamps each stage of a user turn as frames leave the processor that
+produces them, using the pipeline clock:
+
+    vad_stop         transport.input()  VADUserStoppedSpeakingFrame (last one of the turn)
+    turn_end         transport.input()  UserStoppedSpeakingFrame (smart-turn decided)
+    stt_final        stt                TranscriptionFrame (last final of the turn)
+    rag_done         rag                OpenAILLMContextFrame
+    llm_first_token  llm                LLMTextFrame
+    tts_first_byte   tts                TTSAudioRawFrame
+    audio_out        transport.output() BotStartedSpeakingFrame
+
+Each stage is recorded as the time since `vad_stop`, in the process-wide
+`turn_latency_seconds` histogram and in the call's own samples, which
+`summary()` condenses for the end-of-call log. Turns the caller abandons or
+talks over before the bot answers are not recorded.
+"""
+
+import statistics
+from typing import Dict, List, Optional
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    LLMTextFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+    VADUserStoppedSpeakingFrame,
+)
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+import metrics
+
+STAGES = ("turn_end", "stt_final", "rag_done", "llm_first_token", "tts_first_byte", "audio_out")
+
+
+class TurnLatencyObserver(BaseObserver):
+    """Timestamps every stage of each user turn.
+
+    Args:
+        input: The input transport processor.
+        stt: The STT service.
+        rag: The processor that adds retrieval results before the LLM.
+        llm: The LLM service.
+        tts: The TTS service.
+        output: The output transport processor.
+    """
+
+    def __init__(
+        self,
+        *,
+        input: FrameProcessor,
+        stt: FrameProcessor,
+        rag: FrameProcessor,
+        llm: FrameProcessor,
+        tts: FrameProcessor,
+        output: FrameProcessor,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._input = input
+        self._stt = stt
+        self._rag = rag
+        self._llm = llm
+        self._tts = tts
+        self._output = output
+        # Stage -> pipeline clock time (ns) for the turn in progress
+        self._turn: Optional[Dict[str, int]] = None
+        # Stage -> seconds since VAD stop, one sample per completed turn
+        self._samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.turns = 0
+
+    async def on_push_frame(self, data: FramePushed):
+        if data.direction != FrameDirection.DOWNSTREAM:
+            return
+        src, frame, turn = data.source, data.frame, self._turn
+
+        if src is self._input:
+            if isinstance(frame, UserStartedSpeakingFrame):
+                # A new turn; one still waiting for its answer was talked over
+                self._turn = {}
+            elif turn is None:
+                return
+            elif isinstance(frame, VADUserStoppedSpeakingFrame) and "turn_end" not in turn:
+                # Smart-turn may hear a pause as incomplete; the last stop counts
+                turn["vad_stop"] = data.timestamp
+            elif isinstance(frame, UserStoppedSpeakingFrame):
+                turn.setdefault("turn_end", data.timestamp)
+        elif turn is None:
+            return
+        elif src is self._stt and isinstance(frame, TranscriptionFrame):
+            # Finals can trail the turn decision, until the turn goes to the LLM
+            if "rag_done" not in turn:
+                turn["stt_final"] = data.timestamp
+        elif src is self._rag and isinstance(frame, OpenAILLMContextFrame):
+            if "turn_end" in turn:
+                turn.setdefault("rag_done", data.timestamp)
+        elif src is self._llm and isinstance(frame, LLMTextFrame):
+            if "rag_done" in turn:
+                turn.setdefault("llm_first_token", data.timestamp)
+        elif src is self._tts and isinstance(frame, TTSAudioRawFrame):
+            if "rag_done" in turn:
+                turn.setdefault("tts_first_byte", data.timestamp)
+        elif src is self._output and isinstance(frame, BotStartedSpeakingFrame):
+            if "rag_done" in turn:
+                turn["audio_out"] = data.timestamp
+                self._finish(turn)
+
+    def _finish(self, turn: Dict[str, int]):
+        self._turn = None
+        vad_stop = turn.get("vad_stop")
+        if vad_stop is None:
+            return
+        self.turns += 1
+        for stage in STAGES:
+            if stage in turn:
+                seconds = max(0.0, (turn[stage] - vad_stop) / 1e9)
+                self._samples[stage].append(seconds)
+                metrics.TURN_LATENCY_SECONDS.observe(seconds, stage=stage)
+
+    def summary(self) -> str:
+        """Median and worst time since VAD stop for each stage, over this call's turns."""
+        parts = []
+        for stage in STAGES:
+            samples = self._samples[stage]
+            if samples:
+                parts.append(f"{stage} p50={statistics.median(samples):.3f}s max={max(samples):.3f}s")
+        return ", ".join(parts) or "no completed turns"